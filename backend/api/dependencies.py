@@ -1,7 +1,9 @@
 """FastAPI dependency injection"""
 from fastapi import Request
 from ..core.storage import StorageManager
+from ..core.async_storage import AsyncStorage
 from ..core.renderer import Renderer, ExportQueue
+from ..core.thumbnails import GraphThumbnailRefresher, NodeThumbnailService
 
 
 def get_storage(request: Request) -> StorageManager:
@@ -9,6 +11,11 @@ def get_storage(request: Request) -> StorageManager:
     return request.app.state.storage
 
 
+def get_async_storage(request: Request) -> AsyncStorage:
+    """Get the AsyncStorage facade (storage I/O off the event loop) from app state"""
+    return request.app.state.async_storage
+
+
 def get_renderer(request: Request) -> Renderer:
     """Get the Renderer instance from app state"""
     return request.app.state.renderer
@@ -17,3 +24,13 @@ def get_renderer(request: Request) -> Renderer:
 def get_export_queue(request: Request) -> ExportQueue:
     """Get the ExportQueue instance from app state"""
     return request.app.state.export_queue
+
+
+def get_thumbnail_service(request: Request) -> NodeThumbnailService:
+    """Get the NodeThumbnailService instance from app state"""
+    return request.app.state.thumbnail_service
+
+
+def get_graph_thumbnails(request: Request) -> GraphThumbnailRefresher:
+    """Get the GraphThumbnailRefresher instance from app state"""
+    return request.app.state.graph_thumbnails
@@ -1,20 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import FileResponse
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from ..models.graph import Graph
-from ..core.renderer import ExportQueue
-from ..core.storage import StorageManager
+from ..core.renderer import ExportJob, ExportQueue
 from .dependencies import get_export_queue
+from .media import MediaFileResponse
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
+# Seconds of silence after which the event stream sends a keepalive comment
+EVENT_KEEPALIVE_INTERVAL = 15.0
+
+
+MEDIA_TYPES = {
+    "mp4": "video/mp4",
+    "gif": "image/gif",
+    "webm": "video/webm",
+}
+
+# A quality preset, or a custom size as "WIDTHxHEIGHT" (even, 16-7680 pixels)
+QUALITY_PATTERN = r"^(480p|720p|1080p|1440p|2160p|\d{2,4}x\d{2,4})$"
+
+
+class ExportOutputRequest(BaseModel):
+    """One output format/quality of an export"""
+    format: str = Field(default="mp4", pattern="^(mp4|gif|webm)$")
+    quality: str = Field(default="1080p", pattern=QUALITY_PATTERN)
+
 
 class ExportRequest(BaseModel):
     """Request to export a graph"""
     graph: Graph
-    quality: str = Field(default="1080p", pattern="^(480p|720p|1080p|1440p|2160p)$")
+    quality: str = Field(default="1080p", pattern=QUALITY_PATTERN)
     fps: int = Field(default=30, ge=15, le=60)
-    format: str = Field(default="mp4", pattern="^(mp4|gif)$")
+    format: str = Field(default="mp4", pattern="^(mp4|gif|webm)$")
+    # Several outputs produced from a single render; overrides format/quality
+    outputs: list[ExportOutputRequest] | None = Field(default=None, min_length=1, max_length=8)
+
+
+class ExportOutputStatus(BaseModel):
+    """Status of one output of an export job"""
+    format: str
+    quality: str
+    status: str
+    progress: float
+    error: str | None = None
+    download_url: str | None = None
 
 
 class ExportStatus(BaseModel):
@@ -22,79 +54,192 @@ class ExportStatus(BaseModel):
     job_id: str
     status: str
     progress: float
+    eta: float | None = None
     error: str | None = None
     download_url: str | None = None
+    outputs: list[ExportOutputStatus] = []
     log: list[str] = []
+    # Pass as ?since= on the next poll to receive only new log lines
+    next_log_offset: int = 0
+
+
+class ExportLog(BaseModel):
+    """A page of an export job's log"""
+    job_id: str
+    lines: list[str]
+    next_offset: int
 
 
 @router.post("", response_model=dict)
 async def start_export(request: ExportRequest, export_queue: ExportQueue = Depends(get_export_queue)):
     """Start a new export job"""
     try:
-        job_id = export_queue.create_job(
+        job_id = await export_queue.create_job(
             graph=request.graph,
             quality=request.quality,
             fps=request.fps,
             format=request.format,
+            outputs=[(o.format, o.quality) for o in request.outputs] if request.outputs else None,
         )
 
+        # May be an existing identical job that is running or already done
+        job = await export_queue.get_job(job_id)
+
         return {
             "job_id": job_id,
-            "status": "pending"
+            "status": job.status
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/latest/download")
-async def download_latest_export(request: Request):
-    """Download the most recently exported file"""
-    storage: StorageManager = request.app.state.storage
-    exports = sorted(
-        storage.exports_dir.glob("*.*"),
-        key=lambda f: f.stat().st_mtime,
-        reverse=True,
-    )
-    if not exports:
+async def download_latest_export(
+    graph_id: str | None = Query(default=None),
+    export_queue: ExportQueue = Depends(get_export_queue),
+):
+    """Download the most recently exported file, optionally of one graph"""
+    job = await export_queue.latest_export(graph_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="No exports found")
 
-    latest = exports[0]
-    is_gif = latest.suffix == ".gif"
-    media_type = "image/gif" if is_gif else "video/mp4"
+    latest = job.output_file
 
-    return FileResponse(
+    return MediaFileResponse(
         path=str(latest),
-        media_type=media_type,
+        media_type=MEDIA_TYPES.get(latest.suffix.lstrip("."), "application/octet-stream"),
         filename=latest.name,
     )
 
 
-@router.get("/{job_id}", response_model=ExportStatus)
-async def get_export_status(job_id: str, export_queue: ExportQueue = Depends(get_export_queue)):
-    """Get export job status"""
-    job = export_queue.get_job(job_id)
-
-    if job is None:
-        raise HTTPException(status_code=404, detail="Job not found")
-
+def _export_status(job: ExportJob, since: int = 0) -> ExportStatus:
+    """Build the status response of a job with log lines from offset `since`"""
     download_url = None
     if job.status == "completed" and job.output_file:
-        download_url = f"/api/export/{job_id}/download"
+        download_url = f"/api/export/{job.job_id}/download"
+
+    outputs = [
+        ExportOutputStatus(
+            format=output.format,
+            quality=output.quality,
+            status=output.status,
+            progress=output.progress,
+            error=output.error,
+            download_url=(
+                f"/api/export/{job.job_id}/outputs/{index}/download"
+                if output.status == "completed" else None
+            ),
+        )
+        for index, output in enumerate(job.outputs)
+    ]
+
+    log, next_log_offset = job.get_log(since)
 
     return ExportStatus(
         job_id=job.job_id,
         status=job.status,
         progress=job.progress,
+        eta=job.eta,
         error=job.error,
         download_url=download_url,
-        log=job.log
+        outputs=outputs,
+        log=log,
+        next_log_offset=next_log_offset
+    )
+
+
+@router.get("/events")
+async def export_events(
+    job_id: list[str] = Query(..., min_length=1, max_length=100),
+    export_queue: ExportQueue = Depends(get_export_queue),
+):
+    """
+    Stream status changes of one or more export jobs as Server-Sent Events.
+
+    Pass each job as ?job_id=... Every `job` event carries the job's
+    ExportStatus with only the log lines that are new since its previous
+    event. The stream ends with an `end` event once all jobs have finished.
+    """
+    for requested in job_id:
+        if await export_queue.get_job(requested) is None:
+            raise HTTPException(status_code=404, detail=f"Job not found: {requested}")
+
+    async def stream():
+        offsets: dict[str, int] = {}
+        last_sent = time.monotonic()
+        async for job in export_queue.watch(job_id):
+            if job is None:
+                if time.monotonic() - last_sent >= EVENT_KEEPALIVE_INTERVAL:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+                continue
+            status = _export_status(job, offsets.get(job.job_id, 0))
+            offsets[job.job_id] = status.next_log_offset
+            last_sent = time.monotonic()
+            yield f"event: job\ndata: {status.model_dump_json()}\n\n"
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@router.get("/{job_id}", response_model=ExportStatus)
+async def get_export_status(
+    job_id: str,
+    since: int = Query(default=0, ge=0),
+    export_queue: ExportQueue = Depends(get_export_queue),
+):
+    """Get export job status with log lines from offset `since`"""
+    job = await export_queue.get_job(job_id, polled=True)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return _export_status(job, since)
+
+
+@router.delete("/{job_id}")
+async def cancel_export(job_id: str, export_queue: ExportQueue = Depends(get_export_queue)):
+    """Cancel a pending or running export and delete its partial files"""
+    status = await export_queue.cancel_job(job_id)
+
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if status in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Export already {status}")
+
+    # "cancelling" while another render worker stops the job, "released"
+    # when identical exports requested by others keep it running
+    return {"job_id": job_id, "status": status}
+
+
+@router.get("/{job_id}/log", response_model=ExportLog)
+async def get_export_log(
+    job_id: str,
+    since: int = Query(default=0, ge=0),
+    limit: int = Query(default=200, ge=1, le=1000),
+    export_queue: ExportQueue = Depends(get_export_queue),
+):
+    """Get a page of an export job's log"""
+    job = await export_queue.get_job(job_id, polled=True)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    lines, next_offset = job.get_log(since, limit)
+    return ExportLog(job_id=job_id, lines=lines, next_offset=next_offset)
+
+
 @router.get("/{job_id}/download")
 async def download_export(job_id: str, export_queue: ExportQueue = Depends(get_export_queue)):
     """Download exported video"""
-    job = export_queue.get_job(job_id)
+    job = await export_queue.get_job(job_id)
 
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -105,12 +250,35 @@ async def download_export(job_id: str, export_queue: ExportQueue = Depends(get_e
     if not job.output_file or not job.output_file.exists():
         raise HTTPException(status_code=404, detail="Output file not found")
 
-    is_gif = str(job.output_file).endswith('.gif')
-    media_type = "image/gif" if is_gif else "video/mp4"
-    ext = "gif" if is_gif else "mp4"
+    ext = job.output_file.suffix.lstrip(".")
 
-    return FileResponse(
+    return MediaFileResponse(
         path=str(job.output_file),
-        media_type=media_type,
+        media_type=MEDIA_TYPES.get(ext, "application/octet-stream"),
         filename=f"animation_{job_id}.{ext}"
     )
+
+
+@router.get("/{job_id}/outputs/{index}/download")
+async def download_export_output(job_id: str, index: int, export_queue: ExportQueue = Depends(get_export_queue)):
+    """Download one output of a multi-format export"""
+    job = await export_queue.get_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if index < 0 or index >= len(job.outputs):
+        raise HTTPException(status_code=404, detail="Output not found")
+
+    output = job.outputs[index]
+    if output.status != "completed":
+        raise HTTPException(status_code=400, detail="Output not completed")
+
+    if not output.output_file or not output.output_file.exists():
+        raise HTTPException(status_code=404, detail="Output file not found")
+
+    return MediaFileResponse(
+        path=str(output.output_file),
+        media_type=MEDIA_TYPES.get(output.format, "application/octet-stream"),
+        filename=f"animation_{job_id}_{output.quality}.{output.format}"
+    )
@@ -1,40 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from ..models.graph import Graph
-from ..core.storage import StorageManager
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+from typing import List, Optional, Union
+from ..models.graph import Graph, GraphDiff
+from ..core.async_storage import AsyncStorage
+from ..core.storage import VersionConflictError
 from ..core.code_generator import CodeGenerator, ValidationError
-from .dependencies import get_storage
+from ..core.renderer import Renderer, RenderError
+from ..core.thumbnails import GraphThumbnailRefresher
+from .dependencies import get_async_storage, get_graph_thumbnails, get_renderer
 
 router = APIRouter(prefix="/api/graphs", tags=["graphs"])
 
 
+# Thumbnail size used in the project list (16:9)
+THUMBNAIL_RESOLUTION = (480, 270)
+
+
+async def _render_thumbnail(graph: Graph, storage: AsyncStorage, renderer: Renderer) -> str:
+    """Render the last frame of a graph into its thumbnail; returns its URL"""
+    image_file, _ = await renderer.render_still(
+        graph=graph,
+        resolution=THUMBNAIL_RESOLUTION,
+    )
+    thumbnail_path = storage.get_thumbnail_path(graph.id)
+    image_file.replace(thumbnail_path)
+    renderer.discard_render(image_file)
+    return f"/api/graphs/{graph.id}/thumbnail?v={thumbnail_path.stat().st_mtime_ns}"
+
+
+def _etag(version: int) -> str:
+    """ETag of a graph version"""
+    return f'"{version}"'
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Version a client expects from its If-Match header.
+
+    Returns:
+        The version, or None if any version matches
+
+    Raises:
+        ValueError if the header is not a version ETag
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/").strip('"')
+    if not tag.isdigit():
+        raise ValueError(f"Invalid If-Match: {if_match}")
+    return int(tag)
+
+
 @router.post("", response_model=Graph)
-async def create_graph(graph: Graph, storage: StorageManager = Depends(get_storage)):
+async def create_graph(
+    graph: Graph,
+    response: Response,
+    storage: AsyncStorage = Depends(get_async_storage),
+    thumbnails: GraphThumbnailRefresher = Depends(get_graph_thumbnails),
+):
     """Create a new graph"""
     try:
-        storage.save_graph(graph)
+        await storage.save_graph(graph)
+        response.headers["ETag"] = _etag(await storage.graph_version(graph.id))
+        thumbnails.schedule(graph.id)
         return graph
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("", response_model=List[dict])
-async def list_graphs(storage: StorageManager = Depends(get_storage)):
-    """List all saved graphs"""
+async def list_graphs(
+    response: Response,
+    offset: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    sort: str = Query(default="modified", pattern="^(modified|name)$"),
+    order: str = Query(default="desc", pattern="^(asc|desc)$"),
+    q: str | None = Query(default=None, max_length=200),
+    storage: AsyncStorage = Depends(get_async_storage),
+):
+    """List saved graphs, a page at a time; X-Total-Count has the match count"""
     try:
-        return storage.list_graphs()
+        response.headers["X-Total-Count"] = str(await storage.count_graphs(q))
+        return await storage.list_graphs(offset, limit, sort, order == "desc", q)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{graph_id}", response_model=Graph)
-async def get_graph(graph_id: str, storage: StorageManager = Depends(get_storage)):
-    """Get a graph by ID"""
+async def get_graph(graph_id: str, response: Response, storage: AsyncStorage = Depends(get_async_storage)):
+    """Get a graph by ID; its ETag is the version PATCH expects in If-Match"""
     try:
-        graph = storage.load_graph(graph_id)
+        graph = await storage.load_graph(graph_id)
         if graph is None:
             raise HTTPException(status_code=404, detail="Graph not found")
 
+        response.headers["ETag"] = _etag(await storage.graph_version(graph_id))
         return graph
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,14 +105,22 @@ async def get_graph(graph_id: str, storage: StorageManager = Depends(get_storage
 
 
 @router.put("/{graph_id}", response_model=Graph)
-async def update_graph(graph_id: str, graph: Graph, storage: StorageManager = Depends(get_storage)):
+async def update_graph(
+    graph_id: str,
+    graph: Graph,
+    response: Response,
+    storage: AsyncStorage = Depends(get_async_storage),
+    thumbnails: GraphThumbnailRefresher = Depends(get_graph_thumbnails),
+):
     """Update an existing graph"""
     try:
         # Ensure ID matches
         if graph.id != graph_id:
             raise HTTPException(status_code=400, detail="Graph ID mismatch")
 
-        storage.save_graph(graph)
+        await storage.save_graph(graph)
+        response.headers["ETag"] = _etag(await storage.graph_version(graph_id))
+        thumbnails.schedule(graph.id)
         return graph
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -62,11 +130,51 @@ async def update_graph(graph_id: str, graph: Graph, storage: StorageManager = De
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.patch("/{graph_id}")
+async def patch_graph(
+    graph_id: str,
+    response: Response,
+    change: Union[GraphDiff, List[dict]] = Body(...),
+    if_match: Optional[str] = Header(default=None),
+    storage: AsyncStorage = Depends(get_async_storage),
+    thumbnails: GraphThumbnailRefresher = Depends(get_graph_thumbnails),
+):
+    """
+    Update part of a graph.
+
+    The body is either a node/edge-level diff or a JSON Patch (RFC 6902)
+    against the graph document. Pass the version the change is based on
+    in If-Match (or the diff's version field) to have it rejected with 409
+    if the graph was saved since. Returns the new version.
+    """
+    try:
+        expected_version = _parse_if_match(if_match)
+        if expected_version is None and isinstance(change, GraphDiff):
+            expected_version = change.version
+
+        result = await storage.patch_graph(graph_id, change, expected_version)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Graph not found")
+
+        graph, version = result
+        response.headers["ETag"] = _etag(version)
+        thumbnails.schedule(graph.id)
+        return {"version": version}
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.delete("/{graph_id}")
-async def delete_graph(graph_id: str, storage: StorageManager = Depends(get_storage)):
+async def delete_graph(graph_id: str, storage: AsyncStorage = Depends(get_async_storage)):
     """Delete a graph"""
     try:
-        success = storage.delete_graph(graph_id)
+        success = await storage.delete_graph(graph_id)
         if not success:
             raise HTTPException(status_code=404, detail="Graph not found")
         return {"success": True}
@@ -78,11 +186,65 @@ async def delete_graph(graph_id: str, storage: StorageManager = Depends(get_stor
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{graph_id}/revisions", response_model=List[dict])
+async def list_revisions(graph_id: str, storage: AsyncStorage = Depends(get_async_storage)):
+    """List the saved revisions of a graph, newest first"""
+    try:
+        revisions = await storage.list_revisions(graph_id)
+        if not revisions and await storage.load_graph(graph_id) is None:
+            raise HTTPException(status_code=404, detail="Graph not found")
+        return revisions
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{graph_id}/revisions/{revision}", response_model=Graph)
+async def get_revision(graph_id: str, revision: int, storage: AsyncStorage = Depends(get_async_storage)):
+    """Get a graph as it was saved in a revision"""
+    try:
+        graph = await storage.load_revision(graph_id, revision)
+        if graph is None:
+            raise HTTPException(status_code=404, detail="Revision not found")
+        return graph
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{graph_id}/revisions/{revision}/restore", response_model=Graph)
+async def restore_revision(
+    graph_id: str,
+    revision: int,
+    storage: AsyncStorage = Depends(get_async_storage),
+    thumbnails: GraphThumbnailRefresher = Depends(get_graph_thumbnails),
+):
+    """Make an old revision the current graph (saved as a new revision)"""
+    try:
+        graph = await storage.restore_revision(graph_id, revision)
+        if graph is None:
+            raise HTTPException(status_code=404, detail="Revision not found")
+        thumbnails.schedule(graph.id)
+        return graph
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{graph_id}/objects")
-async def get_graph_objects(graph_id: str, storage: StorageManager = Depends(get_storage)):
+async def get_graph_objects(graph_id: str, storage: AsyncStorage = Depends(get_async_storage)):
     """Get named objects in a graph (for ImportGraph node)"""
     try:
-        graph = storage.load_graph(graph_id)
+        graph = await storage.load_graph(graph_id)
         if graph is None:
             raise HTTPException(status_code=404, detail="Graph not found")
 
@@ -105,11 +267,53 @@ async def get_graph_objects(graph_id: str, storage: StorageManager = Depends(get
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{graph_id}/thumbnail")
+async def render_graph_thumbnail(
+    graph_id: str,
+    storage: AsyncStorage = Depends(get_async_storage),
+    renderer: Renderer = Depends(get_renderer),
+):
+    """Render the last frame of a saved graph as its thumbnail"""
+    try:
+        graph = await storage.load_graph(graph_id)
+        if graph is None:
+            raise HTTPException(status_code=404, detail="Graph not found")
+
+        return {"thumbnail_url": await _render_thumbnail(graph, storage, renderer)}
+    except RenderError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{graph_id}/thumbnail")
+async def get_graph_thumbnail(graph_id: str, storage: AsyncStorage = Depends(get_async_storage)):
+    """Get a graph's thumbnail image"""
+    try:
+        thumbnail_path = storage.get_thumbnail_path(graph_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not thumbnail_path.exists():
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    # URLs carry ?v=<mtime>, so each version can be cached indefinitely
+    return FileResponse(
+        path=str(thumbnail_path),
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
 @router.post("/{graph_id}/validate")
-async def validate_graph(graph_id: str, storage: StorageManager = Depends(get_storage)):
+async def validate_graph(graph_id: str, storage: AsyncStorage = Depends(get_async_storage)):
     """Validate a graph"""
     try:
-        graph = storage.load_graph(graph_id)
+        graph = await storage.load_graph(graph_id)
         if graph is None:
             raise HTTPException(status_code=404, detail="Graph not found")
 
@@ -0,0 +1,180 @@
+"""File responses for rendered media: range requests and conditional GET"""
+import os
+import stat
+from email.utils import parsedate
+from typing import Optional
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# ASGI extension for handing a file descriptor to the server (sendfile)
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a Range header into a single inclusive byte range.
+
+    Args:
+        header: Value of the Range header
+        size: Size of the file in bytes
+
+    Returns:
+        Tuple of (first byte, last byte), or None to send the whole file
+        (no header, another unit, or several ranges)
+
+    Raises:
+        ValueError if the range cannot be satisfied
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError(f"Unsatisfiable range: {header}")
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+
+    if start > end or start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(end, size - 1)
+
+
+def is_not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    """Whether a conditional GET can be answered with 304 Not Modified"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = response_headers.get("etag", "").strip('"')
+        tags = {tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers.get("last-modified", ""))
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and if_modified_since >= last_modified
+    )
+
+
+class MediaFileResponse(FileResponse):
+    """
+    FileResponse that honours Range and conditional request headers.
+
+    A single byte range is answered with 206 Partial Content, so video
+    players can seek without downloading the file again; a matching
+    If-None-Match or If-Modified-Since is answered with 304. When the
+    server supports the ASGI zero-copy send extension the body is handed
+    over as a file descriptor and sent with sendfile().
+    """
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.stat_result = stat_result
+            self.set_stat_headers(stat_result)
+
+        size = self.stat_result.st_size
+        request_headers = Headers(scope=scope)
+        self.headers["accept-ranges"] = "bytes"
+
+        if is_not_modified(self.headers, request_headers):
+            await NotModifiedResponse(self.headers)(scope, receive, send)
+            return
+
+        # If-Range: only honour the range if the client's copy is current
+        if_range = request_headers.get("if-range")
+        range_header = request_headers.get("range")
+        if if_range and if_range.strip('"') not in (self.headers["etag"], self.headers["last-modified"]):
+            range_header = None
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            await Response(
+                status_code=416, headers={"content-range": f"bytes */{size}"}
+            )(scope, receive, send)
+            return
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        if byte_range:
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only or size == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            await self._send_body(scope, send, start, end - start + 1)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_body(self, scope: Scope, send: Send, offset: int, count: int):
+        """Send `count` bytes of the file from `offset`"""
+        if ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZERO_COPY_EXTENSION,
+                    "file": file,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(offset)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    # Truncated since it was stat'ed
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class MediaStaticFiles(StaticFiles):
+    """StaticFiles serving MediaFileResponse, for seekable previews"""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        return MediaFileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, method=scope["method"]
+        )
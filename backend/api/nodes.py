@@ -1,52 +1,87 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from pydantic import BaseModel, Field
+from starlette.datastructures import Headers
 from typing import List, Dict, Any
-from ..nodes import NODE_REGISTRY
+from ..core.node_catalog import get_node_catalog
+from ..core.thumbnails import NodeThumbnailService
+from .dependencies import get_thumbnail_service
+from .media import is_not_modified
 
 router = APIRouter(prefix="/api/nodes", tags=["nodes"])
 
 
-@router.get("", response_model=List[Dict[str, Any]])
-async def list_nodes():
-    """List all available node types"""
-    nodes = []
+class ThumbnailNode(BaseModel):
+    """A node to render a thumbnail for"""
+    type: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+
 
-    for node_type, node_class in NODE_REGISTRY.items():
-        # Create a sample instance to get schema
-        sample = node_class()
+class ThumbnailRequest(BaseModel):
+    """Batch of nodes to render thumbnails for"""
+    nodes: List[ThumbnailNode] = Field(max_length=64)
 
-        # Get custom schema if available, otherwise use default
-        schema = node_class.get_schema() if hasattr(node_class, 'get_schema') else node_class.model_json_schema()
 
-        nodes.append({
-            "type": node_type,
-            "displayName": node_class.get_display_name(),
-            "category": node_class.get_category(),
-            "inputs": sample.get_inputs(),
-            "outputs": sample.get_outputs(),
-            "schema": schema
-        })
+# Clients revalidate the catalog on every load and get 304 until it changes
+CATALOG_CACHE_CONTROL = "no-cache"
 
-    return nodes
+
+def _catalog_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve a pre-serialized catalog document, or 304 if the client has it"""
+    headers = {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if is_not_modified(Headers(headers), request.headers):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("", response_model=List[Dict[str, Any]])
+async def list_nodes(request: Request):
+    """List all available node types"""
+    body, etag = get_node_catalog().all
+    return _catalog_response(request, body, etag)
 
 
 @router.get("/{node_type}", response_model=Dict[str, Any])
-async def get_node_info(node_type: str):
+async def get_node_info(node_type: str, request: Request):
     """Get information about a specific node type"""
-    if node_type not in NODE_REGISTRY:
-        from fastapi import HTTPException
+    entry = get_node_catalog().get(node_type)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Node type not found")
+    body, etag = entry
+    return _catalog_response(request, body, etag)
+
+
+@router.post("/thumbnails", response_model=Dict[str, Any])
+async def get_node_thumbnails(
+    request: ThumbnailRequest,
+    thumbnails: NodeThumbnailService = Depends(get_thumbnail_service),
+):
+    """Get thumbnail URLs for a batch of nodes, rendering uncached ones"""
+    try:
+        results = await thumbnails.get_thumbnails([node.model_dump() for node in request.nodes])
+        return {"thumbnails": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-    node_class = NODE_REGISTRY[node_type]
-    sample = node_class()
+@router.get("/thumbnails/{key}.png")
+async def get_node_thumbnail(
+    key: str,
+    thumbnails: NodeThumbnailService = Depends(get_thumbnail_service),
+):
+    """Get a cached node thumbnail image"""
+    try:
+        path = thumbnails.get_cached(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Get custom schema if available, otherwise use default
-    schema = node_class.get_schema() if hasattr(node_class, 'get_schema') else node_class.model_json_schema()
+    if path is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
 
-    return {
-        "type": node_type,
-        "displayName": node_class.get_display_name(),
-        "category": node_class.get_category(),
-        "inputs": sample.get_inputs(),
-        "outputs": sample.get_outputs(),
-        "schema": schema
-    }
+    return FileResponse(
+        path=str(path),
+        media_type="image/png",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
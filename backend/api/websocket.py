@@ -1,20 +1,88 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from ..models.graph import Graph
 from ..core.renderer import Renderer, RenderError
+from ..core.progress import ProgressBuffer, RenderProgress
+from pathlib import Path
 import json
 import asyncio
 
 router = APIRouter(tags=["websocket"])
 
+# Segments buffered per connection before the renderer's tap waits on the client
+SEGMENT_QUEUE_SIZE = 4
+
+
+class SegmentStreamer:
+    """
+    Sends preview segments to the client while the render is running.
+
+    Each segment is announced by a JSON ``segment`` message followed by a
+    binary frame holding the MP4 bytes. A bounded queue decouples the
+    renderer from the socket: when the client falls behind, ``push`` waits,
+    which only delays the renderer's segment tap, never manim itself.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEGMENT_QUEUE_SIZE)
+        self.task = asyncio.create_task(self._send_loop())
+
+    async def push(self, index: int, data: bytes):
+        """Queue a segment, waiting while the queue is full"""
+        put = asyncio.ensure_future(self.queue.put((index, data)))
+        await asyncio.wait({put, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            # The sender stopped (client went away); surface its error
+            put.cancel()
+            self.task.result()
+            raise RuntimeError("Segment stream closed")
+
+    async def close(self):
+        """Send any queued segments, then stop"""
+        await self.queue.put(None)
+        await self.task
+
+    def cancel(self):
+        """Stop without sending queued segments"""
+        self.task.cancel()
+
+    async def _send_loop(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            index, data = item
+            await self.websocket.send_json({
+                "type": "segment",
+                "index": index,
+                "size": len(data)
+            })
+            await self.websocket.send_bytes(data)
+
 
 @router.websocket("/ws/preview")
 async def websocket_preview(websocket: WebSocket):
     """WebSocket endpoint for real-time preview"""
     await websocket.accept()
 
-    # Get storage from app state
+    # Get services from app state; the shared renderer lets background
+    # work (node thumbnails) yield to previews
     storage = websocket.app.state.storage
-    renderer = Renderer(storage)
+    renderer: Renderer = websocket.app.state.renderer
+    # The preview and still the client is showing are kept from the
+    # sweeper; the render each one replaces is deleted right away
+    temp_sweeper = getattr(websocket.app.state, "temp_sweeper", None)
+    shown: dict[str, Path] = {}
+
+    def show(kind: str, path: Path):
+        if temp_sweeper is not None:
+            temp_sweeper.pin(path)
+        previous = shown.get(kind)
+        shown[kind] = path
+        if previous is not None:
+            if temp_sweeper is not None:
+                temp_sweeper.unpin(previous)
+            renderer.discard_render(previous)
 
     try:
         while True:
@@ -32,6 +100,7 @@ async def websocket_preview(websocket: WebSocket):
                     })
                     continue
 
+                streamer = SegmentStreamer(websocket) if message.get("stream") else None
                 try:
                     # Parse graph
                     graph = Graph(**graph_data)
@@ -42,20 +111,29 @@ async def websocket_preview(websocket: WebSocket):
                         "message": "Starting render..."
                     })
 
-                    # Render preview
+                    # Render preview; output is coalesced into batched
+                    # messages so pipe reading never waits on the socket
+                    progress = ProgressBuffer(websocket.send_json)
+
                     async def progress_callback(msg: str):
-                        await websocket.send_json({
-                            "type": "progress",
-                            "message": msg
-                        })
+                        progress.push_line(msg)
+
+                    async def progress_event_callback(event: RenderProgress):
+                        progress.push_event(event)
 
-                    output_file, python_code = await renderer.render_preview(
+                    # A failed send (client gone) cancels the render
+                    output_file, python_code = await progress.run(renderer.render_preview(
                         graph=graph,
-                        progress_callback=progress_callback
-                    )
+                        progress_callback=progress_callback,
+                        segment_callback=streamer.push if streamer else None,
+                        progress_event_callback=progress_event_callback
+                    ))
+                    if streamer:
+                        await streamer.close()
 
                     # Send video URL (relative to temp directory)
                     relative_path = output_file.relative_to(storage.temp_dir)
+                    show("video", output_file)
                     await websocket.send_json({
                         "type": "complete",
                         "video_url": f"/temp/{relative_path}",
@@ -76,6 +154,70 @@ async def websocket_preview(websocket: WebSocket):
                         "type": "error",
                         "message": f"Unexpected error: {str(e)}"
                     })
+                finally:
+                    if streamer:
+                        streamer.cancel()
+
+            elif message.get("type") == "render_still":
+                graph_data = message.get("graph")
+                if not graph_data:
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "No graph data provided"
+                    })
+                    continue
+
+                animation_index = message.get("animation_index")
+                if animation_index is not None and (
+                    type(animation_index) is not int or animation_index < 0
+                ):
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "animation_index must be a non-negative integer"
+                    })
+                    continue
+
+                try:
+                    graph = Graph(**graph_data)
+
+                    await websocket.send_json({
+                        "type": "status",
+                        "message": "Rendering still frame..."
+                    })
+
+                    still_progress = ProgressBuffer(websocket.send_json)
+
+                    async def still_progress_callback(msg: str):
+                        still_progress.push_line(msg)
+
+                    image_file, python_code = await still_progress.run(renderer.render_still(
+                        graph=graph,
+                        animation_index=animation_index,
+                        progress_callback=still_progress_callback
+                    ))
+
+                    relative_path = image_file.relative_to(storage.temp_dir)
+                    show("still", image_file)
+                    await websocket.send_json({
+                        "type": "still_complete",
+                        "image_url": f"/temp/{relative_path}",
+                        "code": python_code
+                    })
+
+                except RenderError as e:
+                    error_payload = {
+                        "type": "error",
+                        "message": f"Render failed: {str(e)}",
+                        "code": e.code,
+                    }
+                    if e.node_id:
+                        error_payload["node_id"] = e.node_id
+                    await websocket.send_json(error_payload)
+                except Exception as e:
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": f"Unexpected error: {str(e)}"
+                    })
 
             elif message.get("type") == "ping":
                 # Keepalive
@@ -89,3 +231,7 @@ async def websocket_preview(websocket: WebSocket):
             await websocket.close()
         except Exception:
             pass
+    finally:
+        if temp_sweeper is not None:
+            for path in shown.values():
+                temp_sweeper.unpin(path)
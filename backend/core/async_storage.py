@@ -0,0 +1,90 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, TypeVar, Union
+from ..models.graph import Graph, GraphDiff
+from .storage import StorageManager
+
+T = TypeVar("T")
+
+
+class AsyncStorage:
+    """
+    Awaitable facade over StorageManager for async request handlers.
+
+    Every method that touches the disk (reading, parsing and validating,
+    serializing, compressing, fsync) runs in a small dedicated thread pool,
+    so a large graph being saved never stalls the event loop and with it
+    the websocket previews served by the same worker. The pool is bounded
+    so a burst of saves queues up instead of starving other threads.
+
+    Methods that only build paths are forwarded as they are.
+    """
+
+    def __init__(self, storage: StorageManager, max_workers: int = 4):
+        """
+        Args:
+            storage: Storage manager doing the work
+            max_workers: Threads running storage calls at most
+        """
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking callable in the storage thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def save_graph(self, graph: Graph) -> str:
+        """Save graph to disk (see StorageManager.save_graph)"""
+        return await self.run(self.storage.save_graph, graph)
+
+    async def load_graph(self, graph_id: str) -> Optional[Graph]:
+        """Load graph from disk or the cache (see StorageManager.load_graph)"""
+        return await self.run(self.storage.load_graph, graph_id)
+
+    async def patch_graph(
+        self,
+        graph_id: str,
+        change: Union[GraphDiff, list],
+        expected_version: Optional[int] = None,
+    ) -> Optional[tuple[Graph, int]]:
+        """Apply a partial update (see StorageManager.patch_graph)"""
+        return await self.run(self.storage.patch_graph, graph_id, change, expected_version)
+
+    async def delete_graph(self, graph_id: str) -> bool:
+        """Delete graph from disk (see StorageManager.delete_graph)"""
+        return await self.run(self.storage.delete_graph, graph_id)
+
+    async def graph_version(self, graph_id: str) -> int:
+        """Version of a saved graph"""
+        return await self.run(self.storage.graph_version, graph_id)
+
+    async def list_graphs(self, *args, **kwargs) -> list[dict]:
+        """List saved graphs (see StorageManager.list_graphs)"""
+        return await self.run(self.storage.list_graphs, *args, **kwargs)
+
+    async def count_graphs(self, search: Optional[str] = None) -> int:
+        """Number of saved graphs, optionally only those whose name matches"""
+        return await self.run(self.storage.count_graphs, search)
+
+    async def list_revisions(self, graph_id: str) -> list[dict]:
+        """List the saved revisions of a graph, newest first"""
+        return await self.run(self.storage.list_revisions, graph_id)
+
+    async def load_revision(self, graph_id: str, revision: int) -> Optional[Graph]:
+        """Load a graph as it was saved in a revision"""
+        return await self.run(self.storage.load_revision, graph_id, revision)
+
+    async def restore_revision(self, graph_id: str, revision: int) -> Optional[Graph]:
+        """Save an old revision of a graph as its newest one"""
+        return await self.run(self.storage.restore_revision, graph_id, revision)
+
+    def get_thumbnail_path(self, graph_id: str) -> Path:
+        """Get path for a graph's thumbnail image"""
+        return self.storage.get_thumbnail_path(graph_id)
+
+    def close(self):
+        """Wait for running storage calls and stop the thread pool"""
+        self._executor.shutdown(wait=True)
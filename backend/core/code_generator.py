@@ -1,5 +1,6 @@
 from typing import Dict, List
 import logging
+import re
 from ..models.graph import Graph
 from ..nodes import NODE_REGISTRY
 from ..nodes.utilities import parse_function_code
@@ -7,6 +8,12 @@ from .graph_validator import GraphValidator, ValidationError
 
 logger = logging.getLogger("manim_nodes")
 
+# Statements in generated code that manim counts as one animation each
+_TIMELINE_CALL_RE = re.compile(r"^\s*self\.(play|wait|move_camera)\((.*)\)")
+_ASSIGN_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*=\s*(.*)$")
+_RUN_TIME_RE = re.compile(r"run_time=([0-9]*\.?[0-9]+)")
+_NUMBER_RE = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*$")
+
 
 class CodeGenerator:
     """Generates MANIM Python code from node graphs"""
@@ -85,6 +92,49 @@ class CodeGenerator:
 
         return generated_code
 
+    @staticmethod
+    def estimate_timeline(code: str) -> tuple[int, float]:
+        """
+        Statically estimate how many animations a generated scene plays.
+
+        Counts self.play/self.wait/self.move_camera statements and sums their
+        literal run times (manim's default of 1s when none is given). Plays
+        inside loops in user Python code are not counted, so the result is
+        an estimate.
+
+        Args:
+            code: Code returned by generate()
+
+        Returns:
+            Tuple of (animation count, total duration in seconds)
+        """
+        assignments: Dict[str, str] = {}
+        count = 0
+        duration = 0.0
+
+        for line in code.splitlines():
+            call = _TIMELINE_CALL_RE.match(line)
+            if not call:
+                assign = _ASSIGN_RE.match(line)
+                if assign:
+                    assignments[assign.group(1)] = assign.group(2)
+                continue
+
+            kind, args = call.groups()
+            count += 1
+            if kind == "wait":
+                number = _NUMBER_RE.match(args.split("#")[0].rstrip(") "))
+                duration += float(number.group(1)) if number else 1.0
+                continue
+
+            # self.play(anim_var) takes its run time from the assignment
+            run_times = _RUN_TIME_RE.findall(args)
+            if not run_times and args.strip() in assignments:
+                run_times = _RUN_TIME_RE.findall(assignments[args.strip()])
+            duration += float(run_times[-1]) if run_times else 1.0
+
+        return count, duration
+
     def _generate_imports(self) -> str:
         """Generate import statements"""
         return """from manim import *
@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from ..models.graph import Graph
+
+
+def file_version(path: Path) -> tuple[str, int, int]:
+    """
+    Identify the saved content of a project file.
+
+    Raises:
+        OSError if the file does not exist
+    """
+    stat_result = os.stat(path)
+    return path.name, stat_result.st_mtime_ns, stat_result.st_size
+
+
+class GraphCache:
+    """
+    Bounded LRU cache of loaded Graph models, keyed by graph ID.
+
+    Each entry remembers the project file it was loaded from and that
+    file's mtime and size, so a hit costs one stat() instead of reading,
+    decompressing and validating the file, and saves made by another
+    process (or by hand) are noticed. StorageManager also writes through
+    on save and delete.
+
+    Cached graphs are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        """
+        Args:
+            max_entries: Graphs kept at most (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Path, tuple, Graph]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, graph_id: str, count: bool = True) -> Optional[Graph]:
+        """
+        Cached graph, if its project file has not changed since.
+
+        Args:
+            graph_id: ID of the graph
+            count: Whether the lookup counts towards the hit/miss metrics
+        """
+        with self._lock:
+            entry = self._entries.get(graph_id)
+        if entry is not None:
+            path, version, graph = entry
+            try:
+                current = file_version(path)
+            except OSError:
+                current = None
+            if current == version:
+                with self._lock:
+                    if graph_id in self._entries:
+                        self._entries.move_to_end(graph_id)
+                    if count:
+                        self.hits += 1
+                return graph
+            self.discard(graph_id)
+        if count:
+            with self._lock:
+                self.misses += 1
+        return None
+
+    def put(self, graph_id: str, path: Path, version: tuple, graph: Graph):
+        """
+        Cache a graph.
+
+        Args:
+            graph_id: ID of the graph
+            path: Project file it was loaded from or saved to
+            version: file_version() of that file when it was read or written
+            graph: Graph object
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[graph_id] = (path, version, graph)
+            self._entries.move_to_end(graph_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, graph_id: str):
+        """Drop a graph from the cache"""
+        with self._lock:
+            self._entries.pop(graph_id, None)
+
+    def clear(self):
+        """Drop every cached graph"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit-rate metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
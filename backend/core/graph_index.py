@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graphs (
+    id       TEXT PRIMARY KEY,
+    name     TEXT,
+    name_key TEXT NOT NULL DEFAULT '',
+    modified REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS graphs_modified ON graphs (modified, id);
+CREATE INDEX IF NOT EXISTS graphs_name ON graphs (name_key, id);
+"""
+
+# Sortable columns of list(); name sorts case-insensitively
+SORT_COLUMNS = {
+    "modified": "modified",
+    "name": "name_key",
+}
+
+
+class GraphIndex:
+    """
+    SQLite index of saved graph metadata (id, name, modification time).
+
+    Lets the project list be paged, sorted and searched without opening
+    any project file. StorageManager keeps it up to date on save and
+    delete, and its rebuild_index() re-reads the project files after they
+    were changed behind its back.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Open (and create if needed) the index database.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.created = not self.db_path.exists()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def upsert(self, graph_id: str, name: Optional[str], modified: float):
+        """Add or update the entry of a graph"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO graphs (id, name, name_key, modified) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                "name_key = excluded.name_key, modified = excluded.modified",
+                (graph_id, name, (name or "").casefold(), modified),
+            )
+
+    def remove(self, graph_id: str):
+        """Remove the entry of a graph"""
+        with self._lock:
+            self._conn.execute("DELETE FROM graphs WHERE id = ?", (graph_id,))
+
+    def replace_all(self, entries: Iterable[tuple[str, Optional[str], float]]):
+        """
+        Replace the whole index in one transaction.
+
+        Args:
+            entries: (id, name, modified) of every saved graph
+        """
+        rows = [(graph_id, name, (name or "").casefold(), modified) for graph_id, name, modified in entries]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM graphs")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO graphs (id, name, name_key, modified) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def list(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: str = "modified",
+        descending: bool = True,
+        search: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a page of graph entries.
+
+        Args:
+            offset: Number of entries to skip
+            limit: Maximum number of entries (None for all)
+            sort: "modified" or "name"
+            descending: Sort direction
+            search: Only names containing this text (case-insensitive)
+
+        Returns:
+            List of dicts with id, name and modified (epoch seconds)
+
+        Raises:
+            ValueError if sort is unknown
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort: {sort}")
+        direction = "DESC" if descending else "ASC"
+        where, params = self._where(search)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, name, modified FROM graphs {where} "
+                f"ORDER BY {SORT_COLUMNS[sort]} {direction}, id {direction} "
+                "LIMIT ? OFFSET ?",
+                (*params, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, search: Optional[str] = None) -> int:
+        """Number of entries, optionally only those whose name matches"""
+        where, params = self._where(search)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM graphs {where}", params).fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _where(search: Optional[str]) -> tuple[str, tuple]:
+        if not search:
+            return "", ()
+        pattern = search.casefold().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return "WHERE name_key LIKE ? ESCAPE '\\'", (f"%{pattern}%",)
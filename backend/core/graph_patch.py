@@ -0,0 +1,109 @@
+"""Partial updates of saved graphs: node/edge diffs and re-validation"""
+from typing import Any, Dict, List, Type
+from pydantic import BaseModel
+from ..models.graph import EdgeData, Graph, GraphDiff
+from ..models.node import NodeData
+
+# Top-level keys of a graph document
+_GRAPH_KEYS = set(Graph.model_fields)
+
+
+def _max_length(field: str) -> int | None:
+    """max_length constraint of a list field of Graph"""
+    return next(
+        (m.max_length for m in Graph.model_fields[field].metadata if hasattr(m, "max_length")), None
+    )
+
+
+def apply_diff(document: Dict[str, Any], diff: GraphDiff) -> Dict[str, Any]:
+    """
+    Apply a node/edge-level diff to a graph document.
+
+    Upserted nodes and edges replace the one with the same id in place, or
+    are appended; removing an id that does not exist is not an error.
+
+    Args:
+        document: Saved graph document (not modified)
+        diff: Changes to apply
+
+    Returns:
+        The changed document
+    """
+    changed = dict(document)
+    if diff.name is not None:
+        changed["name"] = diff.name
+    if diff.settings is not None:
+        changed["settings"] = diff.settings
+    changed["nodes"] = _apply_items(document.get("nodes", []), diff.upsert_nodes, diff.remove_nodes)
+    changed["edges"] = _apply_items(document.get("edges", []), diff.upsert_edges, diff.remove_edges)
+    return changed
+
+
+def _apply_items(items: List[dict], upserts: List[BaseModel], removals: List[str]) -> List[dict]:
+    removed = set(removals)
+    replacements = {item.id: item.model_dump(mode="json") for item in upserts}
+    result = []
+    for item in items:
+        item_id = item.get("id")
+        if item_id in removed:
+            continue
+        result.append(replacements.pop(item_id, item))
+    result.extend(replacements.values())
+    return result
+
+
+def build_graph(document: Dict[str, Any], previous: Dict[str, Any]) -> Graph:
+    """
+    Validate a changed graph document, re-validating only what changed.
+
+    The previous document was validated when it was saved, so nodes and
+    edges equal to their previous version (by id) are trusted as they are;
+    comparing plain values is much cheaper than validating them.
+
+    Args:
+        document: Changed graph document
+        previous: The saved document it was derived from
+
+    Returns:
+        Graph object
+
+    Raises:
+        ValueError if the changed document is not a valid graph
+    """
+    if not isinstance(document, dict):
+        raise ValueError("A graph must be an object")
+    unknown = set(document) - _GRAPH_KEYS
+    if unknown:
+        raise ValueError(f"Unknown graph fields: {', '.join(sorted(unknown))}")
+    if document.get("id") != previous.get("id"):
+        raise ValueError("Graph ID cannot be changed")
+    if not isinstance(document.get("name"), str):
+        raise ValueError("Graph name must be a string")
+    settings = document.get("settings", {})
+    if not isinstance(settings, dict):
+        raise ValueError("Graph settings must be an object")
+
+    return Graph.model_construct(
+        id=document["id"],
+        name=document["name"],
+        nodes=_build_items("nodes", NodeData, document, previous),
+        edges=_build_items("edges", EdgeData, document, previous),
+        settings=settings,
+    )
+
+
+def _build_items(field: str, model: Type[BaseModel], document: dict, previous: dict) -> list:
+    items = document.get(field, [])
+    if not isinstance(items, list):
+        raise ValueError(f"Graph {field} must be a list")
+    limit = _max_length(field)
+    if limit is not None and len(items) > limit:
+        raise ValueError(f"A graph can have at most {limit} {field}")
+
+    saved = {item.get("id"): item for item in previous.get(field, []) if isinstance(item, dict)}
+    return [
+        model.model_construct(**item)
+        if isinstance(item, dict) and saved.get(item.get("id")) == item
+        else model.model_validate(item)
+        for item in items
+    ]
@@ -0,0 +1,440 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS export_jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    quality     TEXT NOT NULL,
+    fps         INTEGER NOT NULL,
+    format      TEXT NOT NULL,
+    outputs     TEXT NOT NULL,
+    progress    REAL NOT NULL DEFAULT 0,
+    eta         REAL,
+    error       TEXT,
+    output_file TEXT,
+    graph       TEXT,
+    log_tail    TEXT NOT NULL DEFAULT '[]',
+    log_total   INTEGER NOT NULL DEFAULT 0,
+    dedup_key   TEXT,
+    graph_id    TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    finished_at REAL,
+    worker_id    TEXT,
+    heartbeat_at REAL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    last_polled_at   REAL,
+    requesters       INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS export_jobs_status ON export_jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS export_jobs_dedup ON export_jobs (dedup_key, finished_at);
+CREATE INDEX IF NOT EXISTS export_jobs_finished ON export_jobs (finished_at);
+"""
+
+_COLUMNS = [
+    "job_id", "status", "quality", "fps", "format", "outputs", "progress", "eta",
+    "error", "output_file", "graph", "log_tail", "log_total", "dedup_key",
+    "graph_id", "created_at", "updated_at", "finished_at",
+]
+
+# Job columns added after the first schema version, with their definitions
+_ADDED_COLUMNS = {
+    "graph_id": "TEXT",
+}
+
+# Claim and cancellation bookkeeping owned by the store; never
+# overwritten by save()
+_STORE_COLUMNS = {
+    "worker_id": "TEXT",
+    "heartbeat_at": "REAL",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "cancel_requested": "INTEGER NOT NULL DEFAULT 0",
+    "last_polled_at": "REAL",
+    "requesters": "INTEGER NOT NULL DEFAULT 1",
+}
+
+# A client poll is recorded at most this often per job, in seconds
+_TOUCH_INTERVAL = 5.0
+
+# Columns stored as JSON text
+_JSON_COLUMNS = ("outputs", "graph", "log_tail")
+
+
+class JobStore:
+    """
+    SQLite-backed persistence and work queue for export jobs.
+
+    The database runs in WAL mode, so any number of API and render worker
+    processes sharing the storage directory can use it at once. Pending jobs
+    are handed out by claim(), which is atomic across processes; workers
+    heartbeat the jobs they hold and requeue_stale() returns jobs of workers
+    that stopped heartbeating to the queue. Cancelling a running job only
+    sets a flag; the worker holding it picks it up via cancel_requests().
+    Identical exports share one job, which counts its requesters
+    (add_requester()) and is only cancelled once the last of them cancels.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Open (and create if needed) the job database.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Other processes may hold the write lock briefly; wait rather than fail
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns missing from databases created by older versions"""
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(export_jobs)")}
+        for column, definition in {**_ADDED_COLUMNS, **_STORE_COLUMNS}.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE export_jobs ADD COLUMN {column} {definition}")
+        # Indexes on added columns can only be created once they exist
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS export_jobs_graph ON export_jobs (graph_id, finished_at)"
+        )
+
+    def save(self, record: Dict[str, Any]):
+        """
+        Insert or replace a job record.
+
+        Args:
+            record: Dict with a key for every column (see ExportJob.to_record)
+        """
+        values = dict(record)
+        values["updated_at"] = time.time()
+        values.setdefault("created_at", values["updated_at"])
+        for column in _JSON_COLUMNS:
+            if values.get(column) is not None:
+                values[column] = json.dumps(values[column])
+
+        placeholders = ", ".join(f":{c}" for c in _COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS if c not in ("job_id", "created_at"))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO export_jobs ({', '.join(_COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(job_id) DO UPDATE SET {updates}",
+                {c: values.get(c) for c in _COLUMNS},
+            )
+
+    def update(self, job_id: str, fields: Dict[str, Any]):
+        """
+        Update some columns of an existing job record.
+
+        Args:
+            job_id: Job to update
+            fields: Column values to set
+        """
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job columns: {', '.join(sorted(unknown))}")
+
+        values = dict(fields)
+        values["updated_at"] = time.time()
+        for column in _JSON_COLUMNS:
+            if values.get(column) is not None:
+                values[column] = json.dumps(values[column])
+
+        assignments = ", ".join(f"{c} = :{c}" for c in values)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE export_jobs SET {assignments} WHERE job_id = :job_id",
+                {**values, "job_id": job_id},
+            )
+
+    def get(self, job_id: str, with_graph: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a job record by ID.
+
+        Args:
+            job_id: Job ID
+            with_graph: False to skip loading (and decoding) the graph, which
+                status lookups do not need
+        """
+        columns = "*" if with_graph else ", ".join(c for c in _COLUMNS if c != "graph")
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM export_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def find_latest(self, dedup_key: str) -> Optional[Dict[str, Any]]:
+        """Most recent pending, running or completed job with this dedup key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM export_jobs WHERE dedup_key = ? "
+                "AND status IN ('pending', 'running', 'completed') "
+                "ORDER BY created_at DESC LIMIT 1",
+                (dedup_key,),
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def latest_completed(self, graph_id: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Most recently finished completed jobs, newest first.
+
+        Args:
+            graph_id: Only jobs exporting this graph
+            limit: Maximum number of records
+        """
+        columns = ", ".join(c for c in _COLUMNS if c != "graph")
+        where = "status = 'completed'"
+        params: list = []
+        if graph_id is not None:
+            where += " AND graph_id = ?"
+            params.append(graph_id)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM export_jobs WHERE {where} "
+                "ORDER BY finished_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the oldest pending job.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            The claimed record (status "running"), or None if the queue is empty
+        """
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two processes
+            # can never select the same pending row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id FROM export_jobs WHERE status = 'pending' "
+                    "ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE export_jobs SET status = 'running', worker_id = ?, heartbeat_at = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                    (worker_id, now, now, row["job_id"]),
+                )
+                claimed = self._conn.execute(
+                    "SELECT * FROM export_jobs WHERE job_id = ?", (row["job_id"],)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._decode(claimed)
+
+    def release(self, worker_id: str) -> int:
+        """
+        Return a worker's running jobs to the queue (on graceful shutdown).
+
+        Returns:
+            Number of jobs requeued
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE export_jobs SET status = 'pending', worker_id = NULL, updated_at = ? "
+                "WHERE worker_id = ? AND status = 'running'",
+                (time.time(), worker_id),
+            )
+        return cursor.rowcount
+
+    def heartbeat(self, worker_id: str) -> int:
+        """
+        Mark every running job held by a worker as alive.
+
+        Returns:
+            Number of jobs updated
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE export_jobs SET heartbeat_at = ? WHERE worker_id = ? AND status = 'running'",
+                (time.time(), worker_id),
+            )
+        return cursor.rowcount
+
+    def requeue_stale(self, cutoff: float, max_attempts: int = 3, exclude_worker: Optional[str] = None) -> int:
+        """
+        Return running jobs whose worker stopped heartbeating to the queue.
+
+        Jobs that have already been attempted max_attempts times, or whose
+        graph was released, are failed instead so a job that crashes its
+        worker cannot loop forever.
+
+        Args:
+            cutoff: Jobs with a heartbeat older than this timestamp are stale
+            max_attempts: Claims allowed per job
+            exclude_worker: Worker whose jobs are never considered stale
+
+        Returns:
+            Number of jobs requeued
+        """
+        now = time.time()
+        stale = (
+            "status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < :cutoff) "
+            "AND (worker_id IS NULL OR worker_id != :exclude)"
+        )
+        params = {"now": now, "cutoff": cutoff, "exclude": exclude_worker or "", "max_attempts": max_attempts}
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE export_jobs SET status = 'failed', error = 'Interrupted: render worker stopped', "
+                f"finished_at = :now, updated_at = :now, worker_id = NULL, graph = NULL "
+                f"WHERE {stale} AND (graph IS NULL OR attempts >= :max_attempts)",
+                params,
+            )
+            cursor = self._conn.execute(
+                f"UPDATE export_jobs SET status = 'pending', worker_id = NULL, updated_at = :now WHERE {stale}",
+                params,
+            )
+        return cursor.rowcount
+
+    def add_requester(self, job_id: str) -> bool:
+        """
+        Count another request for a pending or running job.
+
+        Returns:
+            Whether the job was still pending or running
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE export_jobs SET requesters = requesters + 1 "
+                "WHERE job_id = ? AND status IN ('pending', 'running')",
+                (job_id,),
+            )
+        return cursor.rowcount > 0
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job.
+
+        A pending job is cancelled on the spot; a running one is flagged for
+        the worker holding it. A job other requesters still wait for is
+        left running, with one requester fewer.
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            "cancelled", "cancelling" or "released", the job's status if it
+            had already finished, or None if there is no such job
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT status, requesters FROM export_jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+                if row is None:
+                    result = None
+                elif row["status"] in ("pending", "running") and row["requesters"] > 1:
+                    self._conn.execute(
+                        "UPDATE export_jobs SET requesters = requesters - 1 WHERE job_id = ?", (job_id,)
+                    )
+                    result = "released"
+                elif row["status"] == "pending":
+                    self._conn.execute(
+                        "UPDATE export_jobs SET status = 'cancelled', finished_at = ?, updated_at = ?, "
+                        "graph = NULL WHERE job_id = ?",
+                        (now, now, job_id),
+                    )
+                    result = "cancelled"
+                elif row["status"] == "running":
+                    self._conn.execute(
+                        "UPDATE export_jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,)
+                    )
+                    result = "cancelling"
+                else:
+                    result = row["status"]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def cancel_requests(self, worker_id: str) -> List[str]:
+        """IDs of running jobs held by a worker that were asked to cancel"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM export_jobs WHERE worker_id = ? AND status = 'running' "
+                "AND cancel_requested = 1",
+                (worker_id,),
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def touch(self, job_id: str):
+        """Record that a client polled a job"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE export_jobs SET last_polled_at = ? WHERE job_id = ? "
+                "AND status IN ('pending', 'running') "
+                "AND (last_polled_at IS NULL OR last_polled_at < ?)",
+                (now, job_id, now - _TOUCH_INTERVAL),
+            )
+
+    def find_abandoned(self, cutoff: float) -> List[str]:
+        """
+        IDs of unfinished jobs whose client stopped polling.
+
+        Only jobs polled at least once qualify: a client that never polls
+        (fire-and-forget export) has not abandoned its job.
+
+        Args:
+            cutoff: Jobs last polled before this timestamp are abandoned
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM export_jobs WHERE status IN ('pending', 'running') "
+                "AND cancel_requested = 0 AND last_polled_at < ?",
+                (cutoff,),
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def delete_finished_before(self, cutoff: float) -> int:
+        """
+        Delete finished jobs older than a timestamp.
+
+        Returns:
+            Number of records deleted
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM export_jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (cutoff,),
+            )
+        return cursor.rowcount
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        for column in _JSON_COLUMNS:
+            if record.get(column) is not None:
+                record[column] = json.loads(record[column])
+        return record
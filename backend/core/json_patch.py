@@ -0,0 +1,206 @@
+"""Minimal JSON Patch (RFC 6902) diff and apply for graph documents"""
+import copy
+from typing import Any, List
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or does not apply to the document"""
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _split(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer}")
+    return [_unescape(token) for token in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _parent(doc: Any, tokens: List[str]) -> Any:
+    """Resolve every token but the last"""
+    node = doc
+    for token in tokens[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return node
+
+
+def resolve(doc: Any, pointer: str) -> Any:
+    """
+    Get the value a JSON pointer refers to.
+
+    Raises:
+        JsonPatchError if the path does not exist
+    """
+    tokens = _split(pointer)
+    if not tokens:
+        return doc
+    parent = _parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent[last]
+    if isinstance(parent, list):
+        return parent[_index(parent, last)]
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, last, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to /{'/'.join(tokens)}")
+    return doc
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent = _parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(last)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, last))
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_patch(doc: Any, patch: List[dict], in_place: bool = False) -> Any:
+    """
+    Apply a JSON Patch.
+
+    Args:
+        doc: Document to patch
+        patch: List of operations (add, remove, replace, move, copy, test)
+        in_place: Modify doc instead of a deep copy of it
+
+    Returns:
+        The patched document
+
+    Raises:
+        JsonPatchError if an operation is malformed or does not apply
+    """
+    if not in_place:
+        doc = copy.deepcopy(doc)
+    if not isinstance(patch, list):
+        raise JsonPatchError("A patch must be a list of operations")
+
+    for operation in patch:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise JsonPatchError(f"Invalid patch operation: {operation}")
+        op = operation["op"]
+        tokens = _split(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op} needs a value")
+        if op == "add":
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(doc, tokens)
+        elif op == "replace":
+            resolve(doc, operation["path"])
+            if tokens:
+                _remove(doc, tokens)
+            doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+        elif op in ("move", "copy"):
+            source = operation.get("from")
+            if source is None:
+                raise JsonPatchError(f"Operation {op} needs from")
+            if op == "move":
+                if operation["path"].startswith(source + "/"):
+                    raise JsonPatchError("Cannot move a value into itself")
+                value = _remove(doc, _split(source))
+            else:
+                value = copy.deepcopy(resolve(doc, source))
+            doc = _add(doc, tokens, value)
+        elif op == "test":
+            if resolve(doc, operation["path"]) != operation["value"]:
+                raise JsonPatchError(f"Test failed at {operation['path']}")
+        else:
+            raise JsonPatchError(f"Unknown patch operation: {op}")
+    return doc
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[dict]:
+    """
+    Compute a JSON Patch turning one document into another.
+
+    Objects are compared key by key. Arrays keep their common prefix and
+    suffix, so inserting or deleting one node of a long list is one
+    operation; equal-length middles are compared element by element.
+
+    Returns:
+        List of add, remove and replace operations
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch = []
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                patch.append({"op": "add", "path": child, "value": value})
+            else:
+                patch.extend(make_patch(old[key], value, child))
+        return patch
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_lists(old, new, path)
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_lists(old: list, new: list, path: str) -> List[dict]:
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    patch = []
+    common = min(old_end, new_end) - start
+    for offset in range(common):
+        index = start + offset
+        patch.extend(make_patch(old[index], new[index], f"{path}/{index}"))
+    # Remove from the back so earlier indexes stay valid
+    for index in range(old_end - 1, start + common - 1, -1):
+        patch.append({"op": "remove", "path": f"{path}/{index}"})
+    for index in range(start + common, new_end):
+        patch.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+    return patch
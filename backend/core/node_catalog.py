@@ -0,0 +1,75 @@
+import functools
+import hashlib
+import json
+from typing import Any, Dict, Optional, Type
+from fastapi.encoders import jsonable_encoder
+from ..nodes import NODE_REGISTRY
+
+
+def _serialize(document: Any) -> tuple[bytes, str]:
+    """JSON body of a document and its strong ETag (a hash of the body)"""
+    body = json.dumps(
+        jsonable_encoder(document), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def describe_node(node_type: str, node_class: Type) -> Dict[str, Any]:
+    """
+    Describe a node type for the editor.
+
+    Args:
+        node_type: Registered type name
+        node_class: Node class
+
+    Returns:
+        Dict with display name, category, inputs, outputs and data schema
+    """
+    # Inputs and outputs are read from a default instance
+    sample = node_class()
+
+    # Get custom schema if available, otherwise use default
+    schema = node_class.get_schema() if hasattr(node_class, 'get_schema') else node_class.model_json_schema()
+
+    return {
+        "type": node_type,
+        "displayName": node_class.get_display_name(),
+        "category": node_class.get_category(),
+        "inputs": sample.get_inputs(),
+        "outputs": sample.get_outputs(),
+        "schema": schema
+    }
+
+
+class NodeCatalog:
+    """
+    Descriptions of every registered node type, built once.
+
+    Node classes are fixed for the life of the process, so the list served
+    by GET /api/nodes and the description of each type are serialized up
+    front. The ETags are content hashes, so they stay the same across
+    restarts and worker processes until a node definition changes.
+    """
+
+    def __init__(self, registry: Dict[str, Type]):
+        """
+        Args:
+            registry: Node type name to node class
+        """
+        descriptions = [describe_node(node_type, node_class) for node_type, node_class in registry.items()]
+        # (JSON body, ETag) of the full list and of each type
+        self.all = _serialize(descriptions)
+        self._by_type = {description["type"]: _serialize(description) for description in descriptions}
+
+    def get(self, node_type: str) -> Optional[tuple[bytes, str]]:
+        """(JSON body, ETag) describing one node type (None if it is not registered)"""
+        return self._by_type.get(node_type)
+
+    def __len__(self) -> int:
+        return len(self._by_type)
+
+
+@functools.lru_cache(maxsize=None)
+def get_node_catalog() -> NodeCatalog:
+    """The catalog of the registered node types, built on first use"""
+    return NodeCatalog(NODE_REGISTRY)
@@ -0,0 +1,291 @@
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+# A manim progress bar line, e.g.
+#   Animation 3: Create(Circle):  47%|####6     | 7/15 [00:00<00:00, 34.06it/s]
+#   Waiting 4:  50%|#####     | 15/30 [00:00<00:00, 45.12it/s]
+PROGRESS_BAR_RE = re.compile(
+    r"^(?:Animation (?P<animation>\d+)|Waiting (?P<waiting>\d+))"
+    r"[^|]*?\d+%\|[^|]*\|\s*(?P<done>\d+)/(?P<total>\d+)"
+)
+
+
+class RenderProgress:
+    """Structured progress of a single manim render"""
+
+    def __init__(
+        self,
+        animation_index: int,
+        total_animations: Optional[int],
+        frames_done: int,
+        frames_total: int,
+        percent: float,
+        elapsed: float,
+        eta: Optional[float],
+    ):
+        self.animation_index = animation_index
+        self.total_animations = total_animations
+        self.frames_done = frames_done
+        self.frames_total = frames_total
+        self.percent = percent
+        self.elapsed = elapsed
+        self.eta = eta
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for JSON messages"""
+        return {
+            "animation_index": self.animation_index,
+            "total_animations": self.total_animations,
+            "frames_done": self.frames_done,
+            "frames_total": self.frames_total,
+            "percent": round(self.percent, 1),
+            "elapsed": round(self.elapsed, 1),
+            "eta": round(self.eta, 1) if self.eta is not None else None,
+        }
+
+
+RenderProgressCallback = Callable[[RenderProgress], Union[None, Awaitable[None]]]
+
+
+class ProgressTracker:
+    """
+    Turns manim's per-animation progress bars into overall render progress.
+
+    Overall progress is weighted by scene time when the total duration is
+    known (each bar's frame count is run_time * fps), otherwise by animation
+    count. Both totals come from CodeGenerator.estimate_timeline and are
+    estimates, so percent is capped below 100 until the render finishes.
+    """
+
+    def __init__(self, total_animations: Optional[int] = None, total_duration: Optional[float] = None,
+                 fps: int = 30):
+        self.total_animations = total_animations or None
+        self.total_duration = total_duration or None
+        self.fps = fps
+        self.started_at = time.monotonic()
+        self._finished_frames = 0  # frames of animations before the current one
+        self._current_animation = -1
+        self._current_total = 0
+
+    def feed(self, line: str) -> Optional[RenderProgress]:
+        """
+        Parse one output line.
+
+        Returns:
+            RenderProgress if the line was a progress bar, otherwise None
+        """
+        match = PROGRESS_BAR_RE.match(line)
+        if not match:
+            return None
+
+        index = int(match.group("animation") or match.group("waiting"))
+        done = int(match.group("done"))
+        total = int(match.group("total"))
+
+        if index != self._current_animation:
+            if self._current_animation >= 0:
+                self._finished_frames += self._current_total
+            self._current_animation = index
+        self._current_total = total
+
+        fraction = self._fraction(index, done, total)
+        elapsed = time.monotonic() - self.started_at
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+
+        return RenderProgress(
+            animation_index=index,
+            total_animations=self.total_animations,
+            frames_done=done,
+            frames_total=total,
+            percent=fraction * 100,
+            elapsed=elapsed,
+            eta=eta,
+        )
+
+    def _fraction(self, index: int, done: int, total: int) -> float:
+        """Fraction of the whole render completed, in [0, 0.99]"""
+        if self.total_duration:
+            seconds = (self._finished_frames + done) / self.fps
+            fraction = seconds / self.total_duration
+        elif self.total_animations:
+            fraction = (index + (done / total if total else 1)) / self.total_animations
+        else:
+            fraction = 0.0
+        return min(fraction, 0.99)
+
+
+# Lines from DebugPrintNode: "[DEBUG] ..." or "[DEBUG:node-id] ..."
+DEBUG_LINE_PREFIX = "[DEBUG"
+
+
+class ProgressBuffer:
+    """
+    Coalesces render output into batched messages sent at a bounded rate.
+
+    Pushing never waits on the consumer, so the subprocess pipe readers are
+    not throttled by slow sends. Between flushes, ordinary lines are kept in
+    a bounded buffer (oldest dropped first) and only the latest structured
+    progress event is kept. DebugPrintNode lines are never dropped.
+
+    Once a send fails (the client went away), nothing more is buffered or
+    sent; run() then cancels the render it is watching.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+        max_rate: float = 10.0,
+        max_lines: int = 200,
+    ):
+        """
+        Initialize progress buffer.
+
+        Args:
+            send: Coroutine function that delivers one message
+            max_rate: Maximum messages of each kind sent per second
+            max_lines: Maximum ordinary lines buffered between flushes
+        """
+        self.send = send
+        self.interval = 1.0 / max_rate
+        self.max_lines = max_lines
+        self._lines: list[tuple[bool, str]] = []  # (is_debug, line)
+        self._ordinary = 0
+        self._dropped = 0
+        self._event: Optional[RenderProgress] = None
+        self._wakeup = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # The exception a send failed with
+        self.error: Optional[BaseException] = None
+
+    def start(self):
+        """Start the flush loop"""
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def push_line(self, line: str):
+        """Buffer an output line"""
+        if self.error is not None:
+            return
+        is_debug = line.startswith(DEBUG_LINE_PREFIX)
+        self._lines.append((is_debug, line))
+        if not is_debug:
+            self._ordinary += 1
+            if self._ordinary > self.max_lines:
+                self._drop_oldest_ordinary()
+        self._wakeup.set()
+
+    def push_event(self, progress: RenderProgress):
+        """Buffer a structured progress event, replacing any unsent one"""
+        if self.error is not None:
+            return
+        self._event = progress
+        self._wakeup.set()
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Await a render while flushing its output.
+
+        If a send fails first, the render is cancelled and the send error
+        raised. Otherwise the render's result is returned, or its exception
+        raised, once the remaining output has been sent; a send failing
+        while doing so never replaces the render's own exception.
+
+        Args:
+            awaitable: The render producing the output
+
+        Returns:
+            The render's result
+        """
+        render = asyncio.ensure_future(awaitable)
+        if self._task is None:
+            self.start()
+        flush_task = self._task
+        try:
+            await asyncio.wait({render, flush_task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            render.cancel()
+            flush_task.cancel()
+            await asyncio.gather(render, flush_task, return_exceptions=True)
+            raise
+
+        if not render.done():
+            # The flush loop only ends early when sending failed
+            render.cancel()
+            await asyncio.gather(render, return_exceptions=True)
+            await self.close()
+
+        try:
+            await self.close()
+        except Exception:
+            if render.exception() is None:
+                raise
+        return render.result()
+
+    async def close(self):
+        """
+        Send whatever is still buffered and stop the flush loop.
+
+        Raises:
+            The exception a send failed with, if one did
+        """
+        self._closing.set()
+        self._wakeup.set()
+        if self._task:
+            task, self._task = self._task, None
+            await task
+        elif self.error is None:
+            try:
+                await self._flush()
+            except Exception as e:
+                self._fail(e)
+        if self.error is not None:
+            raise self.error
+
+    def _fail(self, error: BaseException):
+        """Stop buffering after a failed send"""
+        self.error = error
+        self._lines, self._ordinary, self._dropped = [], 0, 0
+        self._event = None
+
+    def _drop_oldest_ordinary(self):
+        for i, (is_debug, _) in enumerate(self._lines):
+            if not is_debug:
+                del self._lines[i]
+                self._ordinary -= 1
+                self._dropped += 1
+                return
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self._flush()
+            except Exception as e:
+                self._fail(e)
+                return
+            if self._closing.is_set():
+                return
+            try:
+                await asyncio.wait_for(self._closing.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flush(self):
+        if self._lines:
+            lines, dropped = self._lines, self._dropped
+            self._lines, self._ordinary, self._dropped = [], 0, 0
+            message: Dict[str, Any] = {
+                "type": "progress_batch",
+                "messages": [line for _, line in lines],
+            }
+            if dropped:
+                message["dropped"] = dropped
+            await self.send(message)
+        if self._event:
+            event, self._event = self._event, None
+            await self.send({"type": "render_progress", **event.to_dict()})
@@ -1,14 +1,200 @@
 import asyncio
+import errno
+import functools
+import logging
 import os
+import re
+import shutil
+import socket
 import tempfile
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, Callable, Awaitable, Dict, Union
+from typing import AsyncIterator, Optional, Callable, Awaitable, Dict, Union
 from .code_generator import CodeGenerator
+from .progress import ProgressTracker, RenderProgress, RenderProgressCallback
 from .graph_validator import ValidationError
 from .storage import StorageManager
+from .job_store import JobStore
+from .scratch import ScratchSpace
+from .temp_sweeper import TempSweeper
 from ..models.graph import Graph
 
+logger = logging.getLogger("manim_nodes")
+
 ProgressCallback = Callable[[str], Union[None, Awaitable[None]]]
+# Receives (segment index, MP4 bytes) for each finished partial movie file
+SegmentCallback = Callable[[int, bytes], Awaitable[None]]
+
+# How often to look for newly finished partial movie files while streaming
+SEGMENT_POLL_INTERVAL = 0.1
+
+# Every render runs in its own temp/render-XXXXXXXX directory holding the
+# scene module, a manim config and all of manim's output
+RENDER_DIR_PREFIX = "render-"
+SCENE_MODULE = "scene.py"
+
+# What a render failing because its filesystem filled up reports (ENOSPC)
+NO_SPACE_MESSAGE = os.strerror(errno.ENOSPC)
+
+# manim config of a render directory: flat output folders at known paths.
+# LaTeX and text are cached by content hash, so those caches stay shared.
+RENDER_CONFIG_TEMPLATE = """[CLI]
+media_dir = {render_dir}/media
+video_dir = {{media_dir}}/videos
+images_dir = {{media_dir}}/images
+partial_movie_dir = {{video_dir}}/partial_movie_files/{{scene_name}}
+log_dir = {{media_dir}}/logs
+tex_dir = {shared_media_dir}/Tex
+text_dir = {shared_media_dir}/texts
+"""
+
+# GIF exports are rendered directly at their delivery size (16:9, width
+# 720; libx264 needs an even height) instead of being downscaled from a
+# full-quality render
+GIF_RESOLUTION = (720, 404)
+
+# Export job statuses after which nothing changes any more
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# Pixel size (width, height) of each export quality preset
+PRESET_RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "2160p": (3840, 2160),
+}
+
+# Custom export sizes are given as "WIDTHxHEIGHT"
+CUSTOM_QUALITY_RE = re.compile(r"^(\d+)x(\d+)$")
+MIN_CUSTOM_DIMENSION = 16
+MAX_CUSTOM_DIMENSION = 7680
+
+
+def export_resolution(quality: str) -> tuple[int, int]:
+    """
+    Get the pixel size of an export quality.
+
+    Args:
+        quality: A preset name (480p ... 2160p) or a custom "WIDTHxHEIGHT"
+
+    Returns:
+        Tuple of (width, height) in pixels
+
+    Raises:
+        ValueError if the quality is unknown or the custom size is invalid
+    """
+    if quality in PRESET_RESOLUTIONS:
+        return PRESET_RESOLUTIONS[quality]
+
+    match = CUSTOM_QUALITY_RE.match(quality)
+    if not match:
+        raise ValueError(f"Unknown export quality: {quality}")
+
+    width, height = int(match.group(1)), int(match.group(2))
+    for dimension in (width, height):
+        if not MIN_CUSTOM_DIMENSION <= dimension <= MAX_CUSTOM_DIMENSION:
+            raise ValueError(
+                f"Export size must be between {MIN_CUSTOM_DIMENSION} and "
+                f"{MAX_CUSTOM_DIMENSION} pixels per side: {quality}"
+            )
+        # libx264 and yuv420p need even dimensions
+        if dimension % 2:
+            raise ValueError(f"Export width and height must be even: {quality}")
+    return width, height
+
+
+# Appended to the generated module for still renders that stop partway
+# through the scene. Manim treats an upper animation bound of 0 as "unset",
+# so the cut-off is enforced here rather than through ``-n 0,N``.
+STILL_SCENE_TEMPLATE = """
+
+from manim.utils.exceptions import EndSceneEarlyException
+
+
+class StillScene(GeneratedScene):
+    def play(self, *args, **kwargs):
+        if self.renderer.num_plays > {animation_index}:
+            raise EndSceneEarlyException()
+        super().play(*args, **kwargs)
+"""
+
+
+async def _iter_lines(stream: asyncio.StreamReader):
+    """
+    Yield non-empty decoded lines from a subprocess stream.
+
+    Splits on carriage returns as well as newlines: manim's tqdm progress
+    bars redraw in place with \\r and would otherwise arrive as one line
+    only when the bar finishes.
+    """
+    buffer = b""
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            break
+        buffer += chunk
+        *lines, buffer = re.split(rb"[\r\n]", buffer)
+        for line in lines:
+            line_str = line.decode(errors="replace").strip()
+            if line_str:
+                yield line_str
+    line_str = buffer.decode(errors="replace").strip()
+    if line_str:
+        yield line_str
+
+
+async def _terminate(process: asyncio.subprocess.Process, grace: float = 5.0):
+    """Stop a subprocess (SIGTERM, then SIGKILL after `grace` seconds) and reap it"""
+    if process.returncode is not None:
+        return
+    try:
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+    except ProcessLookupError:
+        pass
+
+
+async def _wait_event(event: asyncio.Event, timeout: float) -> bool:
+    """
+    Wait until an event is set or the timeout passes.
+
+    Unlike asyncio.wait_for on Python < 3.12, this never swallows a
+    cancellation that arrives just as the event is set.
+
+    Returns:
+        True if the event was set
+    """
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        done, _ = await asyncio.wait({waiter}, timeout=timeout)
+    finally:
+        waiter.cancel()
+    return waiter in done
+
+
+def _once_per_index(callback: SegmentCallback) -> SegmentCallback:
+    """
+    Wrap a segment callback to pass on each segment index only once, so a
+    render started over does not resend segments the client already has.
+    """
+    sent = 0
+
+    async def forward(index: int, data: bytes):
+        nonlocal sent
+        if index >= sent:
+            sent = index + 1
+            await callback(index, data)
+
+    return forward
 
 
 class RenderError(Exception):
@@ -19,16 +205,105 @@ class RenderError(Exception):
         self.node_id = node_id
 
 
+class _ScratchFull(Exception):
+    """A render in the scratch space ran out of room there"""
+
+
 class Renderer:
     """Handles MANIM rendering for preview and export"""
 
-    def __init__(self, storage: StorageManager):
+    def __init__(
+        self,
+        storage: StorageManager,
+        scratch: Optional[ScratchSpace] = None,
+        temp_sweeper: Optional[TempSweeper] = None,
+    ):
+        """
+        Args:
+            storage: Storage manager (renders and their output go in its temp directory)
+            scratch: Optional fast (RAM-backed) space previews and stills are
+                rendered in while it has room; their output is then moved to temp
+            temp_sweeper: Optional sweeper of the temp directory; render
+                directories are pinned against it while they are in use
+        """
         self.storage = storage
+        self.scratch = scratch
+        self.temp_sweeper = temp_sweeper
+        # Interactive (preview/still) renders in flight; background work
+        # such as node thumbnails waits for this to drop to zero.
+        self._interactive_renders = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @asynccontextmanager
+    async def _interactive(self):
+        """Mark an interactive render as in flight for its duration"""
+        self._interactive_renders += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._interactive_renders -= 1
+            if self._interactive_renders == 0:
+                self._idle.set()
+
+    async def wait_until_idle(self):
+        """Wait until no interactive render is in flight"""
+        await self._idle.wait()
+
+    def new_render_dir(self) -> Path:
+        """Create the scratch directory of one render"""
+        return Path(tempfile.mkdtemp(prefix=RENDER_DIR_PREFIX, dir=self.storage.temp_dir))
+
+    def render_dir_of(self, path: Path) -> Optional[Path]:
+        """The render directory holding a render's output (None if none does)"""
+        try:
+            parts = Path(path).relative_to(self.storage.temp_dir).parts
+        except ValueError:
+            return None
+        if len(parts) > 1 and parts[0].startswith(RENDER_DIR_PREFIX):
+            return self.storage.temp_dir / parts[0]
+        return None
+
+    def pin_render(self, path: Path):
+        """Keep the render directory holding a path from being swept"""
+        if self.temp_sweeper is not None:
+            self.temp_sweeper.pin(path)
+
+    def unpin_render(self, path: Path):
+        """Release a pin taken with pin_render() or render_export(keep_pinned=True)"""
+        if self.temp_sweeper is not None:
+            self.temp_sweeper.unpin(path)
+
+    def discard_render(self, path: Path):
+        """Delete the render directory holding a render's output"""
+        render_dir = self.render_dir_of(path)
+        if render_dir is not None:
+            shutil.rmtree(render_dir, ignore_errors=True)
+
+    def _prepare_render(self, render_dir: Path, python_code: str) -> tuple[Path, Path]:
+        """
+        Write a render's scene module and manim config.
+
+        Returns:
+            Tuple of (scene module path, config file path)
+        """
+        python_file = render_dir / SCENE_MODULE
+        python_file.write_text(python_code)
+        config_file = render_dir / "manim.cfg"
+        # configparser treats % as interpolation
+        config_file.write_text(RENDER_CONFIG_TEMPLATE.format(
+            render_dir=str(render_dir).replace("%", "%%"),
+            shared_media_dir=str(self.storage.temp_dir / "media").replace("%", "%%"),
+        ))
+        return python_file, config_file
 
     async def render_preview(
         self,
         graph: Graph,
-        progress_callback: Optional[ProgressCallback] = None
+        progress_callback: Optional[ProgressCallback] = None,
+        segment_callback: Optional[SegmentCallback] = None,
+        progress_event_callback: Optional[RenderProgressCallback] = None
     ) -> tuple[Path, str]:
         """
         Render graph for preview (low quality, fast).
@@ -36,6 +311,9 @@ class Renderer:
         Args:
             graph: Graph to render
             progress_callback: Optional callback for progress updates
+            segment_callback: Optional callback receiving each animation's
+                partial MP4 as soon as manim has finished writing it
+            progress_event_callback: Optional callback for structured progress
 
         Returns:
             Tuple of (Path to rendered video file, Generated Python code)
@@ -43,56 +321,211 @@ class Renderer:
         Raises:
             RenderError if rendering fails
         """
-        return await self._render(
-            graph=graph,
-            quality="low",
-            fps=15,
-            progress_callback=progress_callback
-        )
+        async with self._interactive():
+            return await self._render(
+                graph=graph,
+                quality="low",
+                fps=15,
+                progress_callback=progress_callback,
+                segment_callback=segment_callback,
+                progress_event_callback=progress_event_callback,
+                scratch=True,
+            )
 
     async def render_export(
         self,
         graph: Graph,
         quality: str = "1080p",
         fps: int = 30,
-        progress_callback: Optional[ProgressCallback] = None
+        progress_callback: Optional[ProgressCallback] = None,
+        progress_event_callback: Optional[RenderProgressCallback] = None,
+        resolution: Optional[tuple[int, int]] = None,
+        keep_pinned: bool = False,
     ) -> tuple[Path, str]:
         """
-        Render graph for export (high quality).
+        Render graph for export at exactly the requested pixel size.
+
+        Manim's quality flags only go up to 1080p, so the size of every
+        preset is passed explicitly instead of being upscaled afterwards.
 
         Args:
             graph: Graph to render
-            quality: Quality preset (480p, 720p, 1080p, 1440p, 2160p)
+            quality: Quality preset (480p, 720p, 1080p, 1440p, 2160p) or a
+                custom "WIDTHxHEIGHT"
             fps: Frames per second
             progress_callback: Optional callback for progress updates
+            progress_event_callback: Optional callback for structured progress
+            resolution: Optional (width, height) overriding the quality size
+            keep_pinned: Leave the output's render directory pinned against
+                temp sweeps; the caller releases it with unpin_render()
 
         Returns:
             Tuple of (Path to rendered video file, Generated Python code)
 
         Raises:
-            RenderError if rendering fails
+            RenderError if rendering fails or the quality is invalid
         """
-        quality_map = {
-            "480p": "low",
-            "720p": "medium",
-            "1080p": "high",
-            "1440p": "high",
-            "2160p": "high"
-        }
+        if resolution is None:
+            try:
+                resolution = export_resolution(quality)
+            except ValueError as e:
+                raise RenderError(str(e))
 
         return await self._render(
             graph=graph,
-            quality=quality_map.get(quality, "high"),
+            quality="high",
             fps=fps,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            progress_event_callback=progress_event_callback,
+            resolution=resolution,
+            keep_pinned=keep_pinned,
         )
 
+    async def render_still(
+        self,
+        graph: Graph,
+        animation_index: Optional[int] = None,
+        resolution: Optional[tuple[int, int]] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> tuple[Path, str]:
+        """
+        Render a single frame of the graph as a PNG.
+
+        Uses manim's save-last-frame mode, which skips every animation to
+        its end state instead of rasterizing intermediate frames, so this
+        is much cheaper than a preview video.
+
+        Args:
+            graph: Graph to render
+            animation_index: Render the frame at the end of this animation
+                (0-based). Defaults to the last frame of the scene.
+            resolution: Optional (width, height) in pixels
+            progress_callback: Optional callback for progress updates
+
+        Returns:
+            Tuple of (Path to rendered PNG file, Generated Python code)
+
+        Raises:
+            RenderError if rendering fails
+        """
+        if animation_index is not None and animation_index < 0:
+            raise RenderError("Animation index must be non-negative")
+
+        async with self._interactive():
+            return await self._render(
+                graph=graph,
+                quality="low",
+                fps=15,
+                progress_callback=progress_callback,
+                resolution=resolution,
+                still=True,
+                animation_index=animation_index,
+                scratch=True,
+            )
+
+    async def render_thumbnail(
+        self,
+        graph: Graph,
+        resolution: tuple[int, int],
+        niceness: int = 0,
+    ) -> tuple[Path, str]:
+        """
+        Render the last frame of a graph as background work.
+
+        Unlike render_still, this does not count as an interactive render
+        (background work does not wait for it) and runs at low CPU priority.
+
+        Args:
+            graph: Graph to render
+            resolution: (width, height) in pixels
+            niceness: CPU niceness increment for the manim process
+
+        Returns:
+            Tuple of (Path to rendered PNG file, Generated Python code)
+
+        Raises:
+            RenderError if rendering fails
+        """
+        return await self._render(
+            graph=graph,
+            quality="low",
+            fps=15,
+            resolution=resolution,
+            still=True,
+            niceness=niceness,
+        )
+
+    async def render_scene_stills(
+        self,
+        python_code: str,
+        scene_names: list[str],
+        resolution: tuple[int, int],
+        niceness: int = 0,
+    ) -> Dict[str, Path]:
+        """
+        Render the last frame of several scenes from one module.
+
+        All scenes are rendered by a single manim process, so the cost of
+        starting manim is paid once per batch rather than once per image.
+
+        Args:
+            python_code: Module source defining every scene in scene_names
+            scene_names: Names of the Scene classes to render
+            resolution: (width, height) in pixels
+            niceness: CPU niceness increment for the manim process
+
+        Returns:
+            Dict mapping scene name to its PNG, all in one render directory
+            (delete it with discard_render once the images are used). Scenes
+            that failed to render are missing from the result.
+
+        Raises:
+            RenderError if manim could not be run at all
+        """
+        render_dir = self.new_render_dir()
+        results: Dict[str, Path] = {}
+        try:
+            python_file, config_file = self._prepare_render(render_dir, python_code)
+            cmd = [
+                "manim",
+                "render",
+                str(python_file),
+                *scene_names,
+                "-ql",
+                "-s",
+                f"--config_file={config_file}",
+                f"--resolution={resolution[0]},{resolution[1]}",
+                "--disable_caching",
+            ]
+            await self._run_manim(cmd, niceness=niceness, cwd=render_dir)
+
+            # Manim aborts the batch on the first failing scene, so collect
+            # whatever was written before that rather than checking the code
+            for image in (render_dir / "media" / "images").glob("*.png"):
+                for scene_name in scene_names:
+                    if image.name.startswith(f"{scene_name}_ManimCE"):
+                        results[scene_name] = image
+            return results
+        except Exception as e:
+            raise RenderError(f"Rendering failed: {str(e)}")
+        finally:
+            if not results:
+                shutil.rmtree(render_dir, ignore_errors=True)
+
     async def _render(
         self,
         graph: Graph,
         quality: str,
         fps: int,
-        progress_callback: Optional[ProgressCallback] = None
+        progress_callback: Optional[ProgressCallback] = None,
+        resolution: Optional[tuple[int, int]] = None,
+        still: bool = False,
+        animation_index: Optional[int] = None,
+        segment_callback: Optional[SegmentCallback] = None,
+        progress_event_callback: Optional[RenderProgressCallback] = None,
+        scratch: bool = False,
+        niceness: int = 0,
+        keep_pinned: bool = False,
     ) -> tuple[Path, str]:
         """
         Internal method to render graph.
@@ -102,9 +535,20 @@ class Renderer:
             quality: Quality preset (low, medium, high)
             fps: Frames per second
             progress_callback: Optional callback for progress updates
+            resolution: Optional (width, height) overriding the preset size
+            still: Save only the last frame as a PNG instead of a video
+            animation_index: For still renders, stop after this animation
+            segment_callback: Optional callback for finished partial movie files
+            progress_event_callback: Optional callback for structured progress
+            scratch: Render in the scratch space if it has room. If it runs
+                out part way through (the filesystem fills up, or the space
+                goes over its quota), the render is started over on disk.
+            niceness: CPU niceness increment for the manim process
+            keep_pinned: On success, leave the output's render directory
+                pinned (see render_export)
 
         Returns:
-            Tuple of (Path to rendered video file, Generated Python code)
+            Tuple of (Path to rendered video or image file, Generated Python code)
 
         Raises:
             RenderError if rendering fails
@@ -123,117 +567,286 @@ class Renderer:
         except Exception as e:
             raise RenderError(f"Code generation failed: {str(e)}")
 
-        # Create temporary Python file
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.py',
-            delete=False,
-            dir=self.storage.temp_dir
-        ) as f:
-            f.write(python_code)
-            python_file = Path(f.name)
+        scene_name = "GeneratedScene"
+        script = python_code
+        if still and animation_index is not None:
+            scene_name = "StillScene"
+            script += STILL_SCENE_TEMPLATE.format(animation_index=animation_index)
 
-        try:
-            # Prepare manim command
-            quality_flags = {
-                "low": ["-ql", "--format=mp4"],  # 480p, 15fps
-                "medium": ["-qm", "--format=mp4"],  # 720p, 30fps
-                "high": ["-qh", "--format=mp4"],  # 1080p, 60fps
-            }
+        scratch_dir = None
+        if scratch and self.scratch is not None:
+            scratch_dir = self.scratch.acquire(prefix=RENDER_DIR_PREFIX)
+        if scratch_dir is not None and segment_callback is not None:
+            segment_callback = _once_per_index(segment_callback)
+        if progress_callback:
+            await progress_callback("Starting render...")
 
-            cmd = [
-                "manim",
-                "render",
-                str(python_file),
-                "GeneratedScene",
-                *quality_flags.get(quality, quality_flags["medium"]),
-                f"--frame_rate={fps}",
-                "--disable_caching"
-            ]
+        # Renders in scratch space that run out of room are started over on
+        # disk, so this runs at most twice
+        while True:
+            render_dir = scratch_dir or self.new_render_dir()
+            # Pinned for the whole render, not just while it writes fresh files
+            self.pin_render(render_dir)
+            media_dir = render_dir / "media"
+            completed = False
+            try:
+                python_file, config_file = self._prepare_render(render_dir, script)
 
-            if progress_callback:
-                await progress_callback("Starting render...")
-
-            # Run manim command
-            # Ensure /Library/TeX/texbin is on PATH so dvisvgm can find TeX resources
-            env = os.environ.copy()
-            tex_bin = "/Library/TeX/texbin"
-            if tex_bin not in env.get("PATH", ""):
-                env["PATH"] = tex_bin + ":" + env.get("PATH", "")
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(self.storage.temp_dir),
-                env=env,
-            )
+                # Prepare manim command
+                quality_flags = {
+                    "low": ["-ql", "--format=mp4"],  # 480p, 15fps
+                    "medium": ["-qm", "--format=mp4"],  # 720p, 30fps
+                    "high": ["-qh", "--format=mp4"],  # 1080p, 60fps
+                }
+
+                flags = list(quality_flags.get(quality, quality_flags["medium"]))
+                if still:
+                    # -s skips every animation to its end state and writes a PNG
+                    flags = [flags[0], "-s"]
+
+                cmd = [
+                    "manim",
+                    "render",
+                    str(python_file),
+                    scene_name,
+                    *flags,
+                    f"--config_file={config_file}",
+                    f"--frame_rate={fps}",
+                    "--disable_caching"
+                ]
+                if resolution:
+                    cmd.append(f"--resolution={resolution[0]},{resolution[1]}")
+
+                tap_task = None
+                render_done = asyncio.Event()
+                if segment_callback and not still:
+                    partial_dir = media_dir / "videos" / "partial_movie_files" / scene_name
+                    tap_task = asyncio.create_task(self._tap_segments(
+                        partial_dir, segment_callback, render_done
+                    ))
+
+                tracker = None
+                if progress_event_callback and not still:
+                    total_animations, total_duration = CodeGenerator.estimate_timeline(python_code)
+                    tracker = ProgressTracker(total_animations, total_duration, fps)
+
+                try:
+                    run = self._run_manim(
+                        cmd, progress_callback,
+                        tracker=tracker,
+                        progress_event_callback=progress_event_callback,
+                        niceness=niceness,
+                        cwd=render_dir,
+                    )
+                    if scratch_dir is not None:
+                        run = self._within_scratch_quota(run, scratch_dir)
+                    returncode, stderr_lines = await run
+                finally:
+                    render_done.set()
+                    if tap_task:
+                        await tap_task
 
-            # Stream stdout and stderr concurrently
-            stderr_lines: list[str] = []
+                if returncode != 0:
+                    error_msg = "\n".join(stderr_lines)
+                    if scratch_dir is not None and NO_SPACE_MESSAGE in error_msg:
+                        raise _ScratchFull()
+                    # Try to identify which node caused the error
+                    error_node_id = self._find_error_node(error_msg, var_to_node_id)
+                    raise RenderError(
+                        f"Manim rendering failed:\n{error_msg}",
+                        code=python_code,
+                        node_id=error_node_id,
+                    )
 
-            async def read_stderr():
-                while True:
-                    line = await process.stderr.readline()
-                    if not line:
-                        break
-                    line_str = line.decode().strip()
-                    if line_str:
-                        stderr_lines.append(line_str)
-                        if progress_callback:
-                            await progress_callback(line_str)
+                # The render config puts videos at media/videos/[scene].mp4 and
+                # stills at media/images/[scene]_ManimCE_v[version].png
+                if still:
+                    output_file = next((media_dir / "images").glob(f"{scene_name}_ManimCE*.png"), None)
+                else:
+                    output_file = media_dir / "videos" / f"{scene_name}.mp4"
 
-            stderr_task = asyncio.create_task(read_stderr())
+                if not output_file or not output_file.exists():
+                    kind = "image" if still else "video"
+                    raise RenderError(f"Output {kind} file not found")
 
+                if scratch_dir is not None:
+                    output_file = self._keep_output(scratch_dir, output_file)
+                if keep_pinned:
+                    # Taken before the render's own pin goes, so there is no gap
+                    self.pin_render(output_file)
+                completed = True
+                return output_file, python_code
+
+            except (_ScratchFull, OSError) as e:
+                if isinstance(e, OSError) and (scratch_dir is None or e.errno != errno.ENOSPC):
+                    raise RenderError(f"Rendering failed: {str(e)}")
+                logger.warning("Render scratch space ran out of room, rendering on disk instead")
+            except RenderError:
+                raise
+            except Exception as e:
+                raise RenderError(f"Rendering failed: {str(e)}")
+            finally:
+                self.unpin_render(render_dir)
+                # A failed or cancelled render leaves nothing behind; the
+                # caller discards a finished one once its output is used
+                if scratch_dir is not None:
+                    self.scratch.release(scratch_dir)
+                elif not completed:
+                    shutil.rmtree(render_dir, ignore_errors=True)
+            scratch_dir = None
+
+    async def _within_scratch_quota(
+        self, run: Awaitable[tuple[int, list[str]]], scratch_dir: Path
+    ) -> tuple[int, list[str]]:
+        """
+        Await a manim run in the scratch space, stopping it if it has to
+        make room.
+
+        Raises:
+            _ScratchFull if the scratch space went over its quota with this
+            render taking up the most of it
+        """
+        task = asyncio.ensure_future(run)
+        try:
             while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
+                done, _ = await asyncio.wait({task}, timeout=self.scratch.check_interval)
+                if done:
+                    return task.result()
+                if await asyncio.to_thread(self.scratch.over_quota, scratch_dir):
+                    raise _ScratchFull()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    def _keep_output(self, scratch_dir: Path, output_file: Path) -> Path:
+        """Move a render's output from the scratch space to a render directory in temp"""
+        target = self.new_render_dir() / output_file.relative_to(scratch_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(output_file, target)
+        return target
+
+    async def _run_manim(
+        self,
+        cmd: list[str],
+        progress_callback: Optional[ProgressCallback] = None,
+        niceness: int = 0,
+        tracker: Optional[ProgressTracker] = None,
+        progress_event_callback: Optional[RenderProgressCallback] = None,
+        cwd: Optional[Path] = None,
+    ) -> tuple[int, list[str]]:
+        """
+        Run a manim command, streaming its output.
+
+        Args:
+            cmd: Command line to execute
+            progress_callback: Optional callback for each output line
+            niceness: Increment to the subprocess's CPU niceness (POSIX only)
+            tracker: Optional tracker parsing manim's progress bars; parsed
+                bar updates go to progress_event_callback instead of
+                progress_callback
+            progress_event_callback: Optional callback for structured progress
+            cwd: Working directory (default: the temp directory)
+
+        Returns:
+            Tuple of (return code, stderr lines)
+        """
+        # Ensure /Library/TeX/texbin is on PATH so dvisvgm can find TeX resources
+        env = os.environ.copy()
+        tex_bin = "/Library/TeX/texbin"
+        if tex_bin not in env.get("PATH", ""):
+            env["PATH"] = tex_bin + ":" + env.get("PATH", "")
+
+        preexec_fn = None
+        if niceness and hasattr(os, "nice"):
+            preexec_fn = lambda: os.nice(niceness)  # noqa: E731
 
-                line_str = line.decode().strip()
-                if progress_callback and line_str:
-                    await progress_callback(line_str)
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=str(cwd or self.storage.temp_dir),
+            env=env,
+            preexec_fn=preexec_fn,
+        )
+
+        # Stream stdout and stderr concurrently
+        stderr_lines: list[str] = []
 
+        async def handle_line(line_str: str, from_stderr: bool):
+            if tracker:
+                event = tracker.feed(line_str)
+                if event:
+                    if progress_event_callback:
+                        await progress_event_callback(event)
+                    return
+            if from_stderr:
+                stderr_lines.append(line_str)
+            if progress_callback:
+                await progress_callback(line_str)
+
+        async def read_stream(stream, from_stderr: bool):
+            async for line_str in _iter_lines(stream):
+                await handle_line(line_str, from_stderr)
+
+        stderr_task = asyncio.create_task(read_stream(process.stderr, True))
+        try:
+            await read_stream(process.stdout, False)
             await stderr_task
 
             # Wait for completion
             await process.wait()
+        except BaseException:
+            # Cancelled (e.g. worker shutdown) or a callback failed: never
+            # leave manim rendering on its own
+            stderr_task.cancel()
+            await _terminate(process)
+            raise
 
-            if process.returncode != 0:
-                error_msg = "\n".join(stderr_lines)
-                # Try to identify which node caused the error
-                error_node_id = self._find_error_node(error_msg, var_to_node_id)
-                raise RenderError(
-                    f"Manim rendering failed:\n{error_msg}",
-                    code=python_code,
-                    node_id=error_node_id,
-                )
+        return process.returncode, stderr_lines
 
-            # Find output video file
-            # Manim outputs to media/videos/[filename]/[quality]/[scene].mp4
-            media_dir = self.storage.temp_dir / "media" / "videos" / python_file.stem
-            output_file = None
+    async def _tap_segments(
+        self,
+        partial_dir: Path,
+        segment_callback: SegmentCallback,
+        render_done: asyncio.Event,
+    ):
+        """
+        Forward manim's partial movie files as they are completed.
 
-            for quality_dir in media_dir.rglob("*.mp4"):
-                output_file = quality_dir
-                break
+        Manim writes one partial MP4 per animation, named uncached_00000.mp4,
+        uncached_00001.mp4, ... when caching is disabled. A file is complete
+        once the next one exists or the render has finished.
 
-            if not output_file or not output_file.exists():
-                raise RenderError("Output video file not found")
+        Args:
+            partial_dir: Partial movie file directory of the scene
+            segment_callback: Receives each finished segment; awaiting it
+                applies backpressure to this tap only, never to manim
+            render_done: Set once the manim process has exited
+        """
+        next_index = 0
 
-            return output_file, python_code
+        while True:
+            finished = render_done.is_set()
+            segments = sorted(partial_dir.glob("uncached_*.mp4"))
+            complete = segments if finished else segments[:-1]
 
-        except RenderError:
-            raise
-        except Exception as e:
-            raise RenderError(f"Rendering failed: {str(e)}")
-        finally:
-            # Clean up temporary Python file
+            for segment in complete[next_index:]:
+                try:
+                    data = segment.read_bytes()
+                except OSError:
+                    # Retry on the next poll
+                    break
+                await segment_callback(next_index, data)
+                next_index += 1
+
+            if finished:
+                return
             try:
-                python_file.unlink()
-            except Exception:
+                await asyncio.wait_for(render_done.wait(), SEGMENT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
                 pass
 
-
     def _find_error_node(self, error_msg: str, var_to_node_id: Dict[str, str]) -> Optional[str]:
         """Try to identify the node that caused a rendering error by matching variable names."""
         if not var_to_node_id:
@@ -245,106 +858,840 @@ class Renderer:
         return None
 
 
+class ExportOutput:
+    """One deliverable (format and quality) of an export job"""
+
+    def __init__(self, format: str, quality: str):
+        self.format = format
+        self.quality = quality
+        self.status = "pending"  # pending, encoding, completed, failed
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.output_file: Optional[Path] = None
+
+    def to_dict(self) -> dict:
+        """Serialize for the job store"""
+        return {
+            "format": self.format,
+            "quality": self.quality,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "output_file": str(self.output_file) if self.output_file else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ExportOutput":
+        """Restore from the job store"""
+        output = cls(data["format"], data["quality"])
+        output.status = data["status"]
+        output.progress = data["progress"]
+        output.error = data.get("error")
+        output.output_file = Path(data["output_file"]) if data.get("output_file") else None
+        return output
+
+
 class ExportJob:
     """Represents an export job"""
 
-    def __init__(self, job_id: str, graph: Graph, quality: str, fps: int, format: str = "mp4"):
+    def __init__(
+        self,
+        job_id: str,
+        graph: Graph,
+        quality: str,
+        fps: int,
+        format: str = "mp4",
+        outputs: Optional[list[tuple[str, str]]] = None,
+        max_log_lines: int = 500,
+    ):
         self.job_id = job_id
-        self.graph = graph
+        # Released once rendered; jobs outlive their graphs
+        self.graph: Optional[Graph] = graph
+        self.graph_id: Optional[str] = graph.id if graph is not None else None
         self.quality = quality
         self.fps = fps
         self.format = format
-        self.status = "pending"  # pending, running, completed, failed
+        # (format, quality) pairs produced from one render; the first is the
+        # job's primary output
+        self.outputs = [ExportOutput(f, q) for f, q in (outputs or [(format, quality)])]
+        self.status = "pending"  # pending, running, completed, failed, cancelled
         self.progress = 0.0
+        self.eta: Optional[float] = None  # seconds remaining in the render
         self.error: Optional[str] = None
         self.output_file: Optional[Path] = None
-        self.log: list[str] = []
+        # Ring buffer of the most recent log lines; log_total counts every
+        # line ever added so clients can page with stable offsets
+        self.log: deque[str] = deque(maxlen=max_log_lines)
+        self.log_total = 0
+        self.dedup_key: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
 
     def add_log(self, message: str):
         """Add log message"""
         self.log.append(message)
+        self.log_total += 1
+
+    def get_log(self, since: int = 0, limit: Optional[int] = None) -> tuple[list[str], int]:
+        """
+        Get log lines from an offset.
+
+        Args:
+            since: Offset of the first line wanted (lines that have already
+                left the ring buffer are skipped)
+            limit: Maximum number of lines to return
+
+        Returns:
+            Tuple of (lines, offset to pass as since on the next call)
+        """
+        first_kept = self.log_total - len(self.log)
+        start = max(since, first_kept)
+        end = self.log_total if limit is None else min(self.log_total, start + limit)
+        lines = [self.log[i - first_kept] for i in range(start, end)]
+        return lines, max(end, since)
+
+    def to_state(self) -> dict:
+        """Serialize the mutable state (everything but settings and graph)"""
+        return {
+            "status": self.status,
+            "outputs": [o.to_dict() for o in self.outputs],
+            "progress": self.progress,
+            "eta": self.eta,
+            "error": self.error,
+            "output_file": str(self.output_file) if self.output_file else None,
+            "log_tail": list(self.log),
+            "log_total": self.log_total,
+            "finished_at": self.finished_at,
+        }
+
+    def to_record(self) -> dict:
+        """Serialize for the job store"""
+        return {
+            "job_id": self.job_id,
+            "quality": self.quality,
+            "fps": self.fps,
+            "format": self.format,
+            "graph": self.graph.model_dump() if self.graph is not None else None,
+            "dedup_key": self.dedup_key,
+            "graph_id": self.graph_id,
+            "created_at": self.created_at,
+            **self.to_state(),
+        }
+
+    @classmethod
+    def from_record(cls, record: dict, max_log_lines: int = 500) -> "ExportJob":
+        """Restore from the job store"""
+        graph = Graph(**record["graph"]) if record.get("graph") else None
+        job = cls(record["job_id"], graph, record["quality"], record["fps"], record["format"],
+                  max_log_lines=max_log_lines)
+        job.outputs = [ExportOutput.from_dict(o) for o in record["outputs"]]
+        job.status = record["status"]
+        job.progress = record["progress"]
+        job.eta = record.get("eta")
+        job.error = record.get("error")
+        job.output_file = Path(record["output_file"]) if record.get("output_file") else None
+        job.log.extend(record.get("log_tail") or [])
+        job.log_total = record.get("log_total", len(job.log))
+        job.dedup_key = record.get("dedup_key")
+        job.graph_id = record.get("graph_id")
+        job.created_at = record["created_at"]
+        job.finished_at = record.get("finished_at")
+        return job
 
 
 class ExportQueue:
     """Manages background export jobs"""
 
-    def __init__(self, storage: StorageManager, renderer: Renderer):
+    def __init__(
+        self,
+        storage: StorageManager,
+        renderer: Renderer,
+        job_ttl: float = 3600,
+        max_log_lines: int = 500,
+        store: Optional[JobStore] = None,
+        store_ttl: float = 7 * 24 * 3600,
+        max_concurrent: int = 2,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 5.0,
+        stale_after: float = 30.0,
+        abandon_after: Optional[float] = 300.0,
+    ):
+        """
+        Initialize export queue.
+
+        Jobs are queued in the job store and run by whichever process runs a
+        worker loop (start_worker / run_worker): the API process itself by
+        default, or separate render workers (python -m backend.worker)
+        sharing the same storage directory.
+
+        Store calls can wait on other processes holding the database's write
+        lock, so they run in one dedicated thread, never on the event loop.
+        One thread keeps them in order: writes made without waiting for
+        them (progress, poll times) are seen by every later read.
+
+        Args:
+            storage: Storage manager
+            renderer: Renderer used for exports
+            job_ttl: Seconds a finished job stays in memory before eviction
+            max_log_lines: Log lines kept per job
+            store: Persistent job store (default: SQLite file in storage.base_dir)
+            store_ttl: Seconds a finished job stays in the persistent store
+            max_concurrent: Jobs this process's worker loop runs at once
+            worker_id: Identifier recorded on claimed jobs (default: host:pid:random)
+            poll_interval: Seconds between checks for new jobs
+            heartbeat_interval: Seconds between heartbeats of running jobs
+            stale_after: Seconds without a heartbeat before a running job is
+                considered abandoned and requeued
+            abandon_after: Seconds without a status poll after which a job
+                whose client has polled it before is cancelled (None disables)
+        """
         self.storage = storage
         self.renderer = renderer
+        self.job_ttl = job_ttl
+        self.max_log_lines = max_log_lines
+        self.store = store or JobStore(storage.base_dir / "export_jobs.db")
+        self._store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self.store_ttl = store_ttl
+        self.max_concurrent = max_concurrent
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.abandon_after = abandon_after
+        # Jobs run or finished by this process; others are read from the store
         self.jobs: dict[str, ExportJob] = {}
+        # Dedup key (graph render hash + settings) -> job ID
+        self._dedup_index: dict[str, str] = {}
+        # Finished job IDs in completion order, for TTL eviction
+        self._finished: OrderedDict[str, float] = OrderedDict()
+        # Last write of each live job to the store, for throttling progress
+        self._persisted_at: dict[str, float] = {}
+        self._store_pruned_at = 0.0
+        self._running: dict[str, asyncio.Task] = {}
+        self._worker_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Set (and replaced) whenever a job of this process changes
+        self._updated = asyncio.Event()
+
+    async def _store(self, fn: Callable, *args, **kwargs):
+        """Run a job store call in the store thread and wait for its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._store_executor, functools.partial(fn, *args, **kwargs))
+
+    def _store_later(self, fn: Callable, *args, **kwargs):
+        """Queue a job store write in the store thread without waiting for it"""
+        def log_failure(future: Future):
+            if future.exception() is not None:
+                logger.error(f"Export job store write failed: {future.exception()}")
+
+        self._store_executor.submit(fn, *args, **kwargs).add_done_callback(log_failure)
+
+    def close(self):
+        """Finish queued store writes and close the job store"""
+        self._store_executor.shutdown(wait=True)
+        self.store.close()
 
-    def create_job(self, graph: Graph, quality: str = "1080p", fps: int = 30, format: str = "mp4") -> str:
+    async def create_job(
+        self,
+        graph: Graph,
+        quality: str = "1080p",
+        fps: int = 30,
+        format: str = "mp4",
+        outputs: Optional[list[tuple[str, str]]] = None,
+    ) -> str:
         """
         Create a new export job.
 
+        An identical export (same rendered graph content, fps and outputs)
+        that is still in flight, or finished with its files still on disk,
+        is reused instead of rendering again. Joining a job in flight
+        counts as another requester of it (see cancel_job).
+
         Args:
             graph: Graph to export
-            quality: Quality preset
+            quality: Quality preset or custom "WIDTHxHEIGHT"
             fps: Frames per second
-            format: Output format (mp4 or gif)
+            format: Output format (mp4, gif or webm)
+            outputs: Optional list of (format, quality) pairs to produce from
+                a single render; overrides format and quality
 
         Returns:
-            Job ID
+            Job ID (of the existing job when deduplicated)
+
+        Raises:
+            ValueError if a quality is unknown or an invalid custom size
         """
-        import uuid
-        job_id = str(uuid.uuid4())
-        job = ExportJob(job_id, graph, quality, fps, format)
-        self.jobs[job_id] = job
+        self._evict_expired()
+        if outputs:
+            # Drop duplicates, keeping the requested order
+            outputs = list(dict.fromkeys(outputs))
+            format, quality = outputs[0]
+        for _, output_quality in outputs or [(format, quality)]:
+            export_resolution(output_quality)
 
-        # Start job in background
-        asyncio.create_task(self._run_job(job))
+        dedup_key = self._dedup_key(graph, fps, outputs or [(format, quality)])
+        existing = await self._find_reusable(dedup_key)
+        if existing:
+            return existing.job_id
+
+        job_id = str(uuid.uuid4())
+        job = ExportJob(job_id, graph, quality, fps, format, outputs, self.max_log_lines)
+        job.dedup_key = dedup_key
+        await self._store(self.store.save, job.to_record())
+        if self._wakeup:
+            self._wakeup.set()
 
         return job_id
 
-    def get_job(self, job_id: str) -> Optional[ExportJob]:
-        """Get job by ID"""
-        return self.jobs.get(job_id)
+    async def get_job(self, job_id: str, polled: bool = False) -> Optional[ExportJob]:
+        """
+        Get job by ID, falling back to the persistent store.
+
+        Args:
+            job_id: Job ID
+            polled: True for client status polls, which keep the job from
+                being cancelled as abandoned
+        """
+        self._evict_expired()
+        if polled:
+            self._store_later(self.store.touch, job_id)
+        job = self.jobs.get(job_id)
+        if job is None:
+            record = await self._store(self.store.get, job_id, with_graph=False)
+            if record:
+                job = ExportJob.from_record(record, self.max_log_lines)
+        return job
+
+    async def latest_export(self, graph_id: Optional[str] = None) -> Optional[ExportJob]:
+        """
+        Get the most recently finished export whose file is still on disk.
+
+        Args:
+            graph_id: Only exports of this graph
+
+        Returns:
+            The completed job, or None if there is none
+        """
+        for record in await self._store(self.store.latest_completed, graph_id):
+            job = ExportJob.from_record(record, self.max_log_lines)
+            if job.output_file and job.output_file.exists():
+                return job
+        return None
+
+    async def watch(
+        self,
+        job_ids: list[str],
+        timeout: float = 1.0,
+        min_interval: float = 0.1,
+    ) -> AsyncIterator[Optional[ExportJob]]:
+        """
+        Follow jobs as they change, until all of them have finished.
+
+        Jobs running in this process are reported as soon as they change;
+        jobs of other workers are re-read from the store every `timeout`
+        seconds. Watching counts as polling for abandoned-job detection.
+
+        Args:
+            job_ids: Jobs to watch
+            timeout: Longest wait between checks
+            min_interval: Shortest time between reports, so bursts of log
+                lines are coalesced
+
+        Yields:
+            A job whenever its status, progress, outputs or log changed
+            (every job once at the start), or None after an idle wait
+        """
+        last: dict[str, tuple] = {}
+        remaining = list(dict.fromkeys(job_ids))
+        while remaining:
+            updated = self._updated
+            changed = False
+            for job_id in list(remaining):
+                job = await self.get_job(job_id, polled=True)
+                if job is None:
+                    remaining.remove(job_id)
+                    continue
+                key = (
+                    job.status, round(job.progress, 1), job.eta, job.log_total,
+                    tuple((o.status, round(o.progress, 1)) for o in job.outputs),
+                )
+                if key != last.get(job_id):
+                    last[job_id] = key
+                    changed = True
+                    yield job
+                if job.status in FINISHED_STATUSES:
+                    remaining.remove(job_id)
+
+            if not remaining:
+                break
+            if changed:
+                await asyncio.sleep(min_interval)
+                continue
+            if not await _wait_event(updated, timeout):
+                yield None
+
+    async def cancel_job(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a pending or running job.
+
+        A job shared by identical export requests only stops once every
+        requester has cancelled it; until then a cancel just withdraws one
+        request. A job running in this process is stopped immediately (its
+        manim or ffmpeg subprocess is terminated and partial files are
+        removed); a job running in another worker is stopped within that
+        worker's poll interval.
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            "cancelled" or "cancelling", "released" if other requesters
+            still wait for the job, the job's status if it had already
+            finished, or None if there is no such job
+        """
+        status = await self._store(self.store.request_cancel, job_id)
+        if status == "cancelled" and job_id not in self.jobs:
+            # Was still pending: nothing ran, just record it on the job
+            job = ExportJob.from_record(await self._store(self.store.get, job_id), self.max_log_lines)
+            for output in job.outputs:
+                output.status = "cancelled"
+            job.add_log("Export cancelled")
+            await self._store(self.store.update, job_id, job.to_state())
+        elif status == "cancelling" and job_id in self._running:
+            self._cancel_running(job_id)
+            status = "cancelled"
+        return status
+
+    def _cancel_running(self, job_id: str):
+        """Stop a job running in this process"""
+        job = self.jobs[job_id]
+        if job.status == "cancelled":
+            return
+        job.status = "cancelled"
+        job.eta = None
+        job.add_log("Export cancelled")
+        self._running[job_id].cancel()
+
+    def start_worker(self):
+        """Start running queued jobs in this process (needs a running event loop)"""
+        if self._worker_task is None or self._worker_task.done():
+            self._wakeup = asyncio.Event()
+            self._worker_task = asyncio.create_task(self._worker_loop())
+
+    async def stop_worker(self):
+        """Stop the worker loop and any jobs it is running"""
+        tasks = [t for t in [self._worker_task, *self._running.values()] if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_task = None
+
+        released = await self._store(self.store.release, self.worker_id)
+        if released:
+            logger.info(f"Returned {released} unfinished export job(s) to the queue")
+
+    async def run_worker(self):
+        """Run queued jobs until cancelled (entry point of render workers)"""
+        self.start_worker()
+        try:
+            await self._worker_task
+        finally:
+            await self.stop_worker()
+
+    async def requeue_stale(self) -> int:
+        """
+        Return jobs abandoned by a crashed or stopped worker to the queue.
+
+        Returns:
+            Number of jobs requeued
+        """
+        # Our own jobs are known to be alive whatever their heartbeat says
+        return await self._store(
+            self.store.requeue_stale, time.time() - self.stale_after, exclude_worker=self.worker_id
+        )
+
+    async def _worker_loop(self):
+        """Claim pending jobs while slots are free; heartbeat running ones"""
+        last_heartbeat = 0.0
+        while True:
+            now = time.monotonic()
+            if now - last_heartbeat >= self.heartbeat_interval:
+                last_heartbeat = now
+                if self._running:
+                    await self._store(self.store.heartbeat, self.worker_id)
+                requeued = await self.requeue_stale()
+                if requeued:
+                    logger.info(f"Requeued {requeued} export job(s) of a stopped worker")
+                if self.abandon_after is not None:
+                    for job_id in await self._store(self.store.find_abandoned, time.time() - self.abandon_after):
+                        logger.info(f"Cancelling export {job_id}: client stopped polling")
+                        await self.cancel_job(job_id)
+
+            if self._running:
+                for job_id in await self._store(self.store.cancel_requests, self.worker_id):
+                    if job_id in self._running:
+                        self._cancel_running(job_id)
+
+            while len(self._running) < self.max_concurrent:
+                record = await self._store(self.store.claim, self.worker_id)
+                if record is None:
+                    break
+                self._start(ExportJob.from_record(record, self.max_log_lines), record["attempts"])
+
+            self._wakeup.clear()
+            await _wait_event(self._wakeup, self.poll_interval)
+
+    def _start(self, job: ExportJob, attempt: int = 1):
+        """Run a claimed job in the background"""
+        self.jobs[job.job_id] = job
+        if job.dedup_key:
+            self._dedup_index[job.dedup_key] = job.job_id
+
+        if attempt > 1:
+            # A previous worker died part way through; start over
+            job.progress = 0.0
+            job.eta = None
+            for output in job.outputs:
+                if output.status != "completed":
+                    output.status = "pending"
+                    output.progress = 0.0
+            job.add_log(f"Requeued after interrupted attempt (attempt {attempt})")
+
+        task = asyncio.create_task(self._run_job(job))
+        self._running[job.job_id] = task
+
+        def on_done(task: asyncio.Task):
+            self._running.pop(job.job_id, None)
+            if task.cancelled() and job.status == "cancelled" and job.finished_at is None:
+                # Cancelled before _run_job got to start
+                for output in job.outputs:
+                    output.status = "cancelled"
+                self._mark_finished(job)
+                self._persist(job)
+            if self._wakeup:
+                self._wakeup.set()
+
+        task.add_done_callback(on_done)
+
+    def _notify(self):
+        """Wake watchers: a job running in this process changed"""
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def _persist(self, job: ExportJob, force: bool = True):
+        """
+        Write a job's state to the store and notify watchers.
+
+        Forced writes (status changes) store the full state; unforced ones
+        (progress) only progress and ETA, at most once a second per job.
+        """
+        self._notify()
+        if force:
+            state = job.to_state()
+            if job.finished_at is not None:
+                state["graph"] = None
+            self._store_later(self.store.update, job.job_id, state)
+            return
+
+        now = time.monotonic()
+        if now - self._persisted_at.get(job.job_id, 0.0) < 1.0:
+            return
+        self._persisted_at[job.job_id] = now
+        self._store_later(self.store.update, job.job_id, {"progress": job.progress, "eta": job.eta})
+
+    def _mark_finished(self, job: ExportJob):
+        """Record that a job finished and release what it no longer needs"""
+        job.finished_at = time.time()
+        job.graph = None
+        self._finished[job.job_id] = job.finished_at
+        self._persisted_at.pop(job.job_id, None)
+
+    def _evict_expired(self):
+        """Drop finished jobs older than the TTL (oldest first)"""
+        cutoff = time.time() - self.job_ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff:
+                break
+            self._finished.popitem(last=False)
+            job = self.jobs.pop(job_id, None)
+            if job and self._dedup_index.get(job.dedup_key) == job_id:
+                del self._dedup_index[job.dedup_key]
+
+        # Pruning the store is an indexed delete; once a minute is plenty
+        now = time.time()
+        if now - self._store_pruned_at > 60:
+            self._store_pruned_at = now
+            self._store_later(self.store.delete_finished_before, now - self.store_ttl)
+
+    @staticmethod
+    def _dedup_key(graph: Graph, fps: int, outputs: list[tuple[str, str]]) -> str:
+        """Key identifying exports that would produce identical files"""
+        # The same outputs in another order are the same files
+        spec = ",".join(f"{f}:{q}" for f, q in sorted(outputs))
+        return f"{graph.render_hash()}|{fps}|{spec}"
+
+    async def _find_reusable(self, dedup_key: str) -> Optional[ExportJob]:
+        """Return an in-flight or completed job for this key, if usable"""
+        job = self.jobs.get(self._dedup_index.get(dedup_key, ""))
+        if job is None:
+            # Queued or running elsewhere, or completed before it was evicted
+            record = await self._store(self.store.find_latest, dedup_key)
+            if record is None:
+                return None
+            job = ExportJob.from_record(record, self.max_log_lines)
+        if job.status in ("pending", "running"):
+            # Not if it finished in the meantime (it is looked up again then)
+            if await self._store(self.store.add_requester, job.job_id):
+                return job
+            return await self._find_reusable(dedup_key)
+        if job.status == "completed" and all(
+            o.output_file and o.output_file.exists() for o in job.outputs
+        ):
+            return job
+        return None
 
     async def _run_job(self, job: ExportJob):
-        """Run export job"""
+        """Run export job: one render, then one encoder per output"""
         job.status = "running"
         job.add_log("Starting export...")
+        self._persist(job)
+
+        # The master render is the largest video output requested; GIF-only
+        # jobs render straight at GIF size
+        video_outputs = [o for o in job.outputs if o.format != "gif"]
+        if video_outputs:
+            master_quality = max(
+                (o.quality for o in video_outputs),
+                key=lambda q: export_resolution(q)[0] * export_resolution(q)[1],
+            )
+            master_resolution = None
+        else:
+            master_quality = job.quality
+            master_resolution = GIF_RESOLUTION
+
+        # Outputs that are the master render itself need no encoding
+        passthrough = [o for o in job.outputs if o.format == "mp4" and o.quality == master_quality]
+        encoded = [o for o in job.outputs if o not in passthrough]
+
+        # Encoding takes the remainder of the bar after rendering
+        render_share = 80.0 if encoded else 99.0
 
         try:
             # Render
             async def log_progress(msg: str):
                 job.add_log(msg)
+                self._notify()
 
-            output_file, _ = await self.renderer.render_export(
-                graph=job.graph,
-                quality=job.quality,
-                fps=job.fps,
-                progress_callback=log_progress
-            )
+            async def track_progress(progress: RenderProgress):
+                job.progress = progress.percent * render_share / 100
+                job.eta = progress.eta
+                self._persist(job, force=False)
 
-            if job.format == "gif":
-                # Convert MP4 to GIF using ffmpeg with palette for quality
-                job.add_log("Converting to GIF...")
-                gif_path = output_file.with_suffix('.gif')
-                process = await asyncio.create_subprocess_exec(
-                    'ffmpeg', '-y', '-i', str(output_file),
-                    '-filter_complex', f'fps={job.fps},scale=720:-1:flags=lanczos,split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse',
-                    '-loop', '0',
-                    str(gif_path),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+            try:
+                output_file, _ = await self.renderer.render_export(
+                    graph=job.graph,
+                    quality=master_quality,
+                    fps=job.fps,
+                    progress_callback=log_progress,
+                    progress_event_callback=track_progress,
+                    resolution=master_resolution,
+                    # Encoding can outlast the sweeper's idle limits
+                    keep_pinned=True,
                 )
-                stdout, stderr = await process.communicate()
-                if process.returncode != 0:
-                    raise Exception(f"GIF conversion failed: {stderr.decode()}")
-                final_path = self.storage.exports_dir / f"{job.job_id}.gif"
-                gif_path.rename(final_path)
-            else:
-                # Move MP4 to exports directory
-                final_path = self.storage.exports_dir / f"{job.job_id}.mp4"
-                output_file.rename(final_path)
-
-            job.output_file = final_path
+            finally:
+                job.graph = None
+            job.progress = render_share
+            job.eta = None
+
+            try:
+                if encoded:
+                    job.add_log(f"Encoding {', '.join(f'{o.format} {o.quality}' for o in encoded)}...")
+                    duration = await self._probe_duration(output_file)
+
+                    def update_job_progress():
+                        done = sum(o.progress for o in encoded) / len(encoded)
+                        job.progress = render_share + (100 - render_share) * done / 100
+                        self._persist(job, force=False)
+
+                    await asyncio.gather(*(
+                        self._encode_output(
+                            job, output, output_file, duration,
+                            prescaled=master_resolution is not None,
+                            on_progress=update_job_progress,
+                        )
+                        for output in encoded
+                    ))
+
+                # Encoders read the master, so hand it over last
+                for index, output in enumerate(passthrough):
+                    final_path = self._output_path(job, output)
+                    if index == len(passthrough) - 1:
+                        output_file.rename(final_path)
+                    else:
+                        shutil.copyfile(output_file, final_path)
+                    output.output_file = final_path
+                    output.status = "completed"
+                    output.progress = 100.0
+            finally:
+                self.renderer.unpin_render(output_file)
+                self.renderer.discard_render(output_file)
+
+            failed = [o for o in job.outputs if o.status != "completed"]
+            if failed:
+                raise Exception("; ".join(f"{o.format} {o.quality}: {o.error}" for o in failed))
+
+            job.output_file = job.outputs[0].output_file
             job.status = "completed"
             job.progress = 100.0
+            job.eta = None
             job.add_log("Export completed successfully")
 
+        except asyncio.CancelledError:
+            if job.status != "cancelled":
+                raise
+            # Cancelled by the user or as abandoned: leave nothing behind
+            for output in job.outputs:
+                self._output_path(job, output).unlink(missing_ok=True)
+                output.status = "cancelled"
+                output.output_file = None
         except Exception as e:
             job.status = "failed"
+            job.eta = None
             job.error = str(e)
             job.add_log(f"Export failed: {str(e)}")
+            for output in job.outputs:
+                if output.status != "completed":
+                    output.status = "failed"
+                    output.error = output.error or str(e)
+        finally:
+            # A job interrupted by worker shutdown stays claimed; it is
+            # released back to the queue by stop_worker
+            if job.status in FINISHED_STATUSES:
+                self._mark_finished(job)
+                self._persist(job)
+
+    def _output_path(self, job: ExportJob, output: ExportOutput) -> Path:
+        """Final path of an output in the exports directory"""
+        if len(job.outputs) == 1:
+            return self.storage.exports_dir / f"{job.job_id}.{output.format}"
+        return self.storage.exports_dir / f"{job.job_id}_{output.quality}.{output.format}"
+
+    async def _encode_output(
+        self,
+        job: ExportJob,
+        output: ExportOutput,
+        master: Path,
+        duration: Optional[float],
+        prescaled: bool,
+        on_progress: Callable[[], None],
+    ):
+        """
+        Encode one output from the master render with ffmpeg.
+
+        Failures are recorded on the output rather than raised, so the other
+        encoders keep running.
+        """
+        output.status = "encoding"
+        final_path = self._output_path(job, output)
+        width, height = export_resolution(output.quality)
+        # Fit into the output size and pad the rest, so outputs whose aspect
+        # ratio differs from the master are not stretched
+        scale_video = (
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease:flags=lanczos,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+        )
+
+        if output.format == "gif":
+            scale = "" if prescaled else f"scale={GIF_RESOLUTION[0]}:-1:flags=lanczos,"
+            codec_args = [
+                "-filter_complex", f"{scale}split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse",
+                "-loop", "0",
+            ]
+        elif output.format == "webm":
+            codec_args = [
+                "-vf", scale_video,
+                "-c:v", "libvpx-vp9", "-crf", "32", "-b:v", "0", "-row-mt", "1",
+                "-pix_fmt", "yuv420p",
+            ]
+        else:
+            codec_args = [
+                "-vf", scale_video,
+                "-c:v", "libx264", "-crf", "18", "-pix_fmt", "yuv420p",
+                "-movflags", "+faststart",
+            ]
+
+        def track(seconds: float):
+            if duration:
+                output.progress = min(seconds / duration * 100, 99.0)
+                on_progress()
+
+        try:
+            returncode, stderr_lines = await self._run_ffmpeg(
+                ["-i", str(master), *codec_args, str(final_path)], track
+            )
+            if returncode != 0:
+                raise Exception(f"{output.format} encoding failed: " + "\n".join(stderr_lines[-20:]))
+            output.output_file = final_path
+            output.status = "completed"
+            output.progress = 100.0
+            on_progress()
+        except Exception as e:
+            output.status = "failed"
+            output.error = str(e)
+            job.add_log(f"Encoding {output.format} {output.quality} failed: {str(e)}")
+
+    @staticmethod
+    async def _run_ffmpeg(args: list[str], on_time: Callable[[float], None]) -> tuple[int, list[str]]:
+        """
+        Run ffmpeg, reporting encoded seconds from its -progress output.
+
+        Returns:
+            Tuple of (return code, stderr lines)
+        """
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-y", "-nostats", "-progress", "pipe:1", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr_lines: list[str] = []
+
+        async def read_stderr():
+            async for line in _iter_lines(process.stderr):
+                stderr_lines.append(line)
+
+        stderr_task = asyncio.create_task(read_stderr())
+        try:
+            async for line in _iter_lines(process.stdout):
+                if line.startswith("out_time_us="):
+                    try:
+                        on_time(int(line.split("=", 1)[1]) / 1_000_000)
+                    except ValueError:
+                        pass  # "N/A" before the first frame
+            await stderr_task
+            await process.wait()
+        except BaseException:
+            stderr_task.cancel()
+            await _terminate(process)
+            raise
+        return process.returncode, stderr_lines
+
+    @staticmethod
+    async def _probe_duration(video: Path) -> Optional[float]:
+        """Duration of a video in seconds, or None if ffprobe fails"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "ffprobe", "-v", "error", "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1", str(video),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                stdout, _ = await process.communicate()
+            except asyncio.CancelledError:
+                await _terminate(process)
+                raise
+            return float(stdout.decode().strip())
+        except Exception:
+            return None
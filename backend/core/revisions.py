@@ -0,0 +1,186 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from .json_patch import apply_patch, make_patch
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    graph_id   TEXT NOT NULL,
+    revision   INTEGER NOT NULL,
+    kind       TEXT NOT NULL,
+    data       BLOB NOT NULL,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (graph_id, revision)
+);
+CREATE INDEX IF NOT EXISTS revisions_created ON revisions (graph_id, created_at);
+"""
+
+# Every this many revisions a full snapshot is stored instead of a delta,
+# bounding how many deltas a lookup has to replay
+SNAPSHOT_INTERVAL = 20
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _decode(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data))
+
+
+class RevisionStore:
+    """
+    SQLite-backed revision history of saved graphs.
+
+    Each save appends a revision holding a JSON Patch against the previous
+    one, so history grows with the size of the change rather than the
+    graph. Every SNAPSHOT_INTERVAL-th revision holds the full document, so
+    any revision is rebuilt from one snapshot and at most
+    SNAPSHOT_INTERVAL - 1 deltas.
+    """
+
+    def __init__(self, db_path: Path, keep_last: int = 100, keep_days: Optional[float] = 30):
+        """
+        Open (and create if needed) the revision database.
+
+        Args:
+            db_path: Path to the SQLite file
+            keep_last: Revisions always kept per graph
+            keep_days: Revisions beyond keep_last are kept for this many
+                days (None keeps only keep_last)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.keep_days = keep_days
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, graph_id: str, document: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> int:
+        """
+        Append a revision.
+
+        Args:
+            graph_id: Graph the revision belongs to
+            document: The graph as saved
+            previous: The graph as of the latest revision, or None if it
+                has no revisions yet
+
+        Returns:
+            The new revision number (the latest one if nothing changed)
+        """
+        with self._lock:
+            # Numbering must not race with another process saving this graph
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                latest = self.latest(graph_id)
+                revision = latest + 1
+                if previous is None or latest == 0 or revision % SNAPSHOT_INTERVAL == 1:
+                    kind, payload = "snapshot", document
+                else:
+                    kind, payload = "delta", make_patch(previous, document)
+                if payload:
+                    data = _encode(payload)
+                    self._conn.execute(
+                        "INSERT INTO revisions (graph_id, revision, kind, data, size, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (graph_id, revision, kind, data, len(data), time.time()),
+                    )
+                    self.prune(graph_id)
+                else:
+                    revision = latest
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return revision
+
+    def latest(self, graph_id: str) -> int:
+        """Latest revision number of a graph (0 if it has none)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(revision) FROM revisions WHERE graph_id = ?", (graph_id,)
+            ).fetchone()
+        return row[0] or 0
+
+    def list(self, graph_id: str) -> List[Dict[str, Any]]:
+        """Revisions of a graph, newest first (revision, kind, size, created_at)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT revision, kind, size, created_at FROM revisions "
+                "WHERE graph_id = ? ORDER BY revision DESC",
+                (graph_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, graph_id: str, revision: int) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild a graph as of a revision.
+
+        Returns:
+            The graph document, or None if the revision does not exist
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT revision, kind, data FROM revisions WHERE graph_id = ? AND revision <= ? "
+                "AND revision >= (SELECT MAX(revision) FROM revisions "
+                "WHERE graph_id = ? AND revision <= ? AND kind = 'snapshot') "
+                "ORDER BY revision",
+                (graph_id, revision, graph_id, revision),
+            ).fetchall()
+        if not rows or rows[-1]["revision"] != revision:
+            return None
+
+        document = _decode(rows[0]["data"])
+        for row in rows[1:]:
+            document = apply_patch(document, _decode(row["data"]), in_place=True)
+        return document
+
+    def prune(self, graph_id: str) -> int:
+        """
+        Drop revisions outside the retention policy.
+
+        The newest keep_last revisions are kept, and older ones for
+        keep_days. History is cut at a snapshot, so up to
+        SNAPSHOT_INTERVAL - 1 extra revisions survive until the next one.
+
+        Returns:
+            Number of revisions deleted
+        """
+        with self._lock:
+            cutoff = self.latest(graph_id) - self.keep_last + 1
+            if self.keep_days is not None:
+                row = self._conn.execute(
+                    "SELECT MIN(revision) FROM revisions WHERE graph_id = ? AND created_at >= ?",
+                    (graph_id, time.time() - self.keep_days * 86400),
+                ).fetchone()
+                if row[0] is not None:
+                    cutoff = min(cutoff, row[0])
+            cursor = self._conn.execute(
+                "DELETE FROM revisions WHERE graph_id = ? AND revision < ("
+                "SELECT MAX(revision) FROM revisions "
+                "WHERE graph_id = ? AND revision <= ? AND kind = 'snapshot')",
+                (graph_id, graph_id, cutoff),
+            )
+        return cursor.rowcount
+
+    def delete(self, graph_id: str):
+        """Delete every revision of a graph"""
+        with self._lock:
+            self._conn.execute("DELETE FROM revisions WHERE graph_id = ?", (graph_id,))
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
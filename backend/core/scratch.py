@@ -0,0 +1,158 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger("manim_nodes")
+
+# Prefix of the directory a ScratchSpace owns under its root
+SCRATCH_DIR_PREFIX = "manim_nodes_"
+
+
+class ScratchSpace:
+    """
+    Working directories for short-lived renders on a fast filesystem.
+
+    Meant for a RAM-backed directory such as /dev/shm: previews write many
+    small partial movie files and SVGs that are read back once and then
+    deleted, which costs little in memory but can be slow on network or
+    slow local disks.
+
+    Memory is capped by measuring what the directories in use actually
+    take up. A directory is only handed out while that leaves
+    reserve_bytes of the quota free and the filesystem itself has that
+    much room; otherwise acquire() returns None and the caller renders on
+    disk instead. Renders in progress poll over_quota() and, when the
+    total has gone over quota_bytes, the one taking up the most stops so
+    it can be started over on disk. All directories live in one private
+    directory under root, which close() removes.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        quota_bytes: int = 512 * 1024 ** 2,
+        reserve_bytes: int = 64 * 1024 ** 2,
+        check_interval: float = 0.5,
+    ):
+        """
+        Args:
+            root: Directory on the fast filesystem (e.g. /dev/shm)
+            quota_bytes: Memory the directories may take up at most
+            reserve_bytes: Room that must be left for a new directory to be
+                handed out
+            check_interval: Seconds between usage checks of a render in progress
+        """
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+        self.reserve_bytes = reserve_bytes
+        self.check_interval = check_interval
+        self._in_use: Set[Path] = set()
+        self._lock = threading.Lock()
+        # Metrics
+        self.acquired = 0
+        self.refused = 0
+        self.over_quota_aborts = 0
+        try:
+            self.directory: Optional[Path] = Path(tempfile.mkdtemp(prefix=SCRATCH_DIR_PREFIX, dir=self.root))
+        except OSError as e:
+            logger.warning(f"Scratch space {self.root} is not usable, rendering on disk: {e}")
+            self.directory = None
+
+    def acquire(self, prefix: str = "") -> Optional[Path]:
+        """
+        Create a working directory, if there is room for one.
+
+        Returns:
+            The new directory, or None if the scratch space is full or not
+            usable
+        """
+        if self.directory is None:
+            return None
+        with self._lock:
+            used = sum(self._usage().values())
+            if used + self.reserve_bytes > self.quota_bytes or not self._has_room():
+                self.refused += 1
+                return None
+            try:
+                path = Path(tempfile.mkdtemp(prefix=prefix, dir=self.directory))
+            except OSError as e:
+                logger.warning(f"Could not create a scratch directory: {e}")
+                self.refused += 1
+                return None
+            self._in_use.add(path)
+            self.acquired += 1
+            return path
+
+    def release(self, path: Path):
+        """Delete a directory from acquire()"""
+        shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self._in_use.discard(Path(path))
+
+    def over_quota(self, path: Path) -> bool:
+        """
+        Whether the render in a directory must stop to bring the scratch
+        space back under its quota.
+
+        Only the directory taking up the most is picked, so one render at
+        a time makes room.
+        """
+        with self._lock:
+            usage = self._usage()
+            if not usage or sum(usage.values()) <= self.quota_bytes:
+                return False
+            if max(usage, key=usage.get) != Path(path):
+                return False
+            self.over_quota_aborts += 1
+        logger.warning(
+            f"Scratch space is over its {self.quota_bytes >> 20} MiB quota, "
+            f"moving the render in {path} to disk"
+        )
+        return True
+
+    def close(self):
+        """Delete every directory in the scratch space"""
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        with self._lock:
+            self._in_use.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Usage metrics"""
+        with self._lock:
+            return {
+                "directory": str(self.directory) if self.directory is not None else None,
+                "in_use": len(self._in_use),
+                "used_bytes": sum(self._usage().values()),
+                "quota_bytes": self.quota_bytes,
+                "acquired": self.acquired,
+                "refused": self.refused,
+                "over_quota_aborts": self.over_quota_aborts,
+            }
+
+    def _usage(self) -> Dict[Path, int]:
+        """Memory taken up by each directory in use (call with the lock held)"""
+        return {path: _disk_usage(path) for path in self._in_use}
+
+    def _has_room(self) -> bool:
+        """Whether the filesystem has room for another directory"""
+        try:
+            return shutil.disk_usage(self.directory).free >= self.reserve_bytes
+        except OSError:
+            return False
+
+
+def _disk_usage(directory: Path) -> int:
+    """Bytes allocated to the files under a directory, like du"""
+    total = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+            except OSError:
+                pass  # Deleted while walking
+    return total
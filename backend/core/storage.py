@@ -1,38 +1,130 @@
+import gzip
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Optional
-from ..models.graph import Graph
+from datetime import datetime
+from typing import Iterator, Optional, Union
+from ..models.graph import Graph, GraphDiff, document_render_hash
+from .graph_cache import GraphCache, file_version
+from .graph_index import GraphIndex
+from .graph_patch import apply_diff, build_graph
+from .json_patch import apply_patch
+from .revisions import RevisionStore
+
+try:
+    import orjson
+except ImportError:  # optional; parses large graphs about 1.5x faster
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; saves are then only serialized within a process
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:  # optional; zstd compression is unavailable without it
+    zstandard = None
+
+_json_loads = orjson.loads if orjson else json.loads
+
+# Project file suffix of each compression (None stores plain JSON)
+GRAPH_SUFFIXES = {
+    None: ".json",
+    "gzip": ".json.gz",
+    "zstd": ".json.zst",
+}
+
+# Graphs smaller than this are stored uncompressed even when compression
+# is enabled; compressing them saves little and costs latency
+COMPRESS_MIN_BYTES = 64 * 1024
+
+
+def _compress(data: bytes, compression: Optional[str]) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _decompress(data: bytes, suffix: str) -> bytes:
+    if suffix == GRAPH_SUFFIXES["gzip"]:
+        return gzip.decompress(data)
+    if suffix == GRAPH_SUFFIXES["zstd"]:
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed graphs needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class VersionConflictError(Exception):
+    """Raised when a graph was saved since the version a change is based on"""
 
 
 class StorageManager:
     """Manages file storage for graphs and generated files"""
 
-    def __init__(self, base_dir: str = None):
+    def __init__(self, base_dir: str = None, compression: Optional[str] = None, cache_size: int = 128):
         """
         Initialize storage manager.
 
         Args:
             base_dir: Base directory for storage (default: ~/manim-nodes)
+            compression: Compress large saved graphs with "gzip" or "zstd"
+                (None stores plain JSON). Graphs are read whatever the setting.
+            cache_size: Loaded graphs kept in memory (0 disables the cache)
+
+        Raises:
+            ValueError if the compression is unknown or unavailable
         """
         if base_dir is None:
             base_dir = os.path.expanduser("~/manim-nodes")
+        if compression not in GRAPH_SUFFIXES:
+            raise ValueError(f"Unknown graph compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd graph compression needs the zstandard package")
+        self.compression = compression
 
         self.base_dir = Path(base_dir)
         self.projects_dir = self.base_dir / "projects"
         self.exports_dir = self.base_dir / "exports"
         self.temp_dir = self.base_dir / "temp"
+        self.thumbnails_dir = self.base_dir / "thumbnails"
+        self.node_thumbnails_dir = self.thumbnails_dir / "nodes"
+        self.locks_dir = self.base_dir / "locks"
 
         # Create directories if they don't exist
         self.projects_dir.mkdir(parents=True, exist_ok=True)
         self.exports_dir.mkdir(parents=True, exist_ok=True)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbnails_dir.mkdir(parents=True, exist_ok=True)
+        self.node_thumbnails_dir.mkdir(parents=True, exist_ok=True)
+        self.locks_dir.mkdir(parents=True, exist_ok=True)
+
+        # Metadata of saved graphs, so listing never opens project files
+        self.index = GraphIndex(self.base_dir / "graph_index.db")
+        if self.index.created:
+            self.rebuild_index()
+        # Every saved version of every graph, as deltas
+        self.revisions = RevisionStore(self.base_dir / "graph_revisions.db")
+        # Serializes this process's writers; _graph_lock adds other processes
+        self._lock = threading.RLock()
+        # Graphs whose lock file this manager holds (see _graph_lock)
+        self._locked_graphs: set[str] = set()
+        # Parsed graphs, so repeated loads skip reading and validating
+        self.graph_cache = GraphCache(cache_size)
 
     def save_graph(self, graph: Graph) -> str:
         """
         Save graph to disk.
 
+        The file is written next to the old one and renamed over it, so a
+        crash mid-save never leaves a truncated project behind.
+
         Args:
             graph: Graph object to save
 
@@ -41,16 +133,148 @@ class StorageManager:
         """
         self._validate_path(graph.id)
 
-        file_path = self.projects_dir / f"{graph.id}.json"
+        with self._graph_lock(graph.id):
+            # The content being replaced is the latest revision's
+            previous = self._previous_document(graph.id)
+            file_path, _ = self._write_graph(graph, previous)
+        return str(file_path)
 
-        with open(file_path, "w") as f:
-            json.dump(graph.model_dump(), f, indent=2)
+    def patch_graph(
+        self,
+        graph_id: str,
+        change: Union[GraphDiff, list],
+        expected_version: Optional[int] = None,
+    ) -> Optional[tuple[Graph, int]]:
+        """
+        Apply a partial update to a saved graph.
 
-        return str(file_path)
+        Only the nodes and edges the change touches are validated again.
+
+        Args:
+            graph_id: ID of graph to update
+            change: Node/edge-level diff, or a JSON Patch (list of operations)
+                against the graph document
+            expected_version: Version the change is based on (None to apply
+                it whatever the current version)
+
+        Returns:
+            Tuple of (updated graph, its new version), or None if not found
+
+        Raises:
+            VersionConflictError if the graph's version is not expected_version
+            ValueError if the change does not apply or makes the graph invalid
+        """
+        self._validate_path(graph_id)
+
+        with self._graph_lock(graph_id):
+            previous = self._previous_document(graph_id)
+            if previous is None:
+                return None
+            version = self.graph_version(graph_id)
+            if expected_version is not None and expected_version != version:
+                raise VersionConflictError(
+                    f"Graph {graph_id} is at version {version}, not {expected_version}"
+                )
+
+            if isinstance(change, GraphDiff):
+                document = apply_diff(previous, change)
+            else:
+                document = apply_patch(previous, change)
+            graph = build_graph(document, previous)
+            _, version = self._write_graph(graph, previous)
+        return graph, version
+
+    def graph_version(self, graph_id: str) -> int:
+        """
+        Version of a saved graph: its latest revision number.
+
+        Returns:
+            Version number (0 for graphs saved before revisions were kept)
+        """
+        self._validate_path(graph_id)
+        return self.revisions.latest(graph_id)
+
+    @contextmanager
+    def _graph_lock(self, graph_id: str) -> Iterator[None]:
+        """
+        Hold a graph's write lock.
+
+        Checking the version, reading the document being replaced, writing
+        the new one and recording the revision must not interleave with
+        another writer, including API workers and scripts in other
+        processes sharing the storage directory, so the lock is an flock()
+        on a per-graph lock file where available.
+        """
+        with self._lock:
+            # flock() is per open file, so a nested call must not take it again
+            if fcntl is None or graph_id in self._locked_graphs:
+                yield
+                return
+            with open(self.locks_dir / f"{graph_id}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._locked_graphs.add(graph_id)
+                try:
+                    yield
+                finally:
+                    self._locked_graphs.discard(graph_id)
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_graph(self, graph: Graph, previous: Optional[dict]) -> tuple[Path, int]:
+        """
+        Write a graph's project file and record it as a revision.
+
+        Must be called holding the graph's lock (see _graph_lock).
+
+        Args:
+            graph: Graph object to save
+            previous: Document being replaced (None for a new graph)
+
+        Returns:
+            Tuple of (path to saved file, new revision number)
+        """
+        data = graph.model_dump_json().encode()
+        compression = self.compression if len(data) >= COMPRESS_MIN_BYTES else None
+        file_path = self.projects_dir / f"{graph.id}{GRAPH_SUFFIXES[compression]}"
+
+        fd, temp_name = tempfile.mkstemp(dir=self.projects_dir, prefix=f".{graph.id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # mkstemp creates the file private to the owner
+                os.fchmod(f.fileno(), 0o644)
+                f.write(_compress(data, compression))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_name, file_path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+        # A previous save may have used another compression
+        for other in self._graph_files(graph.id):
+            if other != file_path:
+                other.unlink(missing_ok=True)
+        version = file_version(file_path)
+        self.graph_cache.put(graph.id, file_path, version, graph)
+        self.index.upsert(graph.id, graph.name, version[1] / 1e9)
+
+        if previous is not None and self.revisions.latest(graph.id) == 0:
+            # Saved before revisions were kept; history starts with it
+            self.revisions.record(graph.id, previous, None)
+        document = graph.model_dump(mode="json")
+        revision = self.revisions.record(graph.id, document, previous)
+
+        # A thumbnail showing what no longer renders is dropped until re-rendered
+        if previous is None or document_render_hash(previous) != document_render_hash(document):
+            self.get_thumbnail_path(graph.id).unlink(missing_ok=True)
+
+        return file_path, revision
 
     def load_graph(self, graph_id: str) -> Optional[Graph]:
         """
-        Load graph from disk.
+        Load graph from disk, or from the cache if its file is unchanged.
+
+        The returned graph may be shared with other callers; copy it
+        before modifying it.
 
         Args:
             graph_id: ID of graph to load
@@ -60,15 +284,61 @@ class StorageManager:
         """
         self._validate_path(graph_id)
 
-        file_path = self.projects_dir / f"{graph_id}.json"
+        graph = self.graph_cache.get(graph_id)
+        if graph is not None:
+            return graph
 
-        if not file_path.exists():
+        files = self._graph_files(graph_id)
+        if not files:
+            return None
+        file_path = files[0]
+        try:
+            # Taken before reading: a save during the read is a miss next time
+            version = file_version(file_path)
+        except FileNotFoundError:
             return None
 
-        with open(file_path, "r") as f:
-            data = json.load(f)
+        # Parsing first and validating the objects beats model_validate_json
+        # on graphs with large embedded data (kept as plain Python values)
+        graph = Graph.model_validate(self._read_file(graph_id, file_path))
+        self.graph_cache.put(graph_id, file_path, version, graph)
+        return graph
 
-        return Graph(**data)
+    def list_revisions(self, graph_id: str) -> list[dict]:
+        """
+        List the saved revisions of a graph, newest first.
+
+        Returns:
+            List of revision metadata (revision, kind, size, created_at)
+        """
+        self._validate_path(graph_id)
+        return [
+            {**entry, "created_at": datetime.fromtimestamp(entry["created_at"]).isoformat()}
+            for entry in self.revisions.list(graph_id)
+        ]
+
+    def load_revision(self, graph_id: str, revision: int) -> Optional[Graph]:
+        """
+        Load a graph as it was saved in a revision.
+
+        Returns:
+            Graph object or None if the revision does not exist
+        """
+        self._validate_path(graph_id)
+        document = self.revisions.get(graph_id, revision)
+        return Graph.model_validate(document) if document is not None else None
+
+    def restore_revision(self, graph_id: str, revision: int) -> Optional[Graph]:
+        """
+        Save an old revision of a graph as its newest one.
+
+        Returns:
+            The restored graph, or None if the revision does not exist
+        """
+        graph = self.load_revision(graph_id, revision)
+        if graph is not None:
+            self.save_graph(graph)
+        return graph
 
     def delete_graph(self, graph_id: str) -> bool:
         """
@@ -82,37 +352,134 @@ class StorageManager:
         """
         self._validate_path(graph_id)
 
-        file_path = self.projects_dir / f"{graph_id}.json"
-
-        if file_path.exists():
-            file_path.unlink()
-            return True
+        with self._graph_lock(graph_id):
+            files = self._graph_files(graph_id)
+            if files:
+                for file_path in files:
+                    file_path.unlink(missing_ok=True)
+                self.graph_cache.discard(graph_id)
+                self.index.remove(graph_id)
+                self.revisions.delete(graph_id)
+                thumbnail_path = self.get_thumbnail_path(graph_id)
+                if thumbnail_path.exists():
+                    thumbnail_path.unlink()
+                return True
 
         return False
 
-    def list_graphs(self) -> list[dict]:
+    def list_graphs(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: str = "modified",
+        descending: bool = True,
+        search: Optional[str] = None,
+    ) -> list[dict]:
         """
-        List all saved graphs.
+        List saved graphs from the metadata index.
+
+        Args:
+            offset: Number of graphs to skip
+            limit: Maximum number of graphs (None for all)
+            sort: "modified" or "name"
+            descending: Sort direction
+            search: Only graphs whose name contains this text
 
         Returns:
-            List of graph metadata (id, name, modified_time)
+            List of graph metadata (id, name, modified_time, thumbnail_url)
         """
-        graphs = []
+        entries = self.index.list(offset, limit, sort, descending, search)
+        # Thumbnail mtime versions the URL so browsers never show a stale image
+        if len(entries) > 100:
+            # One directory scan is cheaper than a stat per graph
+            versions = {
+                entry.name[:-4]: entry.stat().st_mtime_ns
+                for entry in os.scandir(self.thumbnails_dir)
+                if entry.name.endswith(".png")
+            }
+        else:
+            versions = {}
+            for entry in entries:
+                try:
+                    versions[entry["id"]] = self.get_thumbnail_path(entry["id"]).stat().st_mtime_ns
+                except (OSError, ValueError):
+                    pass
+
+        return [
+            {
+                "id": entry["id"],
+                "name": entry["name"],
+                "modified": datetime.fromtimestamp(entry["modified"]).isoformat(),
+                "thumbnail_url": (
+                    f"/api/graphs/{entry['id']}/thumbnail?v={versions[entry['id']]}"
+                    if entry["id"] in versions else None
+                ),
+            }
+            for entry in entries
+        ]
+
+    def count_graphs(self, search: Optional[str] = None) -> int:
+        """Number of saved graphs, optionally only those whose name matches"""
+        return self.index.count(search)
+
+    def rebuild_index(self) -> int:
+        """
+        Re-read every project file into the metadata index.
+
+        Needed only when project files were added, changed or removed
+        outside this application.
 
-        for file_path in self.projects_dir.glob("*.json"):
+        Returns:
+            Number of graphs indexed
+        """
+        entries = {}
+        for file_path in self.projects_dir.iterdir():
+            suffix = next(
+                (sfx for sfx in GRAPH_SUFFIXES.values() if file_path.name.endswith(sfx)), None
+            )
+            if suffix is None or file_path.name.startswith("."):
+                continue
             try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                    graphs.append({
-                        "id": data.get("id"),
-                        "name": data.get("name"),
-                        "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
-                    })
+                data = _json_loads(_decompress(file_path.read_bytes(), suffix))
+                entries[data["id"]] = (data["id"], data.get("name"), file_path.stat().st_mtime)
             except Exception:
                 # Skip invalid files
                 continue
+        self.index.replace_all(entries.values())
+        return len(entries)
+
+    def _previous_document(self, graph_id: str) -> Optional[dict]:
+        """
+        The saved document of a graph about to be replaced.
+
+        Taken from the cache when the project file has not changed since
+        the graph was cached (the usual case: the editor loaded or saved
+        it), so a save does not read and parse the file again just to
+        diff against it. Must be called holding the graph's lock.
+        """
+        graph = self.graph_cache.get(graph_id, count=False)
+        if graph is not None:
+            return graph.model_dump(mode="json")
+        return self._read_document(graph_id)
+
+    def _read_document(self, graph_id: str) -> Optional[dict]:
+        """Parse a saved graph's project file without validating it"""
+        files = self._graph_files(graph_id)
+        if not files:
+            return None
+        return self._read_file(graph_id, files[0])
 
-        return sorted(graphs, key=lambda x: x["modified"], reverse=True)
+    @staticmethod
+    def _read_file(graph_id: str, file_path: Path) -> dict:
+        """Parse a project file, whatever its compression"""
+        return _json_loads(_decompress(file_path.read_bytes(), file_path.name[len(graph_id):]))
+
+    def _graph_files(self, graph_id: str) -> list[Path]:
+        """Existing project files of a graph (normally at most one)"""
+        return [
+            path for path in (self.projects_dir / f"{graph_id}{sfx}" for sfx in GRAPH_SUFFIXES.values())
+            if path.exists()
+        ]
 
     def get_temp_path(self, filename: str) -> Path:
         """Get path for temporary file"""
@@ -124,23 +491,15 @@ class StorageManager:
         self._validate_path(filename)
         return self.exports_dir / filename
 
-    def cleanup_old_temp_files(self, hours: int = 1):
-        """
-        Delete temporary files older than specified hours.
+    def get_thumbnail_path(self, graph_id: str) -> Path:
+        """Get path for a graph's thumbnail image"""
+        self._validate_path(graph_id)
+        return self.thumbnails_dir / f"{graph_id}.png"
 
-        Args:
-            hours: Age threshold in hours
-        """
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-
-        for file_path in self.temp_dir.iterdir():
-            if file_path.is_file():
-                modified_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                if modified_time < cutoff_time:
-                    try:
-                        file_path.unlink()
-                    except Exception:
-                        pass  # Ignore errors during cleanup
+    def get_node_thumbnail_path(self, key: str) -> Path:
+        """Get path for a cached node thumbnail image"""
+        self._validate_path(key)
+        return self.node_thumbnails_dir / f"{key}.png"
 
     def _validate_path(self, path_component: str):
         """
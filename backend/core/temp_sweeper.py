@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import os
+import shutil
+import stat
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("manim_nodes")
+
+
+class TempSweeper:
+    """
+    Background garbage collector for the temp directory.
+
+    Temp content is handled in units: one manim output tree
+    (temp/media/<kind>/<script>, or one file of the shared Tex and text
+    caches), or one other top-level entry of temp. Each sweep removes
+    units not used for max_age. If the directory is still over quota, it
+    then removes the least recently used units until it is back under.
+    A unit's last use is the newest mtime of anything in it.
+
+    Units pinned by a live session (the preview a client is showing) are
+    never removed. Neither is anything used within min_age, which covers
+    renders in progress. Each sweep touches the pinned units, so processes
+    sharing the directory see them as recently used.
+    """
+
+    def __init__(
+        self,
+        temp_dir: Path,
+        quota_bytes: Optional[int] = 2 * 1024 ** 3,
+        max_age: float = 3600,
+        min_age: Optional[float] = None,
+        interval: float = 300,
+    ):
+        """
+        Args:
+            temp_dir: Directory to sweep
+            quota_bytes: Size the directory is kept under (None for no quota)
+            max_age: Seconds after their last use units are removed
+            min_age: Seconds after their last use units may be removed to
+                meet the quota (default twice the interval, so units pinned
+                by other processes are touched in time)
+            interval: Seconds between sweeps
+        """
+        self.temp_dir = Path(temp_dir)
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+        self.min_age = min_age if min_age is not None else 2 * interval
+        self.interval = interval
+        self._pins: Counter[Path] = Counter()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Metrics
+        self.sweeps = 0
+        self.units_removed = 0
+        self.bytes_reclaimed = 0
+        self.bytes_used: Optional[int] = None
+        self.last_sweep: Optional[float] = None
+
+    def pin(self, path: Path):
+        """Keep the unit holding a path until it is unpinned as often"""
+        unit = self._unit_of(path)
+        if unit is not None:
+            with self._lock:
+                self._pins[unit] += 1
+
+    def unpin(self, path: Path):
+        """Release a pin taken with pin()"""
+        unit = self._unit_of(path)
+        with self._lock:
+            if unit is not None and self._pins[unit] > 0:
+                self._pins[unit] -= 1
+                if not self._pins[unit]:
+                    del self._pins[unit]
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Remove expired units, then least recently used ones over quota.
+
+        Returns:
+            Dict with units removed, bytes reclaimed and bytes still used
+        """
+        now = time.time()
+        with self._lock:
+            pinned = set(self._pins)
+        for unit in pinned:
+            try:
+                os.utime(unit)
+            except OSError:
+                pass
+
+        units = []
+        total = 0
+        for unit in self._units():
+            size, last_used = self._measure(unit)
+            total += size
+            if unit not in pinned:
+                units.append((last_used, size, unit))
+
+        removed = reclaimed = 0
+        # Oldest first: everything past max_age, then LRU while over quota
+        for last_used, size, unit in sorted(units, key=lambda u: u[0]):
+            age = now - last_used
+            over_quota = self.quota_bytes is not None and total > self.quota_bytes
+            if age < self.max_age and not (over_quota and age >= self.min_age):
+                break
+            if self._remove(unit):
+                removed += 1
+                reclaimed += size
+                total -= size
+
+        if self.quota_bytes is not None and total > self.quota_bytes:
+            logger.warning(
+                f"Temp directory uses {total >> 20} MiB, over its {self.quota_bytes >> 20} MiB quota, "
+                "with nothing left that may be removed"
+            )
+
+        with self._lock:
+            self.sweeps += 1
+            self.units_removed += removed
+            self.bytes_reclaimed += reclaimed
+            self.bytes_used = total
+            self.last_sweep = now
+        if removed:
+            logger.info(f"Temp sweep removed {removed} item(s), reclaiming {reclaimed >> 20} MiB")
+        return {"removed": removed, "bytes_reclaimed": reclaimed, "bytes_used": total}
+
+    def start(self):
+        """Sweep now and every interval (needs a running event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sweeping"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Sweep metrics"""
+        with self._lock:
+            return {
+                "sweeps": self.sweeps,
+                "units_removed": self.units_removed,
+                "bytes_reclaimed": self.bytes_reclaimed,
+                "bytes_used": self.bytes_used,
+                "quota_bytes": self.quota_bytes,
+                "pinned": len(self._pins),
+                "last_sweep": self.last_sweep,
+            }
+
+    async def _run(self):
+        while True:
+            try:
+                # Walking a large tree must not stall the event loop
+                await asyncio.to_thread(self.sweep)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Temp sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _units(self) -> List[Path]:
+        """Every unit currently in the temp directory"""
+        units = []
+        for entry in self._children(self.temp_dir):
+            if entry.name != "media" or not entry.is_dir():
+                units.append(entry)
+                continue
+            for kind in self._children(entry):
+                units.extend(self._children(kind) if kind.is_dir() else [kind])
+        return units
+
+    def _unit_of(self, path: Path) -> Optional[Path]:
+        """The unit a path belongs to (None if it is not in the temp directory)"""
+        try:
+            parts = Path(path).relative_to(self.temp_dir).parts
+        except ValueError:
+            return None
+        if not parts:
+            return None
+        if parts[0] == "media" and len(parts) >= 3:
+            return self.temp_dir.joinpath(*parts[:3])
+        return self.temp_dir / parts[0]
+
+    @staticmethod
+    def _children(directory: Path) -> List[Path]:
+        try:
+            return list(directory.iterdir())
+        except OSError:
+            return []
+
+    @staticmethod
+    def _measure(unit: Path) -> tuple[int, float]:
+        """Total size and newest mtime of a file or directory tree"""
+        try:
+            stat_result = unit.lstat()
+        except OSError:
+            return 0, time.time()
+        if not unit.is_dir() or unit.is_symlink():
+            return stat_result.st_size, stat_result.st_mtime
+
+        size, last_used = 0, stat_result.st_mtime
+        for root, dirs, files in os.walk(unit):
+            for name in dirs + files:
+                try:
+                    entry = os.lstat(os.path.join(root, name))
+                except OSError:
+                    continue
+                if not stat.S_ISDIR(entry.st_mode):
+                    size += entry.st_size
+                last_used = max(last_used, entry.st_mtime)
+        return size, last_used
+
+    @staticmethod
+    def _remove(unit: Path) -> bool:
+        try:
+            if unit.is_dir() and not unit.is_symlink():
+                shutil.rmtree(unit)
+            else:
+                unit.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"Could not remove {unit}: {e}")
+            return False
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from .code_generator import CodeGenerator
+from .renderer import Renderer, RenderError
+from .storage import StorageManager
+from ..models.graph import Graph
+from ..models.node import NodeData
+from ..nodes import NODE_REGISTRY
+
+logger = logging.getLogger("manim_nodes")
+
+
+class NodeThumbnailService:
+    """Renders and caches small PNG previews of single nodes"""
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        renderer: Renderer,
+        resolution: tuple[int, int] = (160, 90),
+        max_batch_size: int = 64,
+        niceness: int = 10,
+    ):
+        """
+        Initialize thumbnail service.
+
+        Args:
+            storage: Storage manager holding the thumbnail cache
+            renderer: Shared renderer; thumbnails yield to its interactive renders
+            resolution: Thumbnail size in pixels
+            max_batch_size: Maximum number of nodes per batch request
+            niceness: CPU niceness increment for thumbnail manim processes
+        """
+        self.storage = storage
+        self.renderer = renderer
+        self.resolution = resolution
+        self.max_batch_size = max_batch_size
+        self.niceness = niceness
+        # Only one thumbnail batch renders at a time
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def cache_key(node_type: str, data: Dict[str, Any]) -> str:
+        """Cache key for a node: its type plus a hash of its data"""
+        payload = json.dumps(data, sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        return f"{node_type}-{digest}"
+
+    def get_cached(self, key: str) -> Optional[Path]:
+        """Return the cached thumbnail for a key, if present"""
+        path = self.storage.get_node_thumbnail_path(key)
+        return path if path.exists() else None
+
+    async def get_thumbnails(self, nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get thumbnails for a batch of nodes, rendering any that are not cached.
+
+        Args:
+            nodes: List of {"type": ..., "data": {...}} dicts
+
+        Returns:
+            One entry per input node with "type", "key" and either "url" or "error"
+
+        Raises:
+            ValueError if the batch is larger than max_batch_size
+        """
+        if len(nodes) > self.max_batch_size:
+            raise ValueError(f"At most {self.max_batch_size} nodes per batch")
+
+        results: List[Dict[str, Any]] = []
+        pending: Dict[str, tuple[str, Dict[str, Any]]] = {}
+
+        for node in nodes:
+            node_type = node.get("type", "")
+            data = node.get("data") or {}
+            entry: Dict[str, Any] = {"type": node_type}
+            results.append(entry)
+
+            if not self._is_thumbnailable(node_type):
+                entry["error"] = "Node type has no visual output"
+                continue
+
+            key = self.cache_key(node_type, data)
+            entry["key"] = key
+            if self.get_cached(key) is None:
+                pending[key] = (node_type, data)
+
+        if pending:
+            failed = await self._render(pending)
+            for entry in results:
+                if entry.get("key") in failed:
+                    entry["error"] = failed[entry["key"]]
+
+        for entry in results:
+            if "key" in entry and "error" not in entry:
+                entry["url"] = f"/api/nodes/thumbnails/{entry['key']}.png"
+
+        return results
+
+    async def _render(self, pending: Dict[str, tuple[str, Dict[str, Any]]]) -> Dict[str, str]:
+        """
+        Render uncached thumbnails in one manim process.
+
+        Returns:
+            Dict mapping key to error message for thumbnails that failed
+        """
+        async with self._lock:
+            # Never compete with previews: start only once they have drained
+            await self.renderer.wait_until_idle()
+
+            # Another batch may have rendered some of these while we waited
+            pending = {k: v for k, v in pending.items() if self.get_cached(k) is None}
+            if not pending:
+                return {}
+
+            failed: Dict[str, str] = {}
+            modules: List[str] = []
+            scene_keys: Dict[str, str] = {}
+
+            for key, (node_type, data) in pending.items():
+                scene_name = "Thumb_" + key.replace("-", "_")
+                try:
+                    code = self._generate_node_code(node_type, data)
+                except Exception as e:
+                    failed[key] = f"Code generation failed: {str(e)}"
+                    continue
+                modules.append(code.replace("class GeneratedScene(", f"class {scene_name}(", 1))
+                scene_keys[scene_name] = key
+
+            if not scene_keys:
+                return failed
+
+            try:
+                images = await self.renderer.render_scene_stills(
+                    "\n\n".join(modules),
+                    list(scene_keys),
+                    resolution=self.resolution,
+                    niceness=self.niceness,
+                )
+            except RenderError as e:
+                logger.warning(f"Node thumbnail batch failed: {e}")
+                images = {}
+
+            for scene_name, key in scene_keys.items():
+                image = images.get(scene_name)
+                if image is None:
+                    failed[key] = "Thumbnail render failed"
+                    continue
+                image.replace(self.storage.get_node_thumbnail_path(key))
+            if images:
+                # The whole batch was rendered in one render directory
+                self.renderer.discard_render(next(iter(images.values())))
+
+            return failed
+
+    @staticmethod
+    def _is_thumbnailable(node_type: str) -> bool:
+        """Only nodes that create a mobject have something to draw"""
+        node_class = NODE_REGISTRY.get(node_type)
+        if node_class is None:
+            return False
+        try:
+            instance = node_class()
+            return "Mobject" in instance.get_outputs().values() and not any(
+                port in instance.get_inputs() for port in ("mobject", "source")
+            )
+        except Exception:
+            return False
+
+    @staticmethod
+    def _generate_node_code(node_type: str, data: Dict[str, Any]) -> str:
+        """Generate the scene for a graph containing just this node"""
+        graph = Graph(
+            id="thumbnail",
+            name="Thumbnail",
+            nodes=[NodeData(id="node", type=node_type, position={"x": 0, "y": 0}, data=data)],
+        )
+        code = CodeGenerator(graph).generate()
+        # A lone shape is built but never presented, so add everything the
+        # scene constructed; construct() is the last method in the module.
+        return code.rstrip() + (
+            "\n        self.add(*[v for v in list(locals().values()) if isinstance(v, Mobject)])\n"
+        )
+
+
+class GraphThumbnailRefresher:
+    """
+    Re-renders the thumbnails of saved graphs in the background.
+
+    Saving only marks a graph as due, so any number of saves before its
+    turn come down to one render of the graph as saved by then. A single
+    worker renders one graph at a time, after interactive renders have
+    drained and at low CPU priority. Graphs whose thumbnail is present are
+    skipped: saving drops the thumbnail only when what renders changed.
+    """
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        renderer: Renderer,
+        resolution: tuple[int, int] = (480, 270),
+        niceness: int = 10,
+    ):
+        """
+        Args:
+            storage: Storage manager holding the graphs and their thumbnails
+            renderer: Shared renderer; refreshes yield to its interactive renders
+            resolution: Thumbnail size in pixels
+            niceness: CPU niceness increment for thumbnail manim processes
+        """
+        self.storage = storage
+        self.renderer = renderer
+        self.resolution = resolution
+        self.niceness = niceness
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._pending: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, graph_id: str):
+        """Re-render a graph's thumbnail soon, unless that is already due"""
+        if graph_id not in self._pending:
+            self._pending.add(graph_id)
+            self._queue.put_nowait(graph_id)
+
+    def start(self):
+        """Start the worker (needs a running event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker, dropping refreshes still due"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def refresh(self, graph_id: str):
+        """
+        Render a saved graph's thumbnail if it has none.
+
+        Raises:
+            RenderError if the graph does not render
+        """
+        graph = await asyncio.to_thread(self.storage.load_graph, graph_id)
+        thumbnail_path = self.storage.get_thumbnail_path(graph_id)
+        if graph is None or thumbnail_path.exists():
+            return
+
+        image_file, _ = await self.renderer.render_thumbnail(
+            graph, resolution=self.resolution, niceness=self.niceness
+        )
+        try:
+            # Saved over while rendering: that save scheduled another refresh
+            current = await asyncio.to_thread(self.storage.load_graph, graph_id)
+            if current is not None and current.render_hash() == graph.render_hash():
+                image_file.replace(thumbnail_path)
+        finally:
+            self.renderer.discard_render(image_file)
+
+    async def _run(self):
+        while True:
+            graph_id = await self._queue.get()
+            # Saves while waiting for previews still count as this refresh
+            await self.renderer.wait_until_idle()
+            self._pending.discard(graph_id)
+            try:
+                await self.refresh(graph_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A graph that does not render yet simply has no thumbnail
+                logger.debug(f"Thumbnail for graph {graph_id} not rendered: {e}")
@@ -8,8 +8,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
 from backend.api import graphs, export, websocket, nodes, examples
+from backend.api.media import MediaStaticFiles
 from backend.core.storage import StorageManager
+from backend.core.async_storage import AsyncStorage
 from backend.core.renderer import Renderer, ExportQueue
+from backend.core.thumbnails import GraphThumbnailRefresher, NodeThumbnailService
+from backend.core.temp_sweeper import TempSweeper
+from backend.core.scratch import ScratchSpace
+from backend.core.node_catalog import get_node_catalog
 from backend.core.logging_config import setup_logging, get_logger
 
 
@@ -20,24 +26,75 @@ async def lifespan(app: FastAPI):
     logger = setup_logging(log_level="INFO")
     logger.info("Starting Manim Nodes API")
 
-    storage = StorageManager()
-    logger.info("Cleaning up old temp files...")
-    storage.cleanup_old_temp_files(hours=1)
+    # GRAPH_COMPRESSION=gzip|zstd compresses large saved graphs;
+    # GRAPH_CACHE_SIZE is how many loaded graphs are kept in memory
+    storage = StorageManager(
+        compression=os.environ.get("GRAPH_COMPRESSION") or None,
+        cache_size=int(os.environ.get("GRAPH_CACHE_SIZE", "128")),
+    )
+    # Request handlers do storage I/O through this, off the event loop
+    async_storage = AsyncStorage(storage)
+    # Previews and render leftovers in temp are swept every
+    # TEMP_SWEEP_INTERVAL seconds: removed an hour after their last use
+    # (TEMP_MAX_AGE), or sooner, least recently used first, while temp is
+    # over TEMP_QUOTA_MB (0 for no quota)
+    quota_mb = int(os.environ.get("TEMP_QUOTA_MB", "2048"))
+    temp_sweeper = TempSweeper(
+        storage.temp_dir,
+        quota_bytes=quota_mb * 1024 * 1024 or None,
+        max_age=float(os.environ.get("TEMP_MAX_AGE", "3600")),
+        interval=float(os.environ.get("TEMP_SWEEP_INTERVAL", "300")),
+    )
+    temp_sweeper.start()
+    # Serialize the node catalog now rather than on the first page load
+    get_node_catalog()
     logger.info("Startup complete")
 
     # Initialize services
-    renderer = Renderer(storage)
-    export_queue = ExportQueue(storage, renderer)
+    # RENDER_SCRATCH_DIR (e.g. /dev/shm) puts preview renders on a RAM-backed
+    # filesystem. What they write there is measured as they run and kept
+    # under RENDER_SCRATCH_MB: when it is nearly full new renders go to temp
+    # as usual, and a render that takes it over quota is started over there
+    scratch = None
+    scratch_dir = os.environ.get("RENDER_SCRATCH_DIR")
+    if scratch_dir:
+        scratch = ScratchSpace(
+            Path(scratch_dir),
+            quota_bytes=int(os.environ.get("RENDER_SCRATCH_MB", "512")) * 1024 * 1024,
+        )
+    renderer = Renderer(storage, scratch=scratch, temp_sweeper=temp_sweeper)
+    # Jobs whose client polled and then went quiet this long are cancelled
+    abandon_after = float(os.environ.get("EXPORT_ABANDON_AFTER", "300"))
+    export_queue = ExportQueue(storage, renderer, abandon_after=abandon_after or None)
+    # EXPORT_WORKERS=external leaves rendering to `python -m backend.worker`
+    # processes sharing the storage directory (needed with uvicorn --workers)
+    if os.environ.get("EXPORT_WORKERS", "inline") != "external":
+        export_queue.start_worker()
+    thumbnail_service = NodeThumbnailService(storage, renderer)
+    # Saved graphs' thumbnails are re-rendered one at a time in the background
+    graph_thumbnails = GraphThumbnailRefresher(storage, renderer, resolution=graphs.THUMBNAIL_RESOLUTION)
+    graph_thumbnails.start()
 
     # Store services in app state for dependency injection
     app.state.storage = storage
+    app.state.async_storage = async_storage
+    app.state.temp_sweeper = temp_sweeper
     app.state.renderer = renderer
     app.state.export_queue = export_queue
+    app.state.thumbnail_service = thumbnail_service
+    app.state.graph_thumbnails = graph_thumbnails
 
     yield
 
     # Shutdown (cleanup if needed)
     logger.info("Shutting down Manim Nodes API")
+    await export_queue.stop_worker()
+    await graph_thumbnails.stop()
+    await temp_sweeper.stop()
+    if scratch is not None:
+        scratch.close()
+    export_queue.close()
+    async_storage.close()
 
 
 # Initialize FastAPI app with lifespan
@@ -66,7 +123,7 @@ app.include_router(examples.router)
 
 # Mount temp files directory (using a temporary storage instance for directory path)
 _temp_storage = StorageManager()
-app.mount("/temp", StaticFiles(directory=str(_temp_storage.temp_dir)), name="temp")
+app.mount("/temp", MediaStaticFiles(directory=str(_temp_storage.temp_dir)), name="temp")
 
 
 @app.get("/")
@@ -85,8 +142,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Health check endpoint, with graph cache, temp sweep and scratch metrics"""
+    storage = getattr(app.state, "storage", None)
+    temp_sweeper = getattr(app.state, "temp_sweeper", None)
+    renderer = getattr(app.state, "renderer", None)
+    scratch = renderer.scratch if renderer else None
+    return {
+        "status": "healthy",
+        "graph_cache": storage.graph_cache.stats() if storage else None,
+        "temp": temp_sweeper.stats() if temp_sweeper else None,
+        "scratch": scratch.stats() if scratch else None,
+    }
 
 
 @app.post("/api/open-folder/{folder}")
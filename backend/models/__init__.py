@@ -1,4 +1,4 @@
-from .graph import Graph, EdgeData
+from .graph import Graph, GraphDiff, EdgeData
 from .node import NodeData
 
-__all__ = ["Graph", "EdgeData", "NodeData"]
+__all__ = ["Graph", "GraphDiff", "EdgeData", "NodeData"]
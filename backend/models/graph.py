@@ -1,3 +1,5 @@
+import hashlib
+import json
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any
 from .node import NodeData
@@ -45,3 +47,54 @@ class Graph(BaseModel):
                 }
             }
         }
+
+    def render_hash(self) -> str:
+        """
+        Hash of everything that affects the rendered animation.
+
+        Ignores the graph's id and name and editor-only node fields
+        (position, style, ...), so copies of the same graph hash equal.
+        """
+        return document_render_hash(self.model_dump(mode="json", include={"nodes", "edges", "settings"}))
+
+
+def document_render_hash(document: Dict[str, Any]) -> str:
+    """Graph.render_hash() of a graph document (a dumped or saved graph)"""
+    canonical = {
+        "nodes": sorted(
+            ({"id": n["id"], "type": n["type"], "data": n.get("data", {})} for n in document.get("nodes", [])),
+            key=lambda n: n["id"],
+        ),
+        "edges": sorted(
+            (
+                {key: e.get(key) for key in ("source", "target", "sourceHandle", "targetHandle")}
+                for e in document.get("edges", [])
+            ),
+            key=lambda e: (e["source"], e["target"], e["sourceHandle"] or "", e["targetHandle"] or ""),
+        ),
+        "settings": document.get("settings", {}),
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class GraphDiff(BaseModel):
+    """Node/edge-level changes to a saved graph (body of PATCH /api/graphs/{id})"""
+    name: str | None = None
+    settings: Dict[str, Any] | None = None
+    upsert_nodes: List[NodeData] = Field(default=[], description="Nodes to add or replace (matched by id)")
+    remove_nodes: List[str] = Field(default=[], description="IDs of nodes to remove")
+    upsert_edges: List[EdgeData] = Field(default=[], description="Edges to add or replace (matched by id)")
+    remove_edges: List[str] = Field(default=[], description="IDs of edges to remove")
+    version: int | None = Field(default=None, description="Version the changes are based on")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "upsert_nodes": [
+                    {"id": "node-1", "type": "Circle", "position": {"x": 120, "y": 100}, "data": {"radius": 2.0}}
+                ],
+                "remove_edges": ["edge-3"],
+                "version": 12
+            }
+        }
@@ -0,0 +1,25 @@
+"""
+Rebuild the saved-graph metadata index from the project files.
+
+The index is maintained on every save and delete; run this after adding,
+editing or removing project files by hand:
+
+    python -m backend.rebuild_index
+"""
+import argparse
+from backend.core.storage import StorageManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Manim Nodes graph index")
+    parser.add_argument("--base-dir", default=None, help="Storage directory (default: ~/manim-nodes)")
+    args = parser.parse_args()
+
+    storage = StorageManager(base_dir=args.base_dir)
+    count = storage.rebuild_index()
+    storage.index.close()
+    print(f"Indexed {count} graph(s) in {storage.index.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import asyncio
+import threading
+from backend.models.graph import Graph
+from backend.core.async_storage import AsyncStorage
+from backend.core.storage import StorageManager
+
+
+def test_storage_calls_do_not_block_the_event_loop(tmp_path):
+    """Test that storage work runs in the pool while the loop keeps going"""
+    storage = AsyncStorage(StorageManager(base_dir=str(tmp_path)), max_workers=2)
+    released = threading.Event()
+
+    async def run():
+        # Only finishes if the loop can run release() while it waits
+        blocked = asyncio.ensure_future(storage.run(released.wait, 5))
+
+        async def release():
+            await asyncio.sleep(0.01)
+            released.set()
+
+        await asyncio.gather(blocked, release())
+        await storage.save_graph(Graph(id="g", name="G"))
+        return blocked.result(), await storage.load_graph("g")
+
+    try:
+        waited, graph = asyncio.run(run())
+    finally:
+        storage.close()
+
+    assert waited is True
+    assert graph.name == "G"
+    assert storage.storage.graph_cache.hits == 1
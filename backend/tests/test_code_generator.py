@@ -94,3 +94,22 @@ def test_invalid_graph_fails():
 
     with pytest.raises(Exception):
         generator.generate()
+
+
+def test_estimate_timeline():
+    """Test static animation count and duration estimate"""
+    code = "\n".join([
+        "class GeneratedScene(ThreeDScene):",
+        "    def construct(self):",
+        "        fade = FadeIn(circle, run_time=2.5)",
+        "        self.play(fade)",
+        "        self.play(Create(square, run_time=0.5))",
+        "        self.wait(2)  # Show static scene",
+        "        self.wait()",
+        "        self.move_camera(phi=1.0, run_time=3)",
+    ])
+
+    count, duration = CodeGenerator.estimate_timeline(code)
+
+    assert count == 5
+    assert duration == 9.0
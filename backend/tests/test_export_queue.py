@@ -0,0 +1,434 @@
+import asyncio
+import time
+from pathlib import Path
+import pytest
+from backend.models.graph import Graph
+from backend.core.storage import StorageManager
+from backend.core.renderer import Renderer, ExportJob, ExportQueue
+from backend.core.job_store import JobStore
+from backend.core.temp_sweeper import TempSweeper
+
+
+class FakeRenderer(Renderer):
+    """Renderer that writes a placeholder master video instead of running manim"""
+
+    def __init__(self, storage, temp_sweeper=None):
+        super().__init__(storage, temp_sweeper=temp_sweeper)
+        self.renders = []
+
+    async def render_export(self, graph, quality="1080p", fps=30, progress_callback=None,
+                            progress_event_callback=None, resolution=None, keep_pinned=False):
+        self.renders.append((quality, resolution))
+        output = self.new_render_dir() / "media" / "videos" / "GeneratedScene.mp4"
+        output.parent.mkdir(parents=True)
+        output.write_bytes(b"master")
+        if keep_pinned:
+            self.pin_render(output)
+        return output, "code"
+
+
+async def fake_ffmpeg(args, on_time):
+    Path(args[-1]).write_bytes(b"encoded")
+    on_time(1.0)
+    return 0, []
+
+
+async def fake_probe(video):
+    return 2.0
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    storage = StorageManager(base_dir=str(tmp_path))
+    monkeypatch.setattr(ExportQueue, "_run_ffmpeg", staticmethod(fake_ffmpeg))
+    monkeypatch.setattr(ExportQueue, "_probe_duration", staticmethod(fake_probe))
+    return ExportQueue(storage, FakeRenderer(storage))
+
+
+async def wait_for_job(queue, job_id, timeout=10):
+    queue.start_worker()
+    deadline = asyncio.get_running_loop().time() + timeout
+    job = await queue.get_job(job_id)
+    while job.status in ("pending", "running"):
+        assert asyncio.get_running_loop().time() < deadline, f"job still {job.status}"
+        await asyncio.sleep(0.01)
+        job = await queue.get_job(job_id)
+    await queue.stop_worker()
+    return job
+
+
+def test_multi_format_export_renders_once(queue):
+    """Test that several outputs come from one render at the largest quality"""
+    async def run():
+        job_id = await queue.create_job(
+            Graph(id="g", name="G"),
+            fps=30,
+            outputs=[("gif", "720p"), ("mp4", "1080p"), ("webm", "720p"), ("mp4", "1080p")],
+        )
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+
+    assert job.status == "completed", job.error
+    assert queue.renderer.renders == [("1080p", None)]
+    assert [(o.format, o.quality) for o in job.outputs] == [("gif", "720p"), ("mp4", "1080p"), ("webm", "720p")]
+    assert all(o.status == "completed" and o.output_file.exists() for o in job.outputs)
+    assert job.outputs[1].output_file.read_bytes() == b"master"
+    assert job.output_file == job.outputs[0].output_file
+    assert not list(queue.storage.temp_dir.glob("render-*"))
+
+
+def test_master_is_pinned_until_encoding_finishes(tmp_path, monkeypatch):
+    """Test that a temp sweep during encoding leaves the master render alone"""
+    storage = StorageManager(base_dir=str(tmp_path))
+    sweeper = TempSweeper(storage.temp_dir, quota_bytes=None, max_age=0, min_age=0)
+    swept = []
+
+    async def sweeping_ffmpeg(args, on_time):
+        swept.append(sweeper.sweep())
+        assert list(storage.temp_dir.glob("render-*/media/videos/GeneratedScene.mp4"))
+        return await fake_ffmpeg(args, on_time)
+
+    monkeypatch.setattr(ExportQueue, "_run_ffmpeg", staticmethod(sweeping_ffmpeg))
+    monkeypatch.setattr(ExportQueue, "_probe_duration", staticmethod(fake_probe))
+    queue = ExportQueue(storage, FakeRenderer(storage, temp_sweeper=sweeper))
+
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"), outputs=[("webm", "720p"), ("gif", "480p")])
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    queue.close()
+
+    assert job.status == "completed", job.error
+    assert len(swept) == 2
+    assert sweeper.stats()["pinned"] == 0
+    assert not list(storage.temp_dir.glob("render-*"))
+
+
+def test_gif_only_export_renders_at_gif_size(queue):
+    """Test that a GIF-only export is rendered straight at GIF resolution"""
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"), format="gif")
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+
+    assert job.status == "completed", job.error
+    assert queue.renderer.renders == [("1080p", (720, 404))]
+    assert job.output_file.name == f"{job.job_id}.gif"
+
+
+def test_custom_size_export_renders_at_largest_output(queue):
+    """Test that the master render is the output with the most pixels"""
+    async def run():
+        job_id = await queue.create_job(
+            Graph(id="g", name="G"),
+            outputs=[("mp4", "720p"), ("mp4", "1080x1920")],
+        )
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "completed"
+    assert queue.renderer.renders == [("1080x1920", None)]
+    with pytest.raises(ValueError):
+        asyncio.run(queue.create_job(Graph(id="g", name="G"), quality="1081x720"))
+
+
+def test_identical_exports_are_deduplicated(queue):
+    """Test that identical exports share one job, in flight and after completion"""
+    graph = Graph(id="a", name="A")
+    copy = Graph(id="b", name="Copy of A")
+
+    async def run():
+        first = await queue.create_job(graph, quality="720p")
+        in_flight = await queue.create_job(copy, quality="720p")
+        await wait_for_job(queue, first)
+        completed = await queue.create_job(graph, quality="720p")
+        other_fps = await queue.create_job(graph, quality="720p", fps=60)
+        await wait_for_job(queue, other_fps)
+        return first, in_flight, completed, other_fps
+
+    first, in_flight, completed, other_fps = asyncio.run(run())
+
+    assert first == in_flight == completed
+    assert other_fps != first
+    assert len(queue.renderer.renders) == 2
+
+
+def test_deleted_artifact_is_not_reused(queue):
+    """Test that a completed job whose file is gone is rendered again"""
+    graph = Graph(id="a", name="A")
+
+    async def run():
+        first = await queue.create_job(graph)
+        job = await wait_for_job(queue, first)
+        job.output_file.unlink()
+        return first, await queue.create_job(graph)
+
+    first, second = asyncio.run(run())
+    assert first != second
+
+
+def test_job_log_is_bounded_with_stable_offsets():
+    """Test ring-buffer log paging by absolute offset"""
+    job = ExportJob("job", Graph(id="g", name="G"), "1080p", 30, max_log_lines=3)
+    for i in range(5):
+        job.add_log(f"line {i}")
+
+    assert list(job.log) == ["line 2", "line 3", "line 4"]
+    assert job.get_log(0) == (["line 2", "line 3", "line 4"], 5)
+    assert job.get_log(3, limit=1) == (["line 3"], 4)
+    assert job.get_log(5) == ([], 5)
+
+
+def test_finished_jobs_are_evicted_after_ttl(queue):
+    """Test that finished jobs release their graph and expire"""
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"))
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    assert job.graph is None
+    assert asyncio.run(queue.get_job(job.job_id)) is job
+
+    queue.job_ttl = 0
+    queue.store_ttl = 0
+    queue._store_pruned_at = 0
+    assert asyncio.run(queue.get_job(job.job_id)) is None
+    assert queue.jobs == {}
+    assert queue._dedup_index == {}
+    assert queue._persisted_at == {}
+
+
+def test_finished_job_survives_restart(queue):
+    """Test that a finished job is served from the store by a new queue"""
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"))
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    restarted = ExportQueue(queue.storage, queue.renderer)
+
+    restored = asyncio.run(restarted.get_job(job.job_id))
+    assert restored.status == "completed"
+    assert restored.output_file == job.output_file
+    assert list(restored.log) == list(job.log)
+    assert asyncio.run(restarted._find_reusable(job.dedup_key)).job_id == job.job_id
+
+
+def test_interrupted_job_is_requeued(queue):
+    """Test that a job abandoned by a dead worker is run again"""
+    job = ExportJob("crashed", Graph(id="g", name="G"), "1080p", 30)
+    queue.store.save(job.to_record())
+    assert queue.store.claim("dead-worker")["job_id"] == "crashed"
+
+    async def run():
+        restarted = ExportQueue(queue.storage, queue.renderer, stale_after=0)
+        return await wait_for_job(restarted, "crashed")
+
+    job = asyncio.run(run())
+    assert job.status == "completed", job.error
+    assert "Requeued after interrupted attempt (attempt 2)" in job.log
+
+
+def test_jobs_are_claimed_once(tmp_path):
+    """Test that two stores on one database never claim the same job"""
+    first = JobStore(tmp_path / "jobs.db")
+    second = JobStore(tmp_path / "jobs.db")
+    for i in range(3):
+        first.save(ExportJob(f"job-{i}", Graph(id="g", name="G"), "1080p", 30).to_record())
+
+    claimed = [first.claim("a"), second.claim("b"), first.claim("a"), second.claim("b")]
+
+    assert [r["job_id"] for r in claimed[:3]] == ["job-0", "job-1", "job-2"]
+    assert claimed[3] is None
+    assert second.get("job-1")["worker_id"] == "b"
+    assert first.heartbeat("a") == 2
+
+
+def test_api_only_queue_serves_status_from_store(queue, tmp_path):
+    """Test that a process without a worker sees jobs run by another"""
+    api = ExportQueue(queue.storage, queue.renderer)
+
+    async def run():
+        job_id = await api.create_job(Graph(id="g", name="G"))
+        assert (await api.get_job(job_id)).status == "pending"
+        assert await api.create_job(Graph(id="g", name="G")) == job_id
+        await wait_for_job(queue, job_id)
+        return job_id
+
+    job_id = asyncio.run(run())
+    assert api.jobs == {}
+    assert asyncio.run(api.get_job(job_id)).status == "completed"
+
+
+def test_job_interrupted_while_encoding_is_requeued(queue, monkeypatch):
+    """Test that the stored graph outlives the render so encoding can be retried"""
+    async def stuck_ffmpeg(args, on_time):
+        on_time(1.0)
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ExportQueue, "_run_ffmpeg", staticmethod(stuck_ffmpeg))
+
+    async def crash():
+        job_id = await queue.create_job(Graph(id="g", name="G"), format="gif")
+        queue.start_worker()
+        while job_id not in queue.jobs:
+            await asyncio.sleep(0.01)
+        job = queue.jobs[job_id]
+        while job.outputs[0].status != "encoding":
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(1.1)
+        job.outputs[0].progress = 50.0
+        job.progress = 90.0
+        queue._persist(job, force=False)
+        # Leaving asyncio.run cancels the job mid-encode without releasing
+        # its claim, like a killed worker
+        return job_id
+
+    job_id = asyncio.run(crash())
+    record = queue.store.get(job_id)
+    assert record["status"] == "running"
+    assert record["graph"] is not None
+
+    monkeypatch.setattr(ExportQueue, "_run_ffmpeg", staticmethod(fake_ffmpeg))
+
+    async def restart():
+        restarted = ExportQueue(queue.storage, queue.renderer, stale_after=0)
+        return await wait_for_job(restarted, job_id)
+
+    job = asyncio.run(restart())
+    assert job.status == "completed", job.error
+    assert queue.store.get(job_id)["graph"] is None
+
+
+def test_cancel_running_job_from_another_process(queue, monkeypatch):
+    """Test that a cancel request stops the worker's job and removes its files"""
+    async def stuck_ffmpeg(args, on_time):
+        Path(args[-1]).write_bytes(b"partial")
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ExportQueue, "_run_ffmpeg", staticmethod(stuck_ffmpeg))
+    api = ExportQueue(queue.storage, queue.renderer)
+    queue.poll_interval = 0.05
+
+    async def run():
+        job_id = await api.create_job(Graph(id="g", name="G"), format="gif")
+        queue.start_worker()
+        while not list(queue.storage.exports_dir.iterdir()):
+            await asyncio.sleep(0.01)
+
+        assert await api.cancel_job(job_id) == "cancelling"
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "cancelled"
+    assert job.outputs[0].status == "cancelled"
+    assert list(queue.storage.exports_dir.iterdir()) == []
+    assert queue._running == {}
+    assert asyncio.run(api.get_job(job.job_id)).status == "cancelled"
+
+
+def test_cancel_pending_job(queue):
+    """Test that a cancelled pending job is never rendered"""
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"))
+        assert await queue.cancel_job(job_id) == "cancelled"
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "cancelled"
+    assert queue.renderer.renders == []
+    assert asyncio.run(queue.cancel_job("missing")) is None
+
+
+def test_shared_job_is_cancelled_by_its_last_requester(queue):
+    """Test that one client cancelling a deduplicated export does not stop it for the others"""
+    async def run():
+        graph = Graph(id="g", name="G")
+        first = await queue.create_job(graph, outputs=[("mp4", "720p"), ("gif", "480p")])
+        second = await queue.create_job(graph, outputs=[("gif", "480p"), ("mp4", "720p")])
+        assert first == second
+
+        assert await queue.cancel_job(first) == "released"
+        assert (await queue.get_job(first)).status == "pending"
+        assert await queue.cancel_job(first) == "cancelled"
+        return await wait_for_job(queue, first)
+
+    job = asyncio.run(run())
+    assert job.status == "cancelled"
+    assert queue.renderer.renders == []
+
+def test_abandoned_job_is_cancelled(queue):
+    """Test that a job whose client stopped polling is cancelled"""
+    queue.abandon_after = 0
+
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"))
+        assert (await queue.get_job(job_id, polled=True)).status == "pending"
+        return await wait_for_job(queue, job_id)
+
+    job = asyncio.run(run())
+    assert job.status == "cancelled"
+
+
+def test_watch_reports_changes_until_finished(queue):
+    """Test that watching a job yields its changes and stops when it finishes"""
+    async def run():
+        job_id = await queue.create_job(Graph(id="g", name="G"))
+        queue.start_worker()
+        statuses = []
+        async for job in queue.watch([job_id], timeout=5):
+            if job is not None:
+                statuses.append(job.status)
+        await queue.stop_worker()
+        return statuses
+
+    statuses = asyncio.run(asyncio.wait_for(run(), 10))
+    assert statuses[0] == "pending"
+    assert statuses[-1] == "completed"
+    assert statuses.count("completed") == 1
+
+
+def test_latest_export_is_found_per_graph(queue):
+    """Test that the latest download comes from the job store, per graph"""
+    async def run():
+        first = await queue.create_job(Graph(id="a", name="A"))
+        await wait_for_job(queue, first)
+        second = await queue.create_job(Graph(id="b", name="B"), fps=24)
+        await wait_for_job(queue, second)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert asyncio.run(queue.latest_export()).job_id == second
+    assert asyncio.run(queue.latest_export("a")).job_id == first
+
+    asyncio.run(queue.get_job(second)).output_file.unlink()
+    assert asyncio.run(queue.latest_export()).job_id == first
+    assert asyncio.run(queue.latest_export("b")) is None
+
+
+def test_store_calls_do_not_block_the_event_loop(queue, monkeypatch):
+    """Test that a job store waiting on a database lock leaves the loop running"""
+    get = queue.store.get
+
+    def locked_get(*args, **kwargs):
+        time.sleep(0.3)  # another process holds the write lock
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(queue.store, "get", locked_get)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        assert await queue.get_job("missing") is None
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(ticks) > 10
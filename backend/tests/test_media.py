@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from backend.api.media import MediaFileResponse, parse_range
+
+
+def serve(path, headers=None, extensions=None):
+    """Run a MediaFileResponse as an ASGI app; return (status, headers, body)"""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "extensions": extensions or {},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(MediaFileResponse(str(path), media_type="video/mp4")(scope, receive, send))
+    start = messages[0]
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], response_headers, body
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"0123456789")
+    return path
+
+
+def test_parse_range():
+    """Test single, open-ended and suffix ranges, and ranges served whole"""
+    assert parse_range("bytes=2-5", 10) == (2, 5)
+    assert parse_range("bytes=7-", 10) == (7, 9)
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    assert parse_range("bytes=5-100", 10) == (5, 9)
+    assert parse_range(None, 10) is None
+    assert parse_range("bytes=0-1,4-5", 10) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=10-", 10)
+
+
+def test_range_request_returns_partial_content(video):
+    """Test that a byte range is answered with 206 and only those bytes"""
+    status, headers, body = serve(video, {"Range": "bytes=2-5"})
+
+    assert status == 206
+    assert body == b"2345"
+    assert headers["content-range"] == "bytes 2-5/10"
+    assert headers["content-length"] == "4"
+    assert headers["accept-ranges"] == "bytes"
+
+
+def test_unsatisfiable_range_and_conditional_get(video):
+    """Test 416 for ranges past the end and 304 for a matching ETag"""
+    status, headers, _ = serve(video, {"Range": "bytes=20-30"})
+    assert status == 416
+    assert headers["content-range"] == "bytes */10"
+
+    status, headers, body = serve(video)
+    assert status == 200 and body == b"0123456789"
+
+    status, _, body = serve(video, {"If-None-Match": f'"{headers["etag"]}"'})
+    assert status == 304 and body == b""
+
+    # A stale If-Range sends the whole file instead of the range
+    status, _, body = serve(video, {"Range": "bytes=0-1", "If-Range": "stale"})
+    assert status == 200 and body == b"0123456789"
+
+
+def test_zero_copy_send_hands_over_the_file(video):
+    """Test that servers with the zero-copy extension get a file and offsets"""
+    scope = {
+        "type": "http", "method": "GET",
+        "headers": [(b"range", b"bytes=4-")],
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "file": message["file"].name}
+        messages.append(message)
+
+    asyncio.run(MediaFileResponse(str(video))(scope, None, send))
+    assert messages[1]["file"] == str(video)
+    assert (messages[1]["offset"], messages[1]["count"]) == (4, 6)
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from backend.api.nodes import get_node_info, list_nodes
+from backend.core.node_catalog import NodeCatalog, describe_node
+from backend.nodes import NODE_REGISTRY
+
+
+def make_request(headers=None) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+def test_catalog_matches_node_descriptions():
+    """Test that the pre-serialized catalog describes every registered node"""
+    catalog = NodeCatalog(NODE_REGISTRY)
+    body, etag = catalog.all
+    nodes = json.loads(body)
+    assert [node["type"] for node in nodes] == list(NODE_REGISTRY)
+
+    node_type, node_class = next(iter(NODE_REGISTRY.items()))
+    assert json.loads(catalog.get(node_type)[0]) == json.loads(json.dumps(describe_node(node_type, node_class)))
+    assert catalog.get("NoSuchNode") is None
+    # Content hashes: the same in every process
+    assert NodeCatalog(NODE_REGISTRY).all[1] == etag
+
+
+def test_catalog_revalidates_with_etag():
+    """Test that the catalog is served with an ETag and 304 when unchanged"""
+    response = asyncio.run(list_nodes(make_request()))
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+
+    response = asyncio.run(list_nodes(make_request({"If-None-Match": etag})))
+    assert response.status_code == 304
+    assert response.body == b""
+
+    node_type = next(iter(NODE_REGISTRY))
+    response = asyncio.run(get_node_info(node_type, make_request({"If-None-Match": etag})))
+    assert response.status_code == 200
+    assert json.loads(response.body)["type"] == node_type
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_node_info("NoSuchNode", make_request()))
+    assert error.value.status_code == 404
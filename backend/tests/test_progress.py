@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from backend.core.progress import ProgressBuffer, ProgressTracker
+from backend.core.renderer import _iter_lines
+
+
+def test_tracker_ignores_other_lines():
+    """Test that non progress-bar output is not parsed"""
+    tracker = ProgressTracker(total_animations=2)
+    assert tracker.feed("INFO     Animation 0 : Partial movie file written in") is None
+
+
+def test_tracker_weights_by_duration():
+    """Test overall progress across animations of different lengths"""
+    tracker = ProgressTracker(total_animations=2, total_duration=3.0, fps=10)
+
+    first = tracker.feed("Animation 0: Create(Circle):  50%|#####     | 5/10 [00:00<00:00, 30.00it/s]")
+    assert first.animation_index == 0
+    assert first.frames_done == 5 and first.frames_total == 10
+    assert round(first.percent, 1) == 16.7
+
+    second = tracker.feed("Waiting 1:  50%|#####     | 10/20 [00:00<00:00, 30.00it/s]")
+    assert second.animation_index == 1
+    assert round(second.percent, 1) == 66.7
+    assert second.eta is not None
+
+
+def test_tracker_caps_below_complete():
+    """Test that an underestimated timeline never reports 100%"""
+    tracker = ProgressTracker(total_animations=1)
+    tracker.feed("Animation 0: Write(Text): 100%|##########| 10/10 [00:00<00:00]")
+    event = tracker.feed("Animation 1: FadeOut(Text): 100%|##########| 10/10 [00:00<00:00]")
+    assert event.percent < 100
+
+
+def test_iter_lines_splits_carriage_returns():
+    """Test that in-place progress bar redraws become separate lines"""
+    async def run():
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"first\r second\n\nthird")
+        stream.feed_eof()
+        return [line async for line in _iter_lines(stream)]
+
+    assert asyncio.run(run()) == ["first", "second", "third"]
+
+
+def test_progress_buffer_coalesces_and_keeps_debug_lines():
+    """Test that lines are batched, bounded, and debug lines survive"""
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        buffer = ProgressBuffer(send, max_rate=10, max_lines=3)
+        buffer.push_line("[DEBUG:node-1] value")
+        for i in range(10):
+            buffer.push_line(f"line {i}")
+        buffer.push_event(ProgressTracker(total_animations=2).feed(
+            "Animation 0: Create(Circle):  50%|#####     | 5/10 [00:00<00:00]"
+        ))
+        buffer.start()
+        await buffer.close()
+
+    asyncio.run(run())
+
+    batch, event = sent
+    assert batch["type"] == "progress_batch"
+    assert batch["messages"] == ["[DEBUG:node-1] value", "line 7", "line 8", "line 9"]
+    assert batch["dropped"] == 7
+    assert event["type"] == "render_progress"
+    assert event["percent"] == 25.0
+
+
+def test_progress_buffer_cancels_render_when_send_fails():
+    """Test that a client going away stops the render and the buffering"""
+    cancelled = asyncio.Event()
+
+    async def send(message):
+        raise ConnectionError("client went away")
+
+    async def render(buffer):
+        try:
+            while True:
+                buffer.push_line("line")
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        buffer = ProgressBuffer(send, max_rate=100)
+        with pytest.raises(ConnectionError):
+            await buffer.run(render(buffer))
+        assert cancelled.is_set()
+        buffer.push_line("after")
+        assert buffer._lines == []
+
+    asyncio.run(run())
+
+
+def test_progress_buffer_keeps_render_error():
+    """Test that a failed final flush does not hide the render's exception"""
+    async def send(message):
+        raise ConnectionError("client went away")
+
+    async def render(buffer):
+        buffer.push_line("line")
+        raise ValueError("render failed")
+
+    async def run():
+        buffer = ProgressBuffer(send)
+        with pytest.raises(ValueError):
+            await buffer.run(render(buffer))
+
+    asyncio.run(run())
@@ -0,0 +1,112 @@
+import asyncio
+from pathlib import Path
+import pytest
+from backend.models.graph import Graph
+from backend.core.storage import StorageManager
+from backend.core.renderer import Renderer, export_resolution
+
+
+def test_tap_segments_waits_for_next_segment(tmp_path):
+    """Test that a partial movie file is only streamed once it is finished"""
+    renderer = Renderer(StorageManager(base_dir=str(tmp_path / "storage")))
+    partial_dir = tmp_path / "videos" / "partial_movie_files" / "GeneratedScene"
+    partial_dir.mkdir(parents=True)
+    received = []
+
+    async def on_segment(index, data):
+        received.append((index, data))
+
+    async def run():
+        done = asyncio.Event()
+        tap = asyncio.create_task(renderer._tap_segments(partial_dir, on_segment, done))
+
+        (partial_dir / "uncached_00000.mp4").write_bytes(b"first")
+        await asyncio.sleep(0.3)
+        assert received == []  # still being written
+
+        (partial_dir / "uncached_00001.mp4").write_bytes(b"second")
+        await asyncio.sleep(0.3)
+        assert received == [(0, b"first")]
+
+        done.set()
+        await tap
+
+    asyncio.run(run())
+    assert received == [(0, b"first"), (1, b"second")]
+
+
+def test_render_directory_is_self_contained(tmp_path):
+    """Test that a render directory pins manim's output and is discarded whole"""
+    storage = StorageManager(base_dir=str(tmp_path))
+    renderer = Renderer(storage)
+    render_dir = renderer.new_render_dir()
+    assert render_dir.parent == storage.temp_dir
+
+    _, config_file = renderer._prepare_render(render_dir, "code")
+    config = config_file.read_text()
+    assert f"media_dir = {render_dir}/media" in config
+    assert f"tex_dir = {storage.temp_dir}/media/Tex" in config
+
+    output = render_dir / "media" / "videos" / "GeneratedScene.mp4"
+    output.parent.mkdir(parents=True)
+    output.write_bytes(b"video")
+    assert renderer.render_dir_of(output) == render_dir
+    assert renderer.render_dir_of(storage.temp_dir / "export.mp4") is None
+
+    renderer.discard_render(output)
+    assert not render_dir.exists()
+
+
+def test_cancelled_render_terminates_subprocess(tmp_path, monkeypatch):
+    """Test that cancelling a render kills the subprocess instead of orphaning it"""
+    renderer = Renderer(StorageManager(base_dir=str(tmp_path)))
+    processes = []
+    create_subprocess_exec = asyncio.create_subprocess_exec
+
+    async def recording_exec(*args, **kwargs):
+        process = await create_subprocess_exec(*args, **kwargs)
+        processes.append(process)
+        return process
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", recording_exec)
+
+    async def run():
+        task = asyncio.create_task(renderer._run_manim(["sleep", "30"]))
+        while not processes:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert processes[0].returncode is not None
+
+
+def test_export_renders_at_exact_pixel_size(tmp_path, monkeypatch):
+    """Test that presets above 1080p and custom sizes are rendered at their own size"""
+    renderer = Renderer(StorageManager(base_dir=str(tmp_path)))
+    calls = []
+
+    async def fake_render(**kwargs):
+        calls.append(kwargs)
+        return Path("GeneratedScene.mp4"), "code"
+
+    monkeypatch.setattr(renderer, "_render", fake_render)
+
+    async def run():
+        await renderer.render_export(Graph(id="g", name="G"), quality="2160p", fps=60)
+        await renderer.render_export(Graph(id="g", name="G"), quality="1080x1920")
+
+    asyncio.run(run())
+    assert [call["resolution"] for call in calls] == [(3840, 2160), (1080, 1920)]
+    assert calls[0]["fps"] == 60
+
+
+def test_invalid_custom_export_sizes_are_rejected():
+    """Test that odd, out-of-range and unknown export sizes raise ValueError"""
+    assert export_resolution("480p") == (854, 480)
+    for quality in ("1081x720", "8x8", "8000x4000", "4k"):
+        with pytest.raises(ValueError):
+            export_resolution(quality)
@@ -0,0 +1,111 @@
+import pytest
+from backend.models.graph import Graph
+from backend.core.storage import StorageManager
+from backend.core.json_patch import JsonPatchError, apply_patch, make_patch
+from backend.core.revisions import SNAPSHOT_INTERVAL, RevisionStore
+
+
+def make_graph(label: str, count: int = 50) -> Graph:
+    nodes = [
+        {"id": f"n{i}", "type": "Circle", "position": {"x": i, "y": 0}, "data": {"radius": 1, "label": f"c{i}"}}
+        for i in range(count)
+    ]
+    nodes[10]["data"]["label"] = label
+    return Graph(id="g", name="G", nodes=nodes)
+
+
+def test_make_patch_round_trips_and_stays_small():
+    """Test that diffs apply back and an insertion is a single operation"""
+    old = {"nodes": [{"id": i} for i in range(100)], "name": "a/b~c"}
+    new = {"nodes": [{"id": i} for i in range(50)] + [{"id": "x"}] + [{"id": i} for i in range(50, 100)]}
+
+    patch = make_patch(old, new)
+    assert patch == [
+        {"op": "remove", "path": "/name"},
+        {"op": "add", "path": "/nodes/50", "value": {"id": "x"}},
+    ]
+    assert apply_patch(old, patch) == new
+    assert old["name"] == "a/b~c"  # not modified in place
+
+
+def test_apply_patch_rejects_bad_operations():
+    """Test test/move/copy support and errors for paths that do not exist"""
+    doc = {"a": [1, 2], "b": {"c~/": 3}}
+    assert apply_patch(doc, [
+        {"op": "test", "path": "/b/c~0~1", "value": 3},
+        {"op": "copy", "from": "/a/0", "path": "/a/-"},
+        {"op": "move", "from": "/b", "path": "/d"},
+    ]) == {"a": [1, 2, 1], "d": {"c~/": 3}}
+
+    for op in (
+        {"op": "replace", "path": "/missing", "value": 1},
+        {"op": "remove", "path": "/a/5"},
+        {"op": "test", "path": "/a/0", "value": 2},
+        {"op": "frobnicate", "path": "/a"},
+    ):
+        with pytest.raises(JsonPatchError):
+            apply_patch(doc, [op])
+
+
+def test_saves_are_stored_as_deltas_and_restorable(tmp_path):
+    """Test that edits become small deltas and old revisions can be restored"""
+    storage = StorageManager(base_dir=str(tmp_path))
+    for label in ("first", "second", "third"):
+        storage.save_graph(make_graph(label))
+
+    revisions = storage.list_revisions("g")
+    assert [(r["revision"], r["kind"]) for r in revisions] == [(3, "delta"), (2, "delta"), (1, "snapshot")]
+    assert revisions[0]["size"] < revisions[2]["size"] / 5
+
+    assert storage.load_revision("g", 1).nodes[10].data["label"] == "first"
+    assert storage.load_revision("g", 4) is None
+
+    restored = storage.restore_revision("g", 1)
+    assert restored.nodes[10].data["label"] == "first"
+    assert storage.load_graph("g").nodes[10].data["label"] == "first"
+    assert storage.revisions.latest("g") == 4
+
+    # Saving unchanged content adds no revision
+    storage.save_graph(restored)
+    assert storage.revisions.latest("g") == 4
+
+    storage.delete_graph("g")
+    assert storage.list_revisions("g") == []
+
+
+
+def test_saves_diff_against_the_cached_graph(tmp_path, monkeypatch):
+    """Test that the replaced document comes from the cache while it is current"""
+    storage = StorageManager(base_dir=str(tmp_path))
+    storage.save_graph(make_graph("first"))
+
+    def no_read(*args):
+        raise AssertionError("project file read again")
+
+    monkeypatch.setattr(storage, "_read_file", no_read)
+    storage.save_graph(make_graph("second"))
+    monkeypatch.undo()
+
+    # Changed behind the cache's back: the file is what gets replaced
+    other = StorageManager(base_dir=str(tmp_path))
+    other.save_graph(make_graph("outside"))
+    storage.save_graph(make_graph("third"))
+
+    labels = [storage.load_revision("g", r).nodes[10].data["label"] for r in (1, 2, 3, 4)]
+    assert labels == ["first", "second", "outside", "third"]
+
+def test_old_revisions_are_pruned_at_a_snapshot(tmp_path):
+    """Test that pruning keeps keep_last revisions and every kept one rebuilds"""
+    store = RevisionStore(tmp_path / "revisions.db", keep_last=5, keep_days=None)
+    previous = None
+    for i in range(SNAPSHOT_INTERVAL * 2 + 3):
+        document = {"value": i}
+        store.record("g", document, previous)
+        previous = document
+
+    kept = [r["revision"] for r in store.list("g")]
+    # The newest five start after the last snapshot, so history is cut at
+    # the snapshot before it
+    assert kept[-1] == SNAPSHOT_INTERVAL + 1
+    assert kept[0] == SNAPSHOT_INTERVAL * 2 + 3
+    assert all(store.get("g", r) == {"value": r - 1} for r in kept)
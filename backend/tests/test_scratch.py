@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from backend.models.graph import Graph
+from backend.core.storage import StorageManager
+from backend.core import renderer as renderer_module
+from backend.core.renderer import Renderer
+from backend.core.scratch import ScratchSpace
+
+
+def test_scratch_space_caps_measured_usage(tmp_path):
+    """Test that directories are handed out by what is actually in use"""
+    scratch = ScratchSpace(tmp_path / "shm", quota_bytes=256 * 1024, reserve_bytes=64 * 1024)
+    assert scratch.directory is None  # root does not exist
+    assert scratch.acquire() is None
+
+    (tmp_path / "shm").mkdir()
+    scratch = ScratchSpace(tmp_path / "shm", quota_bytes=256 * 1024, reserve_bytes=64 * 1024)
+    first, second = scratch.acquire(), scratch.acquire()
+    assert first.is_dir() and second.is_dir()
+    assert not scratch.over_quota(first)
+
+    # Less than the reserve left: no new directories
+    (first / "partial.mp4").write_bytes(b"x" * 200 * 1024)
+    assert scratch.acquire() is None
+    assert scratch.stats()["refused"] == 1
+
+    # Over quota: the largest render makes room
+    (second / "partial.mp4").write_bytes(b"x" * 100 * 1024)
+    assert scratch.stats()["used_bytes"] > scratch.quota_bytes
+    assert not scratch.over_quota(second)
+    assert scratch.over_quota(first)
+
+    scratch.release(first)
+    assert not first.exists()
+    assert scratch.acquire() is not None
+
+    scratch.close()
+    assert not scratch.directory.exists()
+
+
+class FakeCodeGenerator:
+    """Generates a fixed module without validating the graph"""
+
+    def __init__(self, graph):
+        self.var_to_node_id = {}
+
+    def generate(self):
+        return "code"
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    monkeypatch.setattr(renderer_module, "CodeGenerator", FakeCodeGenerator)
+    (tmp_path / "shm").mkdir()
+    scratch = ScratchSpace(tmp_path / "shm", quota_bytes=1024 ** 2, reserve_bytes=1024, check_interval=0.01)
+    return Renderer(StorageManager(base_dir=str(tmp_path / "storage")), scratch=scratch)
+
+
+def test_preview_renders_in_scratch_and_output_moves_to_temp(renderer, monkeypatch):
+    """Test that a preview is rendered in scratch and served from temp"""
+    render_dirs = []
+
+    async def fake_run_manim(cmd, *args, cwd=None, **kwargs):
+        render_dirs.append(cwd)
+        output = cwd / "media" / "videos" / "GeneratedScene.mp4"
+        output.parent.mkdir(parents=True)
+        output.write_bytes(b"video")
+        return 0, []
+
+    monkeypatch.setattr(renderer, "_run_manim", fake_run_manim)
+    output, _ = asyncio.run(renderer.render_preview(Graph(id="g", name="G")))
+
+    assert render_dirs[0].parent == renderer.scratch.directory
+    assert not render_dirs[0].exists()
+    assert output.read_bytes() == b"video"
+    assert renderer.render_dir_of(output) is not None
+    assert renderer.scratch.stats()["in_use"] == 0
+
+
+def test_full_scratch_falls_back_to_disk(renderer, monkeypatch):
+    """Test that a render that fills the scratch space is started over on disk"""
+    render_dirs = []
+
+    async def fake_run_manim(cmd, *args, cwd=None, **kwargs):
+        render_dirs.append(cwd)
+        if cwd.parent == renderer.scratch.directory:
+            return 1, ["OSError: [Errno 28] No space left on device"]
+        output = cwd / "media" / "videos" / "GeneratedScene.mp4"
+        output.parent.mkdir(parents=True)
+        output.write_bytes(b"video")
+        return 0, []
+
+    monkeypatch.setattr(renderer, "_run_manim", fake_run_manim)
+    output, _ = asyncio.run(renderer.render_preview(Graph(id="g", name="G")))
+
+    assert len(render_dirs) == 2
+    assert render_dirs[1].parent == renderer.storage.temp_dir
+    assert output.parent.parent.parent == render_dirs[1]
+    assert renderer.scratch.stats()["in_use"] == 0
+
+
+def test_render_over_scratch_quota_moves_to_disk(renderer, monkeypatch):
+    """Test that a render taking the scratch space over quota is started over on disk once"""
+    render_dirs = []
+    messages = []
+
+    async def fake_run_manim(cmd, *args, cwd=None, **kwargs):
+        render_dirs.append(cwd)
+        if cwd.parent == renderer.scratch.directory:
+            # Keeps writing without running out of room on the filesystem
+            (cwd / "partial.mp4").write_bytes(b"x" * 2 * 1024 ** 2)
+            await asyncio.sleep(10)
+        output = cwd / "media" / "videos" / "GeneratedScene.mp4"
+        output.parent.mkdir(parents=True)
+        output.write_bytes(b"video")
+        return 0, []
+
+    async def progress(message):
+        messages.append(message)
+
+    monkeypatch.setattr(renderer, "_run_manim", fake_run_manim)
+    output, _ = asyncio.run(renderer.render_preview(Graph(id="g", name="G"), progress_callback=progress))
+
+    assert len(render_dirs) == 2
+    assert not render_dirs[0].exists()
+    assert output.read_bytes() == b"video"
+    assert messages.count("Starting render...") == 1
+    assert renderer.scratch.stats()["over_quota_aborts"] == 1
@@ -0,0 +1,209 @@
+import threading
+import pytest
+from backend.models.graph import Graph, GraphDiff
+from backend.core.storage import StorageManager, VersionConflictError
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return StorageManager(base_dir=str(tmp_path))
+
+
+def test_list_graphs_thumbnail_url(storage):
+    """Test that list_graphs only links thumbnails that exist"""
+    storage.save_graph(Graph(id="with-thumb", name="With"))
+    storage.save_graph(Graph(id="without-thumb", name="Without"))
+    storage.get_thumbnail_path("with-thumb").write_bytes(b"png")
+
+    listed = {g["id"]: g for g in storage.list_graphs()}
+
+    version = storage.get_thumbnail_path("with-thumb").stat().st_mtime_ns
+    assert listed["with-thumb"]["thumbnail_url"] == f"/api/graphs/with-thumb/thumbnail?v={version}"
+    assert listed["without-thumb"]["thumbnail_url"] is None
+
+
+def test_save_graph_invalidates_thumbnail(storage):
+    """Test that saving new content drops the stale thumbnail"""
+    storage.save_graph(Graph(id="g", name="G"))
+    thumbnail = storage.get_thumbnail_path("g")
+    thumbnail.write_bytes(b"png")
+
+    storage.save_graph(Graph(id="g", name="G renamed"))
+    assert thumbnail.exists()  # renders the same
+
+    storage.save_graph(Graph(id="g", name="G renamed", settings={"fps": 60}))
+    assert not thumbnail.exists()
+
+
+def test_delete_graph_removes_thumbnail(storage):
+    """Test that deleting a graph also deletes its thumbnail"""
+    storage.save_graph(Graph(id="g", name="G"))
+    thumbnail = storage.get_thumbnail_path("g")
+    thumbnail.write_bytes(b"png")
+
+    assert storage.delete_graph("g")
+    assert not thumbnail.exists()
+
+
+def test_list_graphs_pages_sorts_and_searches(storage):
+    """Test listing from the index with pagination, sorting and name search"""
+    for i, name in enumerate(["Beta", "alpha", "Gamma ray", "Delta"]):
+        storage.save_graph(Graph(id=f"g{i}", name=name))
+        storage.index.upsert(f"g{i}", name, 1000.0 + i)  # distinct mtimes
+
+    assert [g["name"] for g in storage.list_graphs()] == ["Delta", "Gamma ray", "alpha", "Beta"]
+    assert [g["name"] for g in storage.list_graphs(offset=1, limit=2)] == ["Gamma ray", "alpha"]
+    assert [g["name"] for g in storage.list_graphs(sort="name", descending=False)] == [
+        "alpha", "Beta", "Delta", "Gamma ray",
+    ]
+    assert [g["id"] for g in storage.list_graphs(search="RAY")] == ["g2"]
+    assert storage.count_graphs() == 4
+    assert storage.count_graphs("a_") == 0  # LIKE wildcards are literal
+
+    storage.delete_graph("g0")
+    assert storage.count_graphs() == 3
+
+
+def test_index_rebuild_picks_up_outside_changes(tmp_path):
+    """Test that a new index is built from existing files, and rebuilt on demand"""
+    storage = StorageManager(base_dir=str(tmp_path))
+    storage.save_graph(Graph(id="kept", name="Kept"))
+    storage.index.close()
+    (tmp_path / "graph_index.db").unlink()
+
+    reopened = StorageManager(base_dir=str(tmp_path))
+    assert [g["id"] for g in reopened.list_graphs()] == ["kept"]
+
+    (tmp_path / "projects" / "kept.json").unlink()
+    (tmp_path / "projects" / "copied.json").write_text('{"id": "copied", "name": "Copied"}')
+    assert reopened.rebuild_index() == 1
+    assert [g["id"] for g in reopened.list_graphs()] == ["copied"]
+
+
+def test_save_graph_is_compact_and_leaves_no_temp_files(storage):
+    """Test that graphs are saved as compact JSON via a rename"""
+    storage.save_graph(Graph(id="g", name="G", settings={"fps": 30}))
+
+    assert [p.name for p in storage.projects_dir.iterdir()] == ["g.json"]
+    assert (storage.projects_dir / "g.json").read_text() == (
+        '{"id":"g","name":"G","nodes":[],"edges":[],"settings":{"fps":30}}'
+    )
+    assert storage.load_graph("g").settings == {"fps": 30}
+
+
+def test_large_graphs_are_compressed_and_load_transparently(tmp_path):
+    """Test gzip for graphs over the threshold, and switching compression"""
+    storage = StorageManager(base_dir=str(tmp_path), compression="gzip")
+    dataset = {"points": [[i, i * 0.5] for i in range(20000)]}
+
+    storage.save_graph(Graph(id="small", name="Small"))
+    storage.save_graph(Graph(id="big", name="Big", settings=dataset))
+
+    assert (storage.projects_dir / "small.json").exists()
+    assert (storage.projects_dir / "big.json.gz").exists()
+    assert storage.load_graph("big").settings == dataset
+    assert {g["id"] for g in storage.list_graphs()} == {"small", "big"}
+
+    # Saving uncompressed replaces the compressed file
+    plain = StorageManager(base_dir=str(tmp_path))
+    plain.save_graph(Graph(id="big", name="Big", settings=dataset))
+    assert sorted(p.name for p in storage.projects_dir.iterdir()) == ["big.json", "small.json"]
+
+    assert plain.rebuild_index() == 2
+    assert plain.delete_graph("big")
+    assert plain.load_graph("big") is None
+
+
+def test_patch_graph_applies_diffs_and_json_patches(storage):
+    """Test node/edge diffs and JSON Patches, each bumping the version"""
+    node = {"id": "a", "type": "Circle", "position": {"x": 0, "y": 0}, "data": {"radius": 1}}
+    storage.save_graph(Graph(id="g", name="G", nodes=[node]))
+    assert storage.graph_version("g") == 1
+
+    graph, version = storage.patch_graph("g", GraphDiff(
+        upsert_nodes=[{**node, "id": "b"}, {**node, "data": {"radius": 2}}],
+        upsert_edges=[{"id": "e", "source": "a", "target": "b"}],
+    ))
+    assert version == 2
+    assert [(n.id, n.data["radius"]) for n in graph.nodes] == [("a", 2), ("b", 1)]
+
+    _, version = storage.patch_graph("g", [
+        {"op": "replace", "path": "/name", "value": "Renamed"},
+        {"op": "remove", "path": "/edges/0"},
+    ], expected_version=2)
+    assert version == 3
+
+    saved = storage.load_graph("g")
+    assert saved.name == "Renamed"
+    assert saved.edges == []
+    assert len(saved.nodes) == 2
+    assert storage.patch_graph("missing", []) is None
+
+
+def test_patch_graph_rejects_stale_and_invalid_changes(storage):
+    """Test that conflicts and invalid touched nodes leave the graph as it was"""
+    storage.save_graph(Graph(id="g", name="G"))
+    storage.save_graph(Graph(id="g", name="G2"))
+
+    with pytest.raises(VersionConflictError):
+        storage.patch_graph("g", GraphDiff(name="Stale"), expected_version=1)
+    with pytest.raises(ValueError):
+        storage.patch_graph("g", [{"op": "add", "path": "/nodes/-", "value": {"id": "x"}}])
+    with pytest.raises(ValueError):
+        storage.patch_graph("g", [{"op": "replace", "path": "/id", "value": "other"}])
+
+    assert storage.load_graph("g").name == "G2"
+    assert storage.graph_version("g") == 2
+
+
+
+def test_patch_graph_is_serialized_across_processes(tmp_path):
+    """Test that a PATCH from another process waits for the graph's lock"""
+    first = StorageManager(base_dir=str(tmp_path))
+    second = StorageManager(base_dir=str(tmp_path))
+    first.save_graph(Graph(id="g", name="G"))
+
+    errors = []
+
+    def stale_patch():
+        try:
+            second.patch_graph("g", GraphDiff(name="Second"), expected_version=1)
+        except VersionConflictError as e:
+            errors.append(e)
+
+    with first._graph_lock("g"):
+        thread = threading.Thread(target=stale_patch)
+        thread.start()
+        thread.join(0.2)
+        # Blocked on the lock rather than racing past the version check
+        assert thread.is_alive()
+        first.patch_graph("g", GraphDiff(name="First"), expected_version=1)
+    thread.join(5)
+
+    assert len(errors) == 1
+    assert second.load_graph("g").name == "First"
+    assert second.graph_version("g") == 2
+
+def test_load_graph_is_cached_until_the_file_changes(tmp_path):
+    """Test cache hits, write-through, outside edits and LRU eviction"""
+    storage = StorageManager(base_dir=str(tmp_path), cache_size=2)
+    storage.save_graph(Graph(id="a", name="A"))
+
+    # Saving writes through, so the first load is already a hit
+    assert storage.load_graph("a") is storage.load_graph("a")
+    assert storage.graph_cache.stats()["hits"] == 2
+
+    # A file changed behind the cache's back is read again
+    path = storage.projects_dir / "a.json"
+    path.write_text(path.read_text().replace('"A"', '"Edited"'))
+    assert storage.load_graph("a").name == "Edited"
+    assert storage.graph_cache.misses == 1
+
+    storage.save_graph(Graph(id="b", name="B"))
+    storage.save_graph(Graph(id="c", name="C"))
+    stats = storage.graph_cache.stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+
+    storage.delete_graph("c")
+    assert storage.load_graph("c") is None
+    assert storage.graph_cache.stats()["entries"] == 1
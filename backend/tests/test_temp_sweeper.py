@@ -0,0 +1,59 @@
+import os
+import time
+from backend.core.temp_sweeper import TempSweeper
+
+
+def make_unit(path, size: int, age: float):
+    """Create a render output tree of `size` bytes last used `age` seconds ago"""
+    path.mkdir(parents=True)
+    video = path / "480p15" / "GeneratedScene.mp4"
+    video.parent.mkdir()
+    video.write_bytes(b"x" * size)
+    when = time.time() - age
+    for p in (video, video.parent, path):
+        os.utime(p, (when, when))
+    return video
+
+
+def test_sweep_removes_expired_units_but_keeps_pinned(tmp_path):
+    """Test age-based removal, pins, and untouched recent renders"""
+    sweeper = TempSweeper(tmp_path, quota_bytes=None, max_age=3600)
+    videos = tmp_path / "media" / "videos"
+    make_unit(videos / "old", 100, age=7200)
+    pinned = make_unit(videos / "shown", 100, age=7200)
+    make_unit(videos / "recent", 100, age=60)
+    (tmp_path / "leftover.py").write_text("x")
+    os.utime(tmp_path / "leftover.py", (0, 0))
+
+    sweeper.pin(pinned)
+    result = sweeper.sweep()
+
+    assert result == {"removed": 2, "bytes_reclaimed": 101, "bytes_used": 200}
+    assert sorted(p.name for p in videos.iterdir()) == ["recent", "shown"]
+    assert not (tmp_path / "leftover.py").exists()
+
+    # Once unpinned (and unused for long enough) it goes too
+    sweeper.unpin(pinned)
+    os.utime(videos / "shown", (0, 0))
+    assert sweeper.sweep()["removed"] == 1
+
+
+def test_sweep_evicts_least_recently_used_over_quota(tmp_path):
+    """Test that the oldest units go first until temp is under quota"""
+    sweeper = TempSweeper(tmp_path, quota_bytes=250, max_age=3600, min_age=60)
+    images = tmp_path / "media" / "images"
+    for name, age in [("a", 3000), ("b", 2000), ("c", 1000)]:
+        make_unit(images / name, 100, age=age)
+
+    result = sweeper.sweep()
+
+    assert result == {"removed": 1, "bytes_reclaimed": 100, "bytes_used": 200}
+    assert sorted(p.name for p in images.iterdir()) == ["b", "c"]
+
+    # Units used within min_age stay, however far over quota
+    make_unit(images / "d", 1000, age=10)
+    assert sweeper.sweep()["removed"] == 2
+    assert sorted(p.name for p in images.iterdir()) == ["d"]
+
+    stats = sweeper.stats()
+    assert (stats["sweeps"], stats["units_removed"], stats["bytes_reclaimed"]) == (2, 3, 300)
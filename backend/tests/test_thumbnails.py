@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from backend.core.storage import StorageManager
+from backend.core.renderer import Renderer
+from backend.core.thumbnails import GraphThumbnailRefresher, NodeThumbnailService
+from backend.models.graph import Graph
+from backend.models.node import NodeData
+
+
+class FakeRenderer(Renderer):
+    """Renderer that writes placeholder PNGs instead of running manim"""
+
+    def __init__(self, storage):
+        super().__init__(storage)
+        self.batches = []
+        self.thumbnails = []
+
+    async def render_scene_stills(self, python_code, scene_names, resolution, niceness=0):
+        self.batches.append(list(scene_names))
+        results = {}
+        render_dir = self.new_render_dir()
+        for scene_name in scene_names:
+            image = render_dir / f"{scene_name}.png"
+            image.write_bytes(b"png")
+            results[scene_name] = image
+        return results
+
+    async def render_thumbnail(self, graph, resolution, niceness=0):
+        self.thumbnails.append(graph.id)
+        image = self.new_render_dir() / "StillScene.png"
+        image.write_bytes(b"png")
+        return image, "code"
+
+
+@pytest.fixture
+def service(tmp_path):
+    storage = StorageManager(base_dir=str(tmp_path))
+    return NodeThumbnailService(storage, FakeRenderer(storage))
+
+
+def test_cache_key_ignores_dict_order():
+    """Test that equal node data maps to the same cache key"""
+    a = NodeThumbnailService.cache_key("Circle", {"radius": "1.0", "color": "#FFFFFF"})
+    b = NodeThumbnailService.cache_key("Circle", {"color": "#FFFFFF", "radius": "1.0"})
+    assert a == b
+    assert a.startswith("Circle-")
+
+
+def test_batch_renders_once_then_hits_cache(service):
+    """Test that a batch renders in one pass and later batches use the cache"""
+    nodes = [
+        {"type": "Circle", "data": {}},
+        {"type": "Square", "data": {}},
+        {"type": "FadeIn", "data": {}},
+    ]
+
+    first = asyncio.run(service.get_thumbnails(nodes))
+    second = asyncio.run(service.get_thumbnails(nodes))
+
+    assert len(service.renderer.batches) == 1
+    assert len(service.renderer.batches[0]) == 2
+    assert first[0]["url"].endswith(".png")
+    assert "error" in first[2]
+    assert first == second
+
+
+def test_batch_size_limit(service):
+    """Test that oversized batches are rejected"""
+    nodes = [{"type": "Circle", "data": {}}] * (service.max_batch_size + 1)
+    with pytest.raises(ValueError):
+        asyncio.run(service.get_thumbnails(nodes))
+
+
+def test_graph_thumbnail_refreshes_coalesce(tmp_path):
+    """Test that saves share one refresh and only render changes drop the thumbnail"""
+    storage = StorageManager(base_dir=str(tmp_path))
+    renderer = FakeRenderer(storage)
+    node = NodeData(id="n", type="Circle", position={"x": 0, "y": 0}, data={"radius": 1})
+    graph = Graph(id="g", name="G", nodes=[node])
+    thumbnail = storage.get_thumbnail_path("g")
+
+    async def run():
+        refresher = GraphThumbnailRefresher(storage, renderer)
+        for _ in range(3):
+            storage.save_graph(graph)
+            refresher.schedule("g")
+        refresher.start()
+        while refresher._pending or not thumbnail.exists():
+            await asyncio.sleep(0.01)
+        await refresher.stop()
+
+    asyncio.run(run())
+    assert renderer.thumbnails == ["g"]
+    assert not list(storage.temp_dir.glob("render-*"))
+
+    # Renaming or moving nodes does not change what renders
+    moved = node.model_copy(update={"position": {"x": 5, "y": 5}})
+    storage.save_graph(graph.model_copy(update={"name": "Renamed", "nodes": [moved]}))
+    assert thumbnail.exists()
+
+    changed = node.model_copy(update={"data": {"radius": 2}})
+    storage.save_graph(graph.model_copy(update={"nodes": [changed]}))
+    assert not thumbnail.exists()
@@ -0,0 +1,62 @@
+"""
+Standalone export render worker.
+
+Claims queued export jobs from the shared job store and renders them, so
+render capacity scales independently of the API processes. Run any number
+of these against the storage directory the API uses:
+
+    EXPORT_WORKERS=external uvicorn backend.main:app --workers 4
+    python -m backend.worker --concurrency 2
+"""
+import argparse
+import asyncio
+from backend.core.storage import StorageManager
+from backend.core.renderer import Renderer, ExportQueue
+from backend.core.temp_sweeper import TempSweeper
+from backend.core.logging_config import setup_logging
+
+
+async def run(export_queue: ExportQueue, temp_sweeper: TempSweeper):
+    """Run the worker loop, sweeping temp alongside it"""
+    temp_sweeper.start()
+    try:
+        await export_queue.run_worker()
+    finally:
+        await temp_sweeper.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manim Nodes export render worker")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs rendered at once")
+    parser.add_argument("--worker-id", default=None, help="Identifier recorded on claimed jobs")
+    parser.add_argument(
+        "--abandon-after", type=float, default=300.0,
+        help="Cancel jobs whose client stopped polling for this many seconds (0 disables)",
+    )
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logger = setup_logging(log_level=args.log_level)
+    storage = StorageManager()
+    # Its sweeps keep this worker's renders in progress (pinned) looking
+    # recently used to the API's sweeper; the temp quota is the API's to enforce
+    temp_sweeper = TempSweeper(storage.temp_dir, quota_bytes=None)
+    export_queue = ExportQueue(
+        storage,
+        Renderer(storage, temp_sweeper=temp_sweeper),
+        max_concurrent=args.concurrency,
+        worker_id=args.worker_id,
+        abandon_after=args.abandon_after or None,
+    )
+    logger.info(f"Export worker {export_queue.worker_id} started (concurrency {args.concurrency})")
+
+    try:
+        asyncio.run(run(export_queue, temp_sweeper))
+    except KeyboardInterrupt:
+        logger.info("Export worker stopped")
+    finally:
+        export_queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,20 @@
-import { Graph, NodeDefinition, ExportRequest, ExportStatus } from '../types/graph';
+import { Graph, GraphDiff, NodeDefinition, ExportRequest, ExportStatus } from '../types/graph';
 
 const API_BASE = '/api';
 
+export class GraphConflictError extends Error {
+  constructor() {
+    super('The graph was changed elsewhere; reload it before saving');
+    this.name = 'GraphConflictError';
+  }
+}
+
+// Graph version from a response's ETag
+function versionOf(response: Response): number | undefined {
+  const etag = response.headers.get('ETag');
+  return etag ? Number(etag.replace(/^W\//, '').replace(/"/g, '')) : undefined;
+}
+
 class ApiClient {
   // Graphs
   async createGraph(graph: Graph): Promise<Graph> {
@@ -14,8 +27,15 @@ class ApiClient {
     return response.json();
   }
 
-  async listGraphs(): Promise<Array<{ id: string; name: string; modified: string }>> {
-    const response = await fetch(`${API_BASE}/graphs`);
+  async listGraphs(
+    params: { offset?: number; limit?: number; sort?: 'modified' | 'name'; order?: 'asc' | 'desc'; q?: string } = {}
+  ): Promise<Array<{ id: string; name: string; modified: string }>> {
+    const query = new URLSearchParams(
+      Object.entries(params)
+        .filter(([, value]) => value !== undefined && value !== '')
+        .map(([key, value]) => [key, String(value)])
+    );
+    const response = await fetch(`${API_BASE}/graphs${query.toString() ? `?${query}` : ''}`);
     if (!response.ok) throw new Error('Failed to list graphs');
     return response.json();
   }
@@ -23,17 +43,31 @@ class ApiClient {
   async getGraph(id: string): Promise<Graph> {
     const response = await fetch(`${API_BASE}/graphs/${id}`);
     if (!response.ok) throw new Error('Failed to get graph');
-    return response.json();
+    return { ...(await response.json()), version: versionOf(response) };
   }
 
   async updateGraph(id: string, graph: Graph): Promise<Graph> {
+    const { version: _version, ...body } = graph;
     const response = await fetch(`${API_BASE}/graphs/${id}`, {
       method: 'PUT',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify(graph),
+      body: JSON.stringify(body),
     });
     if (!response.ok) throw new Error('Failed to update graph');
-    return response.json();
+    return { ...(await response.json()), version: versionOf(response) };
+  }
+
+  // Apply a partial update; rejected with GraphConflictError if the graph
+  // was saved since diff.version. Resolves to the new version.
+  async patchGraph(id: string, diff: GraphDiff): Promise<number> {
+    const response = await fetch(`${API_BASE}/graphs/${id}`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(diff),
+    });
+    if (response.status === 409) throw new GraphConflictError();
+    if (!response.ok) throw new Error('Failed to update graph');
+    return (await response.json()).version;
   }
 
   async deleteGraph(id: string): Promise<void> {
@@ -43,6 +77,26 @@ class ApiClient {
     if (!response.ok) throw new Error('Failed to delete graph');
   }
 
+  async listRevisions(id: string): Promise<Array<{ revision: number; kind: string; size: number; created_at: string }>> {
+    const response = await fetch(`${API_BASE}/graphs/${id}/revisions`);
+    if (!response.ok) throw new Error('Failed to list revisions');
+    return response.json();
+  }
+
+  async getRevision(id: string, revision: number): Promise<Graph> {
+    const response = await fetch(`${API_BASE}/graphs/${id}/revisions/${revision}`);
+    if (!response.ok) throw new Error('Failed to get revision');
+    return response.json();
+  }
+
+  async restoreRevision(id: string, revision: number): Promise<Graph> {
+    const response = await fetch(`${API_BASE}/graphs/${id}/revisions/${revision}/restore`, {
+      method: 'POST',
+    });
+    if (!response.ok) throw new Error('Failed to restore revision');
+    return response.json();
+  }
+
   async getGraphObjects(id: string): Promise<Array<{ name: string; type: string; node_id: string }>> {
     const response = await fetch(`${API_BASE}/graphs/${id}/objects`);
     if (!response.ok) throw new Error('Failed to get graph objects');
@@ -89,6 +143,32 @@ class ApiClient {
     return response.json();
   }
 
+  async cancelExport(jobId: string): Promise<{ job_id: string; status: string }> {
+    const response = await fetch(`${API_BASE}/export/${jobId}`, {
+      method: 'DELETE',
+    });
+    if (!response.ok) throw new Error('Failed to cancel export');
+    return response.json();
+  }
+
+  // Follow export jobs until they finish; returns a function that stops listening
+  subscribeExportEvents(
+    jobIds: string[],
+    onStatus: (status: ExportStatus) => void,
+    onEnd?: () => void
+  ): () => void {
+    const query = jobIds.map((id) => `job_id=${encodeURIComponent(id)}`).join('&');
+    const source = new EventSource(`${API_BASE}/export/events?${query}`);
+    source.addEventListener('job', (event) => {
+      onStatus(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('end', () => {
+      source.close();
+      onEnd?.();
+    });
+    return () => source.close();
+  }
+
   getExportDownloadUrl(jobId: string): string {
     return `${API_BASE}/export/${jobId}/download`;
   }
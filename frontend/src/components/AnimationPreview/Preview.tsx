@@ -1,4 +1,4 @@
-import { useRef, useEffect } from 'react';
+import { useRef, useEffect, useState } from 'react';
 import { Play, Pause, RotateCcw, Download, X, FolderOpen } from 'lucide-react';
 import { usePreviewStore } from '../../store/usePreviewStore';
 import { useGraphStore } from '../../store/useGraphStore';
@@ -12,9 +12,13 @@ export default function AnimationPreview() {
     videoUrl,
     error,
     debugLog,
+    segmentUrls,
     isPlaying,
     setPlaying,
   } = usePreviewStore();
+  // Segment currently playing while the render is in progress
+  const [segmentIndex, setSegmentIndex] = useState(0);
+  const [segmentEnded, setSegmentEnded] = useState(false);
   const graph = useGraphStore((state) => state.graph);
   const { sendRenderRequest, connected } = usePreviewWebSocket();
 
@@ -27,6 +31,25 @@ export default function AnimationPreview() {
     return () => video.removeEventListener('ended', handleEnded);
   }, [setPlaying]);
 
+  useEffect(() => {
+    if (segmentUrls.length === 0) {
+      setSegmentIndex(0);
+      setSegmentEnded(false);
+    } else if (segmentEnded && segmentIndex < segmentUrls.length - 1) {
+      // The next segment arrived after the current one finished playing
+      setSegmentIndex(segmentIndex + 1);
+      setSegmentEnded(false);
+    }
+  }, [segmentUrls, segmentEnded, segmentIndex]);
+
+  const handleSegmentEnded = () => {
+    if (segmentIndex < segmentUrls.length - 1) {
+      setSegmentIndex(segmentIndex + 1);
+    } else {
+      setSegmentEnded(true);
+    }
+  };
+
   const handlePlayPause = () => {
     if (!videoRef.current) return;
     if (isPlaying) {
@@ -161,13 +184,30 @@ export default function AnimationPreview() {
       )}
 
       <div className="flex-1 flex items-center justify-center bg-black">
-        {isRendering && (
+        {isRendering && segmentUrls.length === 0 && (
           <div className="text-white text-center">
             <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-white mx-auto mb-4"></div>
             <p>Rendering animation...</p>
           </div>
         )}
 
+        {isRendering && segmentUrls.length > 0 && (
+          <div className="relative max-w-full max-h-full">
+            <video
+              key={segmentUrls[segmentIndex]}
+              src={segmentUrls[segmentIndex]}
+              className="max-w-full max-h-full"
+              autoPlay
+              muted
+              onEnded={handleSegmentEnded}
+            />
+            <div className="absolute top-2 right-2 flex items-center gap-2 text-xs text-white bg-black/60 rounded px-2 py-1">
+              <div className="animate-spin rounded-full h-3 w-3 border-b-2 border-white"></div>
+              <span>Rendering... ({segmentUrls.length} ready)</span>
+            </div>
+          </div>
+        )}
+
         {error && (
           <div className="text-red-400 text-center p-4">
             <p className="font-semibold mb-2">Render Error</p>
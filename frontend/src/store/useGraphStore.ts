@@ -1,6 +1,6 @@
 import { create } from 'zustand';
 import { Node, Edge, Connection, addEdge, applyNodeChanges, applyEdgeChanges } from 'reactflow';
-import { Graph, NodeData, EdgeData } from '../types/graph';
+import { Graph, GraphDiff, NodeData, EdgeData } from '../types/graph';
 import { apiClient } from '../api/client';
 import { useUIStore } from './useUIStore';
 
@@ -32,6 +32,32 @@ interface GraphStore {
   renameGraph: (name: string) => void;
 }
 
+// Items of `next` that are new or changed, and ids of those removed from `prev`
+function diffItems<T extends { id: string }>(prev: T[], next: T[]): { upsert: T[]; remove: string[] } {
+  const saved = new Map(prev.map((item) => [item.id, JSON.stringify(item)]));
+  const ids = new Set(next.map((item) => item.id));
+  return {
+    upsert: next.filter((item) => saved.get(item.id) !== JSON.stringify(item)),
+    remove: prev.filter((item) => !ids.has(item.id)).map((item) => item.id),
+  };
+}
+
+// Changes turning the saved graph into the edited one. Name and settings
+// are small and edited in place (renameGraph), so they are always sent.
+function diffGraphs(saved: Graph, edited: Graph): GraphDiff {
+  const nodes = diffItems(saved.nodes, edited.nodes);
+  const edges = diffItems(saved.edges, edited.edges);
+  return {
+    name: edited.name,
+    settings: edited.settings,
+    upsert_nodes: nodes.upsert,
+    remove_nodes: nodes.remove,
+    upsert_edges: edges.upsert,
+    remove_edges: edges.remove,
+    version: saved.version,
+  };
+}
+
 export const useGraphStore = create<GraphStore>((set, get) => ({
   graph: null,
   nodes: [],
@@ -146,8 +172,14 @@ export const useGraphStore = create<GraphStore>((set, get) => ({
         },
       };
 
-      await apiClient.updateGraph(graph.id, updatedGraph);
-      set({ graph: updatedGraph, isDirty: false });
+      if (graph.version !== undefined) {
+        // Saved before: send only what changed since
+        const version = await apiClient.patchGraph(graph.id, diffGraphs(graph, updatedGraph));
+        set({ graph: { ...updatedGraph, version }, isDirty: false });
+      } else {
+        const saved = await apiClient.updateGraph(graph.id, updatedGraph);
+        set({ graph: { ...updatedGraph, version: saved.version }, isDirty: false });
+      }
     } catch (error) {
       console.error('Failed to save graph:', error);
       throw error;
@@ -9,6 +9,8 @@ interface PreviewStore {
   log: string[];
   debugLog: string[];
   generatedCode: string | null;
+  // Object URLs of per-animation segments streamed while rendering
+  segmentUrls: string[];
 
   // Playback state
   isPlaying: boolean;
@@ -24,6 +26,8 @@ interface PreviewStore {
   addDebugLog: (message: string) => void;
   clearLog: () => void;
   setGeneratedCode: (code: string | null) => void;
+  addSegment: (url: string) => void;
+  clearSegments: () => void;
   setPlaying: (playing: boolean) => void;
   setCurrentTime: (time: number) => void;
   setDuration: (duration: number) => void;
@@ -31,6 +35,10 @@ interface PreviewStore {
   reset: () => void;
 }
 
+const revokeSegments = (urls: string[]) => {
+  for (const url of urls) URL.revokeObjectURL(url);
+};
+
 export const usePreviewStore = create<PreviewStore>((set) => ({
   isRendering: false,
   videoUrl: null,
@@ -39,6 +47,7 @@ export const usePreviewStore = create<PreviewStore>((set) => ({
   log: [],
   debugLog: [],
   generatedCode: null,
+  segmentUrls: [],
   isPlaying: false,
   currentTime: 0,
   duration: 0,
@@ -51,20 +60,30 @@ export const usePreviewStore = create<PreviewStore>((set) => ({
   addDebugLog: (message) => set((state) => ({ debugLog: [...state.debugLog, message] })),
   clearLog: () => set({ log: [], debugLog: [] }),
   setGeneratedCode: (code) => set({ generatedCode: code }),
+  addSegment: (url) => set((state) => ({ segmentUrls: [...state.segmentUrls, url] })),
+  clearSegments: () =>
+    set((state) => {
+      revokeSegments(state.segmentUrls);
+      return { segmentUrls: [] };
+    }),
   setPlaying: (playing) => set({ isPlaying: playing }),
   setCurrentTime: (time) => set({ currentTime: time }),
   setDuration: (duration) => set({ duration }),
   setPlaybackSpeed: (speed) => set({ playbackSpeed: speed }),
   reset: () =>
-    set({
-      isRendering: false,
-      videoUrl: null,
-      error: null,
-      errorNodeId: null,
-      log: [],
-      debugLog: [],
-      generatedCode: null,
-      isPlaying: false,
-      currentTime: 0,
+    set((state) => {
+      revokeSegments(state.segmentUrls);
+      return {
+        isRendering: false,
+        videoUrl: null,
+        error: null,
+        errorNodeId: null,
+        log: [],
+        debugLog: [],
+        generatedCode: null,
+        segmentUrls: [],
+        isPlaying: false,
+        currentTime: 0,
+      };
     }),
 }));
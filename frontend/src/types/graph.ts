@@ -21,6 +21,18 @@ export interface Graph {
   nodes: NodeData[];
   edges: EdgeData[];
   settings: Record<string, any>;
+  // Saved version (from the ETag); not part of the stored graph
+  version?: number;
+}
+
+export interface GraphDiff {
+  name?: string;
+  settings?: Record<string, any>;
+  upsert_nodes?: NodeData[];
+  remove_nodes?: string[];
+  upsert_edges?: EdgeData[];
+  remove_edges?: string[];
+  version?: number;
 }
 
 export interface NodeDefinition {
@@ -34,13 +46,14 @@ export interface NodeDefinition {
 
 export interface ExportRequest {
   graph: Graph;
-  quality: '480p' | '720p' | '1080p' | '1440p' | '2160p';
+  // A preset, or a custom size as "WIDTHxHEIGHT" (even numbers)
+  quality: '480p' | '720p' | '1080p' | '1440p' | '2160p' | `${number}x${number}`;
   fps: number;
 }
 
 export interface ExportStatus {
   job_id: string;
-  status: 'pending' | 'running' | 'completed' | 'failed';
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
   progress: number;
   error?: string;
   download_url?: string;
@@ -7,7 +7,10 @@ import { Graph } from '../types/graph';
 export function usePreviewWebSocket() {
   const ws = useRef<ReconnectingWebSocket | null>(null);
   const [connected, setConnected] = useState(false);
-  const { setRendering, setVideoUrl, setError, addLog, addDebugLog, clearLog, reset, setGeneratedCode } = usePreviewStore();
+  const {
+    setRendering, setVideoUrl, setError, addLog, addDebugLog, clearLog, reset, setGeneratedCode,
+    addSegment, clearSegments,
+  } = usePreviewStore();
   const updateNodeData = useGraphStore((s) => s.updateNodeData);
   const markErrorEdges = useGraphStore((s) => s.markErrorEdges);
   const clearErrorEdges = useGraphStore((s) => s.clearErrorEdges);
@@ -21,6 +24,8 @@ export function usePreviewWebSocket() {
 
     // Create WebSocket connection
     ws.current = new ReconnectingWebSocket(wsUrl);
+    // Preview segments arrive as binary frames
+    ws.current.binaryType = 'arraybuffer';
 
     ws.current.addEventListener('open', () => {
       console.log('WebSocket connected');
@@ -32,7 +37,26 @@ export function usePreviewWebSocket() {
       setConnected(false);
     });
 
+    const handleProgressLine = (line: string) => {
+      const debugMatch = line.match(/^\[DEBUG:([^\]]+)\] (.*)$/);
+      if (debugMatch) {
+        const [, nodeId, debugMsg] = debugMatch;
+        addDebugLog(debugMsg);
+        updateNodeData(nodeId, { debugOutput: debugMsg });
+      } else if (line.startsWith('[DEBUG] ')) {
+        addDebugLog(line.slice(8));
+      } else {
+        addLog(line);
+      }
+    };
+
     ws.current.addEventListener('message', (event) => {
+      if (typeof event.data !== 'string') {
+        // MP4 bytes of the segment announced by the preceding 'segment' message
+        addSegment(URL.createObjectURL(new Blob([event.data], { type: 'video/mp4' })));
+        return;
+      }
+
       try {
         const message = JSON.parse(event.data);
 
@@ -41,22 +65,30 @@ export function usePreviewWebSocket() {
             addLog(message.message);
             break;
 
-          case 'progress': {
-            const debugMatch = message.message.match(/^\[DEBUG:([^\]]+)\] (.*)$/);
-            if (debugMatch) {
-              const [, nodeId, debugMsg] = debugMatch;
-              addDebugLog(debugMsg);
-              updateNodeData(nodeId, { debugOutput: debugMsg });
-            } else if (message.message.startsWith('[DEBUG] ')) {
-              addDebugLog(message.message.slice(8));
-            } else {
-              addLog(message.message);
+          case 'progress':
+            handleProgressLine(message.message);
+            break;
+
+          case 'progress_batch':
+            if (message.dropped) {
+              addLog(`... ${message.dropped} lines omitted`);
+            }
+            for (const line of message.messages) {
+              handleProgressLine(line);
             }
             break;
-          }
+
+          case 'render_progress':
+            // Structured progress (percent/ETA); not displayed yet
+            break;
+
+          case 'segment':
+            // Header only; the binary frame follows
+            break;
 
           case 'complete':
             setRendering(false);
+            clearSegments();
             setVideoUrl(message.video_url);
             setGeneratedCode(message.code || null);
             addLog('Render complete!');
@@ -64,6 +96,7 @@ export function usePreviewWebSocket() {
 
           case 'error':
             setRendering(false);
+            clearSegments();
             setError(message.message, message.node_id || null);
             if (message.code) setGeneratedCode(message.code);
             if (message.node_id) {
@@ -100,7 +133,10 @@ export function usePreviewWebSocket() {
       clearInterval(pingInterval);
       ws.current?.close();
     };
-  }, [setRendering, setVideoUrl, setError, addLog, addDebugLog, setGeneratedCode, updateNodeData, markErrorEdges]);
+  }, [
+    setRendering, setVideoUrl, setError, addLog, addDebugLog, setGeneratedCode, addSegment, clearSegments,
+    updateNodeData, markErrorEdges,
+  ]);
 
   const sendRenderRequest = (graph: Graph) => {
     if (!ws.current || ws.current.readyState !== WebSocket.OPEN) {
@@ -127,6 +163,8 @@ export function usePreviewWebSocket() {
       JSON.stringify({
         type: 'render',
         graph,
+        // Play finished animations while the rest is still rendering
+        stream: true,
       })
     );
   };
@@ -0,0 +1,74 @@
+"""Benchmark export render time per frame at each quality preset.
+
+Usage:
+    python scripts/benchmark_export_presets.py [example_id] [--fps 30] [--quality 720p 1080x1920 ...]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.examples import EXAMPLES, get_example_by_id
+from backend.core.renderer import PRESET_RESOLUTIONS, Renderer, RenderError, export_resolution
+from backend.core.storage import StorageManager
+from backend.models.graph import Graph
+
+
+def count_frames(video: Path) -> int:
+    """Number of video frames in a file, counted by ffprobe"""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-count_frames", "-select_streams", "v:0",
+            "-show_entries", "stream=nb_read_frames",
+            "-of", "default=noprint_wrappers=1:nokey=1", str(video),
+        ],
+        capture_output=True, text=True,
+    )
+    return int(result.stdout.strip() or 0)
+
+
+async def benchmark(graph: Graph, qualities: list[str], fps: int):
+    storage = StorageManager(base_dir=tempfile.mkdtemp(prefix="manim_benchmark_"))
+    renderer = Renderer(storage)
+
+    print(f"{'quality':>10}  {'size':>10}  {'frames':>6}  {'total s':>8}  {'ms/frame':>9}")
+    for quality in qualities:
+        width, height = export_resolution(quality)
+        start = time.perf_counter()
+        try:
+            video, _ = await renderer.render_export(graph, quality=quality, fps=fps)
+        except RenderError as e:
+            print(f"{quality:>10}  FAILED: {str(e).splitlines()[0]}")
+            continue
+        elapsed = time.perf_counter() - start
+        frames = count_frames(video)
+        per_frame = elapsed / frames * 1000 if frames else float("nan")
+        print(f"{quality:>10}  {f'{width}x{height}':>10}  {frames:>6}  {elapsed:>8.2f}  {per_frame:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("example", nargs="?", default=EXAMPLES[0]["id"], help="Example graph to render")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--quality", nargs="+", default=list(PRESET_RESOLUTIONS),
+                        help="Presets or custom WIDTHxHEIGHT sizes")
+    args = parser.parse_args()
+
+    example = get_example_by_id(args.example)
+    if example is None:
+        parser.error(f"Unknown example: {args.example}")
+
+    print(f"Example: {example['name']} at {args.fps} fps")
+    asyncio.run(benchmark(Graph(**example["graph"]), args.quality, args.fps))
+
+
+if __name__ == "__main__":
+    main()
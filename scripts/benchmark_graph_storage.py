@@ -0,0 +1,91 @@
+"""Benchmark graph save/load latency and on-disk size per storage format.
+
+Compares the old pretty-printed JSON with compact JSON, gzip and (if the
+zstandard package is installed) zstd, on graphs with large embedded datasets.
+
+Usage:
+    python scripts/benchmark_graph_storage.py [--points 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.core import storage as storage_module
+from backend.core.storage import StorageManager
+from backend.models.graph import Graph
+
+
+def make_graph(points: int) -> Graph:
+    """A graph whose nodes embed a dataset of `points` (x, y) samples"""
+    dataset = [[i / 10, (i * 7919 % 1000) / 100] for i in range(points)]
+    nodes = [
+        {
+            "id": f"node-{n}",
+            "type": "Axes",
+            "position": {"x": n * 200, "y": 0},
+            "data": {"label": f"Plot {n}", "points": dataset},
+        }
+        for n in range(4)
+    ]
+    return Graph(id="benchmark", name="Benchmark", nodes=nodes)
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def benchmark(graph: Graph, repeat: int):
+    formats = [None, "gzip"] + (["zstd"] if storage_module.zstandard else [])
+    with tempfile.TemporaryDirectory() as base_dir:
+        # The previous format: pretty-printed JSON written in place
+        legacy = Path(base_dir) / "legacy.json"
+
+        def save_legacy():
+            with open(legacy, "w") as f:
+                json.dump(graph.model_dump(), f, indent=2)
+
+        def load_legacy():
+            with open(legacy) as f:
+                Graph(**json.load(f))
+
+        save_ms = timed(save_legacy, repeat)
+        print(f"  {'indent=2':>9}  {legacy.stat().st_size / 1024:>10.0f}  {save_ms:>8.1f}  {timed(load_legacy, repeat):>8.1f}")
+
+        for compression in formats:
+            storage = StorageManager(base_dir=f"{base_dir}/{compression}", compression=compression)
+            save_ms = timed(lambda: storage.save_graph(graph), repeat)
+            load_ms = timed(lambda: storage.load_graph(graph.id), repeat)
+            size = sum(p.stat().st_size for p in storage.projects_dir.iterdir())
+            print(f"  {compression or 'compact':>9}  {size / 1024:>10.0f}  {save_ms:>8.1f}  {load_ms:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Dataset sizes to embed in each node")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for points in args.points:
+        print(f"{points} points per node")
+        print(f"  {'format':>9}  {'size (KiB)':>10}  {'save ms':>8}  {'load ms':>8}")
+        benchmark(make_graph(points), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
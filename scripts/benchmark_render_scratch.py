@@ -0,0 +1,100 @@
+"""Benchmark: preview working-directory I/O on disk vs. a RAM-backed scratch space.
+
+Replays the file traffic of a low-quality preview without running manim:
+in a fresh render directory, write a few dozen small SVGs and partial
+movie files, read the partials back (as the segment tap and the final
+concatenation do), write the combined movie, move it to the temp
+directory and delete the render directory. Point --disk at the storage
+volume to compare (a network or slow disk is where the scratch space pays
+off; on a fast local SSD the page cache hides most of the difference).
+
+Usage:
+    python scripts/benchmark_render_scratch.py [--disk DIR] [--scratch /dev/shm] [--renders 50] [--segments 30] [--segment-kb 150]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.core.scratch import ScratchSpace
+
+# File contents, generated once so only the I/O is timed
+SVG = os.urandom(8 * 1024)
+SEGMENT = os.urandom(4 * 1024 * 1024)
+
+
+def preview_io(render_dir: Path, temp_dir: Path, segments: int, segment_bytes: int) -> Path:
+    """One preview's worth of file traffic; returns the kept output"""
+    media = render_dir / "media"
+    (media / "Tex").mkdir(parents=True)
+    partial_dir = media / "videos" / "partial_movie_files" / "GeneratedScene"
+    partial_dir.mkdir(parents=True)
+    for i in range(segments):
+        (media / "Tex" / f"{i}.svg").write_bytes(SVG)
+        (partial_dir / f"uncached_{i:05d}.mp4").write_bytes(SEGMENT[:segment_bytes])
+
+    output = media / "videos" / "GeneratedScene.mp4"
+    with open(output, "wb") as combined:
+        for partial in sorted(partial_dir.glob("uncached_*.mp4")):
+            combined.write(partial.read_bytes())
+
+    target = Path(tempfile.mkdtemp(prefix="render-", dir=temp_dir)) / output.name
+    shutil.move(output, target)
+    return target
+
+
+def run(name: str, new_dir, release, temp_dir: Path, args) -> None:
+    timings = []
+    for _ in range(args.renders):
+        start = time.perf_counter()
+        render_dir = new_dir()
+        output = preview_io(render_dir, temp_dir, args.segments, args.segment_kb * 1024)
+        release(render_dir)
+        timings.append((time.perf_counter() - start) * 1000)
+        shutil.rmtree(output.parent)
+    timings.sort()
+    print(
+        f"{name:>8}  {statistics.median(timings):>8.2f}"
+        f"  {timings[int(len(timings) * 0.95) - 1]:>8.2f}  {timings[-1]:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--disk", type=Path, default=None, help="Directory on the storage volume (default: system temp)")
+    parser.add_argument("--scratch", type=Path, default=Path("/dev/shm"), help="RAM-backed directory")
+    parser.add_argument("--renders", type=int, default=50)
+    parser.add_argument("--segments", type=int, default=30, help="Animations (partial movie files) per preview")
+    parser.add_argument("--segment-kb", type=int, default=150, help="Size of each partial movie file")
+    args = parser.parse_args()
+
+    temp_dir = Path(tempfile.mkdtemp(prefix="manim_scratch_bench_", dir=args.disk))
+    scratch = ScratchSpace(args.scratch, quota_bytes=1024 ** 3)
+    if scratch.directory is None:
+        sys.exit(f"{args.scratch} is not usable as scratch space")
+
+    try:
+        print(f"{'where':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'max ms':>8}")
+        run(
+            "disk",
+            lambda: Path(tempfile.mkdtemp(prefix="render-", dir=temp_dir)),
+            lambda path: shutil.rmtree(path),
+            temp_dir, args,
+        )
+        run("scratch", scratch.acquire, scratch.release, temp_dir, args)
+    finally:
+        scratch.close()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
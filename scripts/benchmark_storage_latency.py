@@ -0,0 +1,186 @@
+"""Load test: websocket round-trip latency while large graphs are saved.
+
+Drives the API in-process over ASGI: one websocket client sends a message
+every 10 ms and times the reply, while other clients autosave large graphs
+in a loop (PATCH with a few changed nodes, as the editor does). Run once
+as the API does now (storage I/O in a thread pool) and once with storage
+calls made on the event loop, as before.
+
+Usage:
+    python scripts/benchmark_storage_latency.py [--nodes 200] [--points 500] [--changed 5] [--savers 4] [--seconds 5]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.main import app
+from backend.core.async_storage import AsyncStorage
+from backend.core.renderer import Renderer
+from backend.core.storage import StorageManager
+from backend.core.thumbnails import GraphThumbnailRefresher
+
+
+class BlockingStorage(AsyncStorage):
+    """The facade with storage calls made on the event loop (old behaviour)"""
+
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+# Points in each node's data; set from --points
+POINTS = 500
+
+
+def make_node(i: int, version: int) -> dict:
+    return {
+        "id": f"n{i}",
+        "type": "ParametricFunction",
+        "position": {"x": i, "y": version},
+        "data": {"points": [[j / 10, (j * i) % 7, version] for j in range(POINTS)]},
+    }
+
+
+def large_graph(graph_id: str, nodes: int) -> dict:
+    return {
+        "id": graph_id,
+        "name": "Load test",
+        "nodes": [make_node(i, 0) for i in range(nodes)],
+        "edges": [],
+        "settings": {},
+    }
+
+
+async def http_request(method: str, path: str, body: dict):
+    data = json.dumps(body).encode()
+    scope = {
+        "type": "http", "method": method, "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "scheme": "http", "http_version": "1.1",
+        "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": data, "more_body": False}
+        await asyncio.Event().wait()
+
+    status = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def saver(graph_id: str, nodes: int, changed: int, stop: asyncio.Event, saves: list):
+    version = 0
+    while not stop.is_set():
+        version += 1
+        first = version * changed % nodes
+        diff = {"upsert_nodes": [make_node((first + i) % nodes, version) for i in range(changed)]}
+        status = await http_request("PATCH", f"/api/graphs/{graph_id}", diff)
+        assert status == 200, status
+        saves.append(1)
+
+
+async def websocket_client(stop: asyncio.Event, latencies: list):
+    to_app: asyncio.Queue = asyncio.Queue()
+    from_app: asyncio.Queue = asyncio.Queue()
+    scope = {
+        "type": "websocket", "path": "/ws/preview", "raw_path": b"/ws/preview",
+        "query_string": b"", "root_path": "", "scheme": "ws", "http_version": "1.1",
+        "server": ("test", 80), "client": ("test", 1), "headers": [], "subprotocols": [],
+    }
+    session = asyncio.create_task(app(scope, to_app.get, from_app.put))
+    await to_app.put({"type": "websocket.connect"})
+    assert (await from_app.get())["type"] == "websocket.accept"
+
+    # A render request without a graph is answered right away with an error.
+    # Latency counts from when each message was due, so time spent waiting
+    # for a blocked event loop to even send it is included.
+    message = json.dumps({"type": "render"})
+    interval = 0.01
+    due = time.perf_counter()
+    while not stop.is_set():
+        await to_app.put({"type": "websocket.receive", "text": message})
+        await from_app.get()
+        now = time.perf_counter()
+        latencies.append((now - due) * 1000)
+        due += interval
+        if due < now:
+            # Messages missed while blocked count as one late message each
+            missed = int((now - due) / interval) + 1
+            latencies.extend((now - (due + k * interval)) * 1000 for k in range(missed))
+            due += missed * interval
+        await asyncio.sleep(max(due - time.perf_counter(), 0))
+
+    await to_app.put({"type": "websocket.disconnect", "code": 1000})
+    await session
+
+
+async def run(facade_class, nodes: int, changed: int, savers: int, seconds: float):
+    storage = StorageManager(base_dir=tempfile.mkdtemp(prefix="manim_latency_"))
+    async_storage = facade_class(storage)
+    app.state.storage = storage
+    app.state.async_storage = async_storage
+    app.state.renderer = Renderer(storage)
+    # Thumbnail renders run manim after saves; the refresher is never
+    # started, so only storage is measured
+    app.state.graph_thumbnails = GraphThumbnailRefresher(storage, app.state.renderer)
+
+    graph_ids = [f"load-{i}" for i in range(savers)]
+    for graph_id in graph_ids:
+        assert await http_request("PUT", f"/api/graphs/{graph_id}", large_graph(graph_id, nodes)) == 200
+
+    stop = asyncio.Event()
+    latencies, saves = [], []
+    tasks = [asyncio.create_task(websocket_client(stop, latencies))]
+    tasks += [asyncio.create_task(saver(graph_id, nodes, changed, stop, saves)) for graph_id in graph_ids]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    async_storage.close()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{facade_class.__name__:>15}  {len(saves) / seconds:>7.1f}  {len(latencies):>6}"
+        f"  {statistics.median(latencies):>8.2f}"
+        f"  {p99:>8.2f}  {latencies[-1]:>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200, help="Nodes per saved graph")
+    parser.add_argument("--points", type=int, default=500, help="Points in each node's data")
+    parser.add_argument("--changed", type=int, default=5, help="Nodes changed per save")
+    parser.add_argument("--savers", type=int, default=4, help="Concurrent clients saving")
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    global POINTS
+    POINTS = args.points
+
+    print(f"{'storage':>15}  {'saves/s':>7}  {'pings':>6}  {'p50 ms':>8}  {'p99 ms':>8}  {'max ms':>8}")
+    for facade_class in (BlockingStorage, AsyncStorage):
+        asyncio.run(run(facade_class, args.nodes, args.changed, args.savers, args.seconds))
+
+
+if __name__ == "__main__":
+    main()